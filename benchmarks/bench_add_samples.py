@@ -0,0 +1,67 @@
+"""Incorporar casos novos: ``add_samples`` vs. ``train()`` completo.
+
+Para cada tamanho de dataset sintético, mede o ``train()`` (lê o CSV, divide,
+ajusta pré-processamento e KNN, grava o artefato) e o ``add_samples`` de
+``--batch`` casos (transforma com o pré-processamento ajustado, acrescenta à
+matriz de vizinhos, grava o artefato e o CSV de casos). Com índice em árvore,
+mostra também o tempo da reconstrução em segundo plano, durante a qual as
+predições usam busca exaustiva.
+
+Uso: python benchmarks/bench_add_samples.py [--rows 615,50000,200000] [--batch 100]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from common import HepatitisPredictor, Paths, make_synthetic_dataset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="615,50000,200000")
+    parser.add_argument("--batch", type=int, default=100, help="casos por chamada de add_samples")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--algorithm", default="auto", help="neighbor_algorithm do preditor")
+    args = parser.parse_args()
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        csv = make_synthetic_dataset(rows)
+        # Casos "confirmados": outras linhas do mesmo gerador
+        fresh = pd.read_csv(make_synthetic_dataset(args.batch, seed=1)).drop(columns=["Unnamed: 0"])
+        fresh["Sex"] = fresh["Sex"].where(fresh["Sex"].notna(), None)
+        records = fresh.to_dict("records")
+        predictor = HepatitisPredictor(
+            Paths(csv, csv.with_name("knn_model.pkl")),
+            neighbor_algorithm=args.algorithm, refit_drift_threshold=None,
+        )
+
+        train_times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            predictor.train()
+            train_times.append(time.perf_counter() - start)
+
+        add_times, rebuild_times = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = predictor.add_samples(records, refit=False)
+            add_times.append(time.perf_counter() - start)
+            if predictor._index_thread is not None and result["index"] == "rebuilding":
+                predictor._index_thread.join()
+                rebuild_times.append(time.perf_counter() - start - add_times[-1])
+
+        train_ms = statistics.median(train_times) * 1e3
+        add_ms = statistics.median(add_times) * 1e3
+        line = (f"linhas={rows:<8} train={train_ms:9.1f} ms  add_samples({args.batch})={add_ms:8.1f} ms"
+                f"  {train_ms / add_ms:6.1f}x")
+        if rebuild_times:
+            line += f"  reconstrução do índice={statistics.median(rebuild_times) * 1e3:8.1f} ms"
+        print(line + f"  deriva={result['drift']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
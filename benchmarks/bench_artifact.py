@@ -0,0 +1,83 @@
+"""Tamanho, tempo de carga e memória de cada formato de artefato.
+
+Treina em dados sintéticos um modelo float64 e um float32 (busca exaustiva),
+exporta versões comprimidas e, em interpretadores novos, mede a carga +
+primeira predição e a memória residente depois disso (``RssAnon`` = privada,
+``RssFile`` = páginas do arquivo mapeado, compartilháveis entre workers).
+
+Uso: python benchmarks/bench_artifact.py [--rows 100000] [--compress 3]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from common import ROOT, SAMPLE_PAYLOAD, HepatitisPredictor, Paths, make_synthetic_dataset
+
+SCENARIO = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from model.prediction_service import HepatitisPredictor, Paths
+
+def status():
+    fields = {{}}
+    for line in open("/proc/self/status"):
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "RssAnon", "RssFile"):
+            fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+before = status()
+start = time.perf_counter()
+predictor = HepatitisPredictor(Paths(Path({data!r}), Path({model!r})), mmap_mode={mmap!r})
+predictor.predict({payload!r})
+elapsed = time.perf_counter() - start
+after = status()
+print(json.dumps({{"seconds": elapsed, **{{k: after[k] - before[k] for k in after}}}}))
+"""
+
+
+def run(data: Path, model: Path, mmap) -> dict:
+    code = SCENARIO.format(root=str(ROOT), data=str(data), model=str(model), mmap=mmap, payload=SAMPLE_PAYLOAD)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--compress", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_synthetic_dataset(args.rows)
+    workdir = Path(tempfile.mkdtemp(prefix="hep-bench-"))
+    artifacts = {}
+    for dtype in ("float64", "float32"):
+        predictor = HepatitisPredictor(
+            Paths(data, workdir / f"{dtype}.pkl"), neighbor_algorithm="brute", artifact_dtype=dtype,
+            dataset_cache=False,
+        )
+        result = predictor.train()
+        print(f"{dtype}: accuracy={result['accuracy']} stored as {result['artifact_dtype']}")
+        artifacts[dtype] = predictor.paths.model_pkl
+        artifacts[f"{dtype} + compress={args.compress}"] = predictor.export_artifact(
+            workdir / f"{dtype}.z{args.compress}.pkl", compress=args.compress
+        )
+
+    scenarios = [(name, path, None) for name, path in artifacts.items()]
+    scenarios += [(f"{name} + mmap", path, "r") for name, path in artifacts.items() if "compress" not in name]
+
+    print(f"\n{'artefato':<28}{'MB':>8}{'carga ms':>10}{'RSS MB':>9}{'anon MB':>9}{'file MB':>9}")
+    for name, path, mmap in scenarios:
+        r = run(data, path, mmap)
+        print(f"{name:<28}{path.stat().st_size / 1e6:>8.1f}{r['seconds'] * 1e3:>10.1f}"
+              f"{r['VmRSS']:>9.1f}{r['RssAnon']:>9.1f}{r['RssFile']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
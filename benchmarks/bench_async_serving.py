@@ -0,0 +1,152 @@
+"""Vazão e p99 de ``/predict``: servidor síncrono (Flask/werkzeug) vs. ASGI.
+
+Sobe cada servidor num subprocesso com um repositório que simula a latência
+de um INSERT remoto (``--db-latency``, padrão 20 ms) e dispara clientes
+concorrentes (50/200/1000 por padrão) a partir de um laço ``asyncio`` neste
+processo, uma conexão por requisição. O servidor síncrono é o worker de
+``model/serve.py`` (werkzeug, uma requisição por vez; ``--sync-threaded`` usa
+uma thread por conexão, como ``model_api.py``): a gravação segura o worker. No
+ASGI ela é disparada sem espera e a inferência roda num pool limitado.
+
+Só para uso local. O modo ASGI requer ``uvicorn`` (dependência opcional) e é
+pulado se não estiver instalado.
+
+Uso: python benchmarks/bench_async_serving.py [--clients 50,200,1000] [--duration 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+from common import ROOT, SAMPLE_PAYLOAD, make_trained_predictor
+
+SERVER = r"""
+import logging, sys, time
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from model.prediction_service import HepatitisPredictor, Paths, PredictionRepository
+
+class RemoteRepository(PredictionRepository):
+    def __init__(self, latency):
+        super().__init__(None)
+        self.latency = latency
+    def log(self, payload, result):
+        time.sleep(self.latency)
+
+predictor = HepatitisPredictor(Paths(Path({data!r}), Path({model!r})))
+predictor.warm_up(rounds=1)
+repo = RemoteRepository({latency!r})
+if {mode!r} == "sync":
+    from werkzeug.serving import make_server
+    from model.model_api import create_app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", {port}, create_app(predictor, repo), threaded={threaded!r})
+    server.socket.listen(2048)
+    server.serve_forever()
+else:
+    import uvicorn
+    from model.asgi_api import create_asgi_app
+    uvicorn.run(create_asgi_app(predictor, repo), host="127.0.0.1", port={port}, log_level="error",
+                backlog=2048, timeout_keep_alive=1)
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu a tempo")
+
+
+async def request(port: int, body: bytes) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"POST /predict HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        b"Connection: close\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    )
+    await writer.drain()
+    status = await reader.readline()
+    await reader.read()
+    writer.close()
+    if b" 200 " not in status:
+        raise RuntimeError(status.decode(errors="replace").strip())
+
+
+async def load(port: int, clients: int, duration: float) -> Dict[str, float]:
+    body = json.dumps(SAMPLE_PAYLOAD).encode()
+    latencies: List[float] = []
+    errors = 0
+    end = time.monotonic() + duration
+
+    async def client() -> None:
+        nonlocal errors
+        while time.monotonic() < end:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(request(port, body), timeout=30)
+                latencies.append(time.perf_counter() - start)
+            except (OSError, RuntimeError, asyncio.TimeoutError):
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else float("nan")
+    return {"rps": len(latencies) / elapsed, "p99_ms": p99 * 1000, "ok": len(latencies), "errors": errors}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", default="50,200,1000")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    parser.add_argument("--sync-threaded", action="store_true")
+    args = parser.parse_args()
+
+    predictor = make_trained_predictor()
+    modes = ["sync"]
+    try:
+        import uvicorn  # noqa: F401
+        modes.append("asgi")
+    except ImportError:
+        print("uvicorn não instalado: apenas o servidor síncrono será medido")
+
+    print(f"latência simulada do banco: {args.db_latency * 1000:.0f} ms, {args.duration:.0f} s por cenário")
+    for mode in modes:
+        port = free_port()
+        code = SERVER.format(
+            root=str(ROOT), data=str(predictor.paths.data_csv), model=str(predictor.paths.model_pkl),
+            latency=args.db_latency, mode=mode, port=port, threaded=args.sync_threaded,
+        )
+        server = subprocess.Popen([sys.executable, "-c", code])
+        try:
+            wait_ready(port)
+            for clients in (int(c) for c in args.clients.split(",")):
+                r = asyncio.run(load(port, clients, args.duration))
+                print(f"{mode:<5} clientes={clients:<5} {r['rps']:8.1f} req/s  p99={r['p99_ms']:9.1f} ms"
+                      f"  ok={r['ok']} erros={r['errors']}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Carga do dataset de treino: ``pd.read_csv`` a frio vs cache binário ``.npz``.
+
+Para cada tamanho gera um CSV sintético e mede: leitura direta do CSV, a
+primeira carga com cache (lê o CSV, calcula o hash e grava o ``.npz``), a
+carga com cache válido e a revalidação por hash após um ``touch`` no CSV.
+
+Uso: python benchmarks/bench_dataset_cache.py [--sizes 1000 100000 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from common import make_synthetic_dataset
+
+from model.dataset_cache import default_cache_path, load_dataset_cached, read_dataset
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def best_of(fn, repeat: int) -> float:
+    return min(timed(fn) for _ in range(repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'csv MB':>7} {'read_csv':>10} {'1st cached':>11} {'cached':>9} {'rehash':>9} {'speedup':>8}")
+    for n_rows in args.sizes:
+        csv = make_synthetic_dataset(n_rows)
+        cache = default_cache_path(csv)
+
+        cold = best_of(lambda: read_dataset(csv), args.repeat)
+        first = timed(lambda: load_dataset_cached(csv))
+        warm = best_of(lambda: load_dataset_cached(csv), args.repeat)
+        st = csv.stat()
+        os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        rehash = timed(lambda: load_dataset_cached(csv))
+
+        print(f"{n_rows:>9} {csv.stat().st_size / 1e6:>7.1f} {cold * 1e3:>8.1f}ms {first * 1e3:>9.1f}ms "
+              f"{warm * 1e3:>7.1f}ms {rehash * 1e3:>7.1f}ms {cold / warm:>7.1f}x")
+        cache.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Log de predições síncrono: política de pre-ping e tamanho do pool.
+
+Cada configuração grava ``--rows`` predições com ``--threads`` threads
+chamando ``PredictionRepository.log`` (um INSERT por chamada, como no
+``/predict`` sem write-behind) num SQLite em arquivo temporário e mostra
+linhas/s e os percentis de ``health()``. Com SQLite local o ping custa pouco;
+contra MySQL remoto cada ping é uma ida e volta a mais por checkout.
+
+Uso: python benchmarks/bench_db_pool.py [--rows 5000] [--threads 4]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import common  # noqa: F401  (coloca a raiz do repo no sys.path)
+from model.prediction_service import PredictionRepository
+
+RESULT = {"prediction": 1, "label": "Live", "confidence": 0.9}
+PAYLOAD = {"Age": 45, "Sex": "m", "ALB": 40.2, "ALT": 15.7}
+
+CONFIGS = [
+    ("pre_ping=always (padrão)", {}),
+    ("pre_ping=never", {"pre_ping": "never"}),
+    ("pre_ping=30s ociosa", {"pre_ping": 30}),
+    ("pre_ping=never pool=8", {"pre_ping": "never", "pool_size": 8, "max_overflow": 0}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="hep-bench-"))
+    per_thread = args.rows // args.threads
+    for i, (name, options) in enumerate(CONFIGS):
+        repo = PredictionRepository(f"sqlite:///{tmpdir / f'log_{i}.db'}", **options)
+
+        def worker() -> None:
+            for _ in range(per_thread):
+                repo.log(PAYLOAD, RESULT)
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        health = repo.health(ping=False)
+        latency = health["insert_latency_ms"]
+        print(f"{name:<28} {health['written'] / elapsed:9.0f} linhas/s  INSERT p50={latency['p50']:6.3f} ms"
+              f"  p99={latency['p99']:7.3f} ms  pings={health['pool']['pings']}  falhas={health['failed']}")
+        repo.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
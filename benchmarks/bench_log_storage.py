@@ -0,0 +1,98 @@
+"""Log de predições: JSON truncado (formato antigo) vs. colunas tipadas + hash.
+
+Grava ``--rows`` predições num SQLite em arquivo temporário para cada
+formato, montando as linhas com ``PredictionRepository._row`` e gravando em
+INSERTs de ``--batch`` linhas (como o write-behind). Mostra linhas/s, tamanho
+do arquivo, bytes por linha e quantos payloads o formato antigo truncou (JSON
+inválido ao ler de volta). Com ``--migrate`` também mede a migração da
+tabela antiga para a compacta.
+
+Uso: python benchmarks/bench_log_storage.py [--rows 1000000] [--batch 1000] [--migrate]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import SAMPLE_PAYLOAD
+from model.log_migration import migrate_prediction_log
+from model.prediction_service import PredictionRepository, legacy_prediction_log_table
+
+from sqlalchemy import MetaData, create_engine, func, select
+
+
+def make_payloads(n: int, seed: int = 0):
+    # Um conjunto de payloads variados, reciclado; 1 em 500 traz campos extras longos
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for i in range(min(n, 10_000)):
+        payload = {k: round(float(v) * rng.uniform(0.7, 1.3), 2) if k != "Sex" else v for k, v in SAMPLE_PAYLOAD.items()}
+        payload["Sex"] = "m" if i % 2 else "f"
+        if i % 500 == 0:
+            payload["Observacoes"] = "paciente em acompanhamento " * 100
+        payloads.append(payload)
+    return payloads
+
+
+def fill(repo: PredictionRepository, rows: int, batch: int) -> float:
+    payloads = make_payloads(rows)
+    result = {"prediction": 0, "label": "0=Blood Donor", "confidence": 0.8}
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        repo._insert([repo._row(payloads[i % len(payloads)], result) for i in range(offset, min(rows, offset + batch))])
+    return time.perf_counter() - start
+
+
+def count_invalid_json(db_url: str) -> int:
+    engine = create_engine(db_url)
+    table = legacy_prediction_log_table(MetaData())
+    invalid = 0
+    with engine.connect() as conn:
+        for (raw,) in conn.execute(select(table.c.payload_json)):
+            try:
+                json.loads(raw)
+            except ValueError:
+                invalid += 1
+    engine.dispose()
+    return invalid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--migrate", action="store_true")
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="hep-bench-"))
+    for name in ("legacy", "compact"):
+        path = tmpdir / f"{name}.db"
+        db_url = f"sqlite:///{path}"
+        if name == "legacy":
+            legacy_prediction_log_table(MetaData()).create(create_engine(db_url))
+        repo = PredictionRepository(db_url)
+        assert repo.legacy_schema == (name == "legacy")
+        elapsed = fill(repo, args.rows, args.batch)
+        with repo.engine.connect() as conn:
+            written = conn.execute(select(func.count()).select_from(repo.table)).scalar()
+        repo.engine.dispose()
+        size = os.path.getsize(path)
+        line = (f"{name:<8} linhas={written:<8} {written / elapsed:9.0f} linhas/s  arquivo={size / 2**20:8.1f} MiB"
+                f"  {size / written:6.1f} B/linha")
+        if name == "legacy":
+            line += f"  JSON inválido={count_invalid_json(db_url)}"
+            if args.migrate:
+                start = time.perf_counter()
+                summary = migrate_prediction_log(db_url, drop_legacy=True)
+                line += f"  migração={time.perf_counter() - start:6.1f} s ({summary['unparsable']} truncados)"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
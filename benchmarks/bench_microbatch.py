@@ -0,0 +1,76 @@
+"""Predições unitárias concorrentes: chamada direta vs. micro-lotes (``MicroBatcher``).
+
+``C`` threads chamam ``predict`` em laço durante ``--duration`` segundos, no
+mesmo processo (sem HTTP), primeiro direto no preditor e depois através do
+``MicroBatcher``. Mostra vazão, p50/p99 e o tamanho médio de lote atingido.
+
+Uso: python benchmarks/bench_microbatch.py [--clients 1,8,32,64] [--max-wait-ms 2] [--max-batch 64]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+from common import SAMPLE_PAYLOAD, make_synthetic_dataset, make_trained_predictor
+from model.batching import MicroBatcher
+
+
+def run(predict: Callable[[dict], dict], clients: int, duration: float) -> Dict[str, float]:
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+    end = time.monotonic() + duration
+
+    def worker(samples: List[float]) -> None:
+        while time.monotonic() < end:
+            start = time.perf_counter()
+            predict(SAMPLE_PAYLOAD)
+            samples.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in latencies]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    ordered = sorted(x for s in latencies for x in s)
+    return {
+        "rps": len(ordered) / elapsed,
+        "p50_ms": statistics.median(ordered) * 1e3,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", default="1,8,32,64")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=0, help="treina em dados sintéticos (0 = dataset real)")
+    args = parser.parse_args()
+
+    predictor = make_trained_predictor(make_synthetic_dataset(args.rows)) if args.rows else make_trained_predictor()
+    predictor.warm_up(rounds=1)
+    sizes: List[int] = []
+    batcher = MicroBatcher(
+        predictor, max_batch_size=args.max_batch, max_wait=args.max_wait_ms / 1000,
+        observer=lambda size, delays: sizes.append(size),
+    )
+    print(f"janela={args.max_wait_ms} ms, lote máximo={args.max_batch}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        direct = run(predictor.predict, clients, args.duration)
+        sizes.clear()
+        batched = run(batcher.predict, clients, args.duration)
+        mean_batch = statistics.mean(sizes) if sizes else 0.0
+        print(f"C={clients:<4} direto   {direct['rps']:8.1f} req/s  p50={direct['p50_ms']:7.2f} ms"
+              f"  p99={direct['p99_ms']:7.2f} ms")
+        print(f"{'':<6} lotes    {batched['rps']:8.1f} req/s  p50={batched['p50_ms']:7.2f} ms"
+              f"  p99={batched['p99_ms']:7.2f} ms  lote médio={mean_batch:.1f}")
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
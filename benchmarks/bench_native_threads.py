@@ -0,0 +1,79 @@
+"""Threads de requisição × threads nativas (BLAS/OpenMP) em ``predict_many``.
+
+Para cada combinação, ``R`` threads chamam ``predict_many`` com ``--batch``
+registros em laço durante ``--duration`` segundos, num preditor criado com
+``native_threads=N`` (``0`` = sem limite, decisão das bibliotecas). Mostra
+vazão em registros/s e p50/p99 por chamada.
+
+O esperado em máquinas com muitos núcleos é que ``R × N`` acima do número de
+núcleos piore o p99 (oversubscription); com ``N=1`` a vazão escala com ``R``.
+Em máquinas de 1 CPU todas as combinações ficam próximas.
+
+Uso: python benchmarks/bench_native_threads.py [--request-threads 1,4,16] [--native-threads 0,1,2,4]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+from threadpoolctl import threadpool_info
+
+from common import SAMPLE_PAYLOAD, HepatitisPredictor, make_synthetic_dataset, make_trained_predictor
+
+
+def run(predictor: HepatitisPredictor, records: List[dict], threads: int, duration: float) -> Dict[str, float]:
+    latencies: List[List[float]] = [[] for _ in range(threads)]
+    end = time.monotonic() + duration
+
+    def worker(samples: List[float]) -> None:
+        while time.monotonic() < end:
+            start = time.perf_counter()
+            predictor.predict_many(records)
+            samples.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(s,)) for s in latencies]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    ordered = sorted(x for s in latencies for x in s)
+    return {
+        "rows_per_s": len(ordered) * len(records) / elapsed,
+        "p50_ms": statistics.median(ordered) * 1e3,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--request-threads", default="1,4,16")
+    parser.add_argument("--native-threads", default="0,1,2,4")
+    parser.add_argument("--rows", type=int, default=20_000, help="linhas sintéticas de treino")
+    parser.add_argument("--batch", type=int, default=32, help="registros por chamada")
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    trained = make_trained_predictor(make_synthetic_dataset(args.rows), neighbor_algorithm="brute")
+    records = [dict(SAMPLE_PAYLOAD, Age=20 + i % 50) for i in range(args.batch)]
+    libs = ", ".join(f"{p['user_api']}:{p['internal_api']}={p['num_threads']}" for p in threadpool_info())
+    print(f"CPUs={os.cpu_count()}  bibliotecas: {libs or 'nenhuma'}")
+    print(f"treino={args.rows} linhas, lote={args.batch}, {args.duration:.0f} s por cenário")
+    for native in (int(n) for n in args.native_threads.split(",")):
+        predictor = HepatitisPredictor(
+            trained.paths, neighbor_algorithm="brute", native_threads=native or None,
+        )
+        predictor.warm_up(rounds=1)
+        for threads in (int(r) for r in args.request_threads.split(",")):
+            r = run(predictor, records, threads, args.duration)
+            print(f"nativas={native or '-':<3} requisições={threads:<4} {r['rows_per_s']:10.0f} reg/s"
+                  f"  p50={r['p50_ms']:8.2f} ms  p99={r['p99_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Latência de consulta e acurácia por backend de vizinhos (``neighbor_algorithm``).
+
+Para cada tamanho de dataset sintético treina o pipeline com cada backend e
+mede: tempo de fit, latência de consulta unitária (sobre linhas já
+pré-processadas), acurácia em amostra de teste e recall@k do modo aproximado
+em relação à busca exata.
+
+Uso: python benchmarks/bench_neighbors.py [--sizes 10000,100000,1000000] [--queries 200]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from common import HepatitisPredictor, Paths, make_synthetic_dataset, measure
+
+BACKENDS = [
+    ("brute", {}),
+    ("kd_tree", {}),
+    ("ball_tree", {}),
+    ("approximate", {"approx_n_probe": 1}),
+    ("approximate", {"approx_n_probe": 8}),
+    ("approximate", {"approx_n_probe": 32}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--eval-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    for n_rows in (int(s) for s in args.sizes.split(",")):
+        csv_path = make_synthetic_dataset(n_rows)
+        probe = HepatitisPredictor(Paths(csv_path, csv_path.with_suffix(".pkl")))
+        df = probe._load_dataset()
+        y = df[probe.target_col].astype(str).to_numpy()
+        X_train, X_test, y_train, y_test = train_test_split(
+            df.drop(columns=[probe.target_col]), y, test_size=0.2, random_state=1, stratify=y
+        )
+        X_test, y_test = X_test.iloc[: args.eval_rows], y_test[: args.eval_rows]
+
+        print(f"\n== {n_rows} rows ==")
+        print(f"{'backend':<22}{'fit s':>8}{'p50 ms':>9}{'p99 ms':>9}{'accuracy':>10}{'recall@k':>10}")
+        exact_neighbors = None
+        for algorithm, extra in BACKENDS:
+            predictor = HepatitisPredictor(probe.paths, neighbor_algorithm=algorithm, **extra)
+            pipeline = predictor._build_pipeline()
+            start = time.perf_counter()
+            pipeline.fit(X_train, y_train)
+            fit_s = time.perf_counter() - start
+
+            Xt = pipeline.named_steps["preprocess"].transform(X_test)
+            model = pipeline.named_steps["model"]
+            rows = iter(range(10 ** 9))
+            samples = measure(lambda: model.predict_proba(Xt[next(rows) % len(Xt)][None, :]),
+                              repeat=args.queries, warmup=5)
+            accuracy = float(np.mean(model.predict(Xt) == y_test))
+
+            neighbors = model.kneighbors(Xt[: args.queries], return_distance=False)
+            if exact_neighbors is None:
+                exact_neighbors = neighbors
+            k = neighbors.shape[1]
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(neighbors, exact_neighbors)])
+
+            ordered = sorted(samples)
+            label = algorithm + (f" probe={extra['approx_n_probe']}" if extra else "")
+            print(f"{label:<22}{fit_s:>8.2f}{np.median(ordered) * 1e3:>9.3f}"
+                  f"{ordered[int(len(ordered) * 0.99) - 1] * 1e3:>9.3f}{accuracy:>10.4f}{recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Normalização de lotes: registro a registro vs. ``ColumnarNormalizer``.
+
+O caminho por registro é o de ``_payload_to_row`` seguido do DataFrame usado
+pelo pipeline (o que ``predict_many`` fazia antes); o colunar produz o mesmo
+DataFrame com operações NumPy/pandas. Os payloads imitam o tráfego real:
+números, alguns textos numéricos, campos vazios e ``Sex`` em grafias variadas.
+
+Uso: python benchmarks/bench_normalization.py [--sizes 1,100,100000]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from common import SAMPLE_PAYLOAD, DATASET, HepatitisPredictor, Paths
+
+
+def make_payloads(n: int, seed: int = 0) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    sexes = ["m", "f", "Male", " mulher ", 1, 0, None]
+    payloads = []
+    for i in range(n):
+        payload = {k: v for k, v in SAMPLE_PAYLOAD.items() if rng.random() > 0.05}
+        payload["Age"] = int(rng.integers(20, 80))
+        payload["ALT"] = str(round(float(rng.normal(30, 10)), 1)) if i % 3 == 0 else float(rng.normal(30, 10))
+        if i % 7 == 0:
+            payload["CHOL"] = ""
+        payload["Sex"] = sexes[i % len(sexes)]
+        payloads.append(payload)
+    return payloads
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,100,100000")
+    args = parser.parse_args()
+
+    predictor = HepatitisPredictor(Paths(DATASET, DATASET.with_name("unused.pkl")))
+    cols = predictor.expected_cols
+
+    def per_record(payloads: List[dict]) -> pd.DataFrame:
+        return pd.DataFrame([predictor._payload_to_row(p) for p in payloads], columns=cols)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        payloads = make_payloads(size)
+        repeat = 5 if size >= 10_000 else 200
+        slow = best_of(lambda: per_record(payloads), repeat)
+        fast = best_of(lambda: predictor.normalizer.normalize(payloads), repeat)
+        print(f"registros={size:<7} por registro={slow * 1e3:9.3f} ms ({size / slow:11.0f}/s)"
+              f"  colunar={fast * 1e3:9.3f} ms ({size / fast:11.0f}/s)  {slow / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Latência por requisição de ``HepatitisPredictor.predict``.
+
+Compara a forma antiga (``predict_proba`` seguido de ``predict``, duas passadas
+pelo ColumnTransformer e pela busca de vizinhos) com a passada única atual e
+com o modo ``inference="fast"`` (pré-processamento em NumPy, sem DataFrame).
+
+Uso: python benchmarks/bench_predict.py [--repeat 2000]
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from common import SAMPLE_PAYLOAD, HepatitisPredictor, make_trained_predictor, measure, summarize
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    predictor = make_trained_predictor()
+    pipeline, encoder = predictor.pipeline, predictor.label_encoder
+
+    def two_passes():
+        X_df = predictor._payload_to_frame(SAMPLE_PAYLOAD)
+        float(np.max(pipeline.predict_proba(X_df)[0]))
+        pred_idx = int(pipeline.predict(X_df)[0])
+        encoder.inverse_transform([pred_idx])
+
+    def single_pass():
+        predictor.predict(SAMPLE_PAYLOAD)
+
+    fast_predictor = HepatitisPredictor(predictor.paths, inference="fast")
+
+    def fast_path():
+        fast_predictor.predict(SAMPLE_PAYLOAD)
+
+    old = measure(two_passes, repeat=args.repeat)
+    new = measure(single_pass, repeat=args.repeat)
+    fast = measure(fast_path, repeat=args.repeat)
+    print(summarize("predict_proba + predict", old))
+    print(summarize("single predict_proba pass", new))
+    print(summarize("single pass, fast inference", fast))
+    print(f"speedup vs two passes (p50): single={np.median(old) / np.median(new):.2f}x "
+          f"fast={np.median(old) / np.median(fast):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
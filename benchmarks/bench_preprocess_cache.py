@@ -0,0 +1,77 @@
+"""Re-treino com e sem o cache do pré-processamento (``preprocess_cache``).
+
+Simula a sequência de re-treinos em que só o KNN muda (``n_neighbors``
+diferente a cada rodada): sem cache o ``ColumnTransformer`` é reajustado e
+reaplicado sempre; com cache a primeira rodada grava o resultado e as demais
+só reajustam o KNN. Mede o ``train()`` completo e, separadamente, o ajuste
+(``Pipeline.fit`` ou, com cache, ``_fit_with_preprocess_cache``); o resto do
+``train`` (leitura, divisão, pontuação no teste) é igual nos dois casos.
+Com ``--neighbor-algorithm brute`` (padrão) o ajuste do KNN só guarda a matriz,
+então o tempo de ajuste é praticamente o do pré-processamento.
+
+Uso: python benchmarks/bench_preprocess_cache.py [--rows 200000] [--rounds 4]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sklearn.pipeline import Pipeline
+
+from common import HepatitisPredictor, Paths, make_synthetic_dataset
+
+
+def run(data: Path, rounds: int, algorithm: str, cache_dir=None):
+    workdir = Path(tempfile.mkdtemp(prefix="hep-bench-"))
+    fit_times, train_times = [], []
+    originals = (Pipeline.fit, HepatitisPredictor._fit_with_preprocess_cache)
+
+    def timed(fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                fit_times.append(time.perf_counter() - start)
+        return wrapper
+
+    Pipeline.fit = timed(originals[0])
+    HepatitisPredictor._fit_with_preprocess_cache = timed(originals[1])
+    try:
+        for k in range(rounds + 1):
+            predictor = HepatitisPredictor(
+                Paths(data, workdir / "knn_model.pkl"), n_neighbors=3 + 2 * k,
+                neighbor_algorithm=algorithm, preprocess_cache=cache_dir,
+            )
+            start = time.perf_counter()
+            predictor.train()
+            train_times.append(time.perf_counter() - start)
+    finally:
+        Pipeline.fit, HepatitisPredictor._fit_with_preprocess_cache = originals
+    # A primeira rodada só aquece (leitura do CSV, cache do dataset, gravação do cache)
+    return statistics.median(fit_times[1:]), statistics.median(train_times[1:]), fit_times[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--neighbor-algorithm", default="brute")
+    args = parser.parse_args()
+
+    data = make_synthetic_dataset(args.rows)
+    plain_fit, plain_train, _ = run(data, args.rounds, args.neighbor_algorithm)
+    cache_dir = Path(tempfile.mkdtemp(prefix="hep-bench-")) / "preprocess"
+    cached_fit, cached_train, first_fit = run(data, args.rounds, args.neighbor_algorithm, cache_dir)
+
+    print(f"{args.rows} linhas, {args.rounds} re-treinos mudando só n_neighbors (mediana), {args.neighbor_algorithm}")
+    print(f"{'sem cache':<12} ajuste={plain_fit * 1e3:9.1f} ms  train()={plain_train * 1e3:9.1f} ms")
+    print(f"{'com cache':<12} ajuste={cached_fit * 1e3:9.1f} ms  train()={cached_train * 1e3:9.1f} ms")
+    print(f"primeiro ajuste com cache (grava a entrada): {first_fit * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Predição de arquivos: ``predict`` linha a linha vs. ``score_file`` em blocos.
+
+Gera um CSV sintético de ``--rows`` linhas (exames sem ``Category``), treina
+no dataset real e mede linhas/s de: ``predict`` registro a registro (o que a
+API HTTP faz, medido nas primeiras ``--baseline-rows`` linhas) e
+``score_file`` com cada combinação de ``--workers`` e ``--chunk-size``.
+O pico de memória (RSS) de cada execução de ``score_file`` roda num processo
+filho para não herdar o pico das anteriores.
+
+Uso: python benchmarks/bench_score_file.py [--rows 500000] [--workers 1,2,4]
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import time
+
+import pandas as pd
+
+from common import DATASET, make_synthetic_dataset, make_trained_predictor
+from model.score_file import score_file
+
+
+def run(model_pkl, source, output, chunk_size, workers, queue) -> None:
+    from model.prediction_service import HepatitisPredictor, Paths
+
+    predictor = HepatitisPredictor(Paths(DATASET, model_pkl), mmap_mode="r")
+    summary = score_file(predictor, source, output, chunk_size=chunk_size, workers=workers)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put((summary, max(own, children) / 1024))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--baseline-rows", type=int, default=5_000)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--chunk-size", default="10000,50000")
+    args = parser.parse_args()
+
+    source = make_synthetic_dataset(args.rows)
+    frame = pd.read_csv(source).drop(columns=["Unnamed: 0", "Category"])
+    frame.to_csv(source, index=False)
+    predictor = make_trained_predictor()
+
+    records = frame.head(args.baseline_rows).astype(object).where(frame.head(args.baseline_rows).notna(), None)
+    records = records.to_dict("records")
+    start = time.perf_counter()
+    for record in records:
+        predictor.predict(record)
+    per_record = len(records) / (time.perf_counter() - start)
+    print(f"predict por registro ({len(records)} linhas): {per_record:12,.0f} linhas/s")
+
+    ctx = multiprocessing.get_context("fork")
+    for chunk_size in (int(c) for c in args.chunk_size.split(",")):
+        for workers in (int(w) for w in args.workers.split(",")):
+            queue = ctx.Queue()
+            output = source.with_name(f"scored_{chunk_size}_{workers}.csv")
+            proc = ctx.Process(target=run, args=(predictor.paths.model_pkl, source, output, chunk_size, workers, queue))
+            proc.start()
+            summary, rss_mb = queue.get()
+            proc.join()
+            print(f"score_file linhas={summary['rows']:<8} chunk={chunk_size:<6} workers={workers}"
+                  f"  {summary['rows_per_second']:12,.0f} linhas/s  {summary['rows_per_second'] / per_record:6.1f}x"
+                  f"  pico RSS={rss_mb:7.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Memória por worker e vazão do servidor multi-processo (``model/serve.py``).
+
+Treina um modelo sintético (por padrão 200k linhas, para a matriz do KNN ser
+visível na memória), sobe o servidor com 1, 2, 4... workers e mede:
+
+- RSS e PSS de cada worker (``/proc/<pid>/smaps_rollup``): PSS divide as
+  páginas compartilhadas entre os processos, então PSS << RSS indica que o
+  modelo mapeado está sendo compartilhado em vez de duplicado;
+- requisições/s em ``/predict`` com clientes concorrentes em processos separados.
+
+Somente Linux. Uso: python benchmarks/bench_serving.py [--workers 1,2,4] [--rows 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+from common import ROOT, SAMPLE_PAYLOAD, make_synthetic_dataset, make_trained_predictor
+
+BODY = json.dumps(SAMPLE_PAYLOAD).encode()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def post(url: str) -> None:
+    req = urllib.request.Request(url, data=BODY, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        resp.read()
+
+
+def client(url: str, duration: float) -> int:
+    done = 0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        post(url)
+        done += 1
+    return done
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":", 1)
+        values[key] = int(value.split()[0])
+    return {"rss": values["Rss"], "pss": values["Pss"]}
+
+
+def children(pid: int) -> List[int]:
+    text = Path(f"/proc/{pid}/task/{pid}/children").read_text()
+    return [int(p) for p in text.split()]
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> None:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            post(url)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    predictor = make_trained_predictor(make_synthetic_dataset(args.rows), neighbor_algorithm="brute")
+    print(f"modelo: {args.rows} linhas, artefato {predictor.paths.model_pkl.stat().st_size / 2**20:.1f} MiB")
+    print(f"{'workers':>8}{'req/s':>10}{'RSS/worker MiB':>16}{'PSS/worker MiB':>16}")
+    for n_workers in (int(w) for w in args.workers.split(",")):
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/predict"
+        proc = subprocess.Popen(
+            [sys.executable, str(ROOT / "model" / "serve.py"), "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(n_workers), "--model-path", str(predictor.paths.model_pkl)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(url)
+            with mp.Pool(args.clients) as pool:
+                counts = pool.starmap(client, [(url, args.duration)] * args.clients)
+            mem = [memory_kb(pid) for pid in children(proc.pid)]
+            rss = sum(m["rss"] for m in mem) / len(mem) / 1024
+            pss = sum(m["pss"] for m in mem) / len(mem) / 1024
+            print(f"{n_workers:>8}{sum(counts) / args.duration:>10.1f}{rss:>16.1f}{pss:>16.1f}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Tempo de partida e latência da primeira requisição, com e sem aquecimento.
+
+Cada cenário roda em um interpretador novo (imports e caches frios), cria o app
+com ``create_app`` e mede:
+
+- ``startup``: até o app aceitar requisições (com aquecimento, até ``/ready`` = 200);
+- ``1st /predict``: latência da primeira predição;
+- ``2nd /predict``: latência em regime.
+
+Cenários: artefato ``.pkl`` existente e artefato ausente (treino na partida).
+
+Uso: python benchmarks/bench_startup.py
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from common import DATASET, ROOT, SAMPLE_PAYLOAD, make_trained_predictor
+
+SCENARIO = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from model.model_api import create_app
+from model.prediction_service import HepatitisPredictor, Paths, PredictionRepository
+
+predictor = HepatitisPredictor(Paths(Path({data!r}), Path({model!r})))
+client = create_app(predictor=predictor, repo=PredictionRepository(None), warmup={warmup}).test_client()
+while client.get("/ready").status_code != 200:
+    time.sleep(0.005)
+ready = time.perf_counter()
+
+def timed():
+    t = time.perf_counter()
+    assert client.post("/predict", json={payload!r}).status_code == 200
+    return time.perf_counter() - t
+
+first, second = timed(), timed()
+print(json.dumps({{"startup": ready - start, "first": first, "second": second}}))
+"""
+
+
+def run(model_path: Path, warmup: bool) -> dict:
+    code = SCENARIO.format(root=str(ROOT), data=str(DATASET), model=str(model_path),
+                           warmup=warmup, payload=SAMPLE_PAYLOAD)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    trained = make_trained_predictor().paths.model_pkl
+    print(f"{'cenário':<34}{'startup s':>11}{'1st /predict ms':>17}{'2nd /predict ms':>17}")
+    for label, warmup in (("lazy (sem aquecimento)", False), ("warm-up + /ready", True)):
+        for artifact, model_path in (("pkl existente", trained),
+                                     ("pkl ausente", Path(tempfile.mkdtemp()) / "knn_model.pkl")):
+            r = run(model_path, warmup)
+            print(f"{label + ', ' + artifact:<34}{r['startup']:>11.3f}"
+                  f"{r['first'] * 1e3:>17.1f}{r['second'] * 1e3:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Pico de memória e tempo do treino em memória vs. treino em blocos.
+
+Cada cenário roda em um interpretador novo e informa o pico de memória
+alocada durante ``train()`` (``tracemalloc``, que inclui os arrays NumPy; as
+páginas de arquivos mapeados não contam) e o tempo do treino.
+O treino em memória carrega o CSV inteiro num DataFrame; com ``chunk_size`` o
+pico acompanha o tamanho do bloco e o armazenamento de vizinhos vai para disco.
+
+Uso: python benchmarks/bench_streaming_train.py [--sizes 100000 500000] [--chunk-size 50000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from common import ROOT, make_synthetic_dataset
+
+SCENARIO = r"""
+import json, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from model.prediction_service import HepatitisPredictor, Paths
+
+predictor = HepatitisPredictor(
+    Paths(Path({data!r}), Path({model!r})), dataset_cache=False, chunk_size={chunk_size!r},
+)
+tracemalloc.start()
+start = time.perf_counter()
+result = predictor.train()
+elapsed = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1]
+print(json.dumps({{"seconds": elapsed, "peak_mb": peak / 1e6, "accuracy": result["accuracy"]}}))
+"""
+
+
+def run(data: Path, chunk_size) -> dict:
+    model = Path(tempfile.mkdtemp(prefix="hep-bench-")) / "knn_model.pkl"
+    code = SCENARIO.format(root=str(ROOT), data=str(data), model=str(model), chunk_size=chunk_size)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'csv MB':>7} {'modo':<22}{'peak MB':>9}{'train s':>9}{'accuracy':>10}")
+    for n_rows in args.sizes:
+        data = make_synthetic_dataset(n_rows)
+        size_mb = data.stat().st_size / 1e6
+        for label, chunk_size in (("em memória", None), (f"blocos de {args.chunk_size}", args.chunk_size)):
+            r = run(data, chunk_size)
+            print(f"{n_rows:>9} {size_mb:>7.1f} {label:<22}{r['peak_mb']:>9.1f}{r['seconds']:>9.1f}{r['accuracy']:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
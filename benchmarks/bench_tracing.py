@@ -0,0 +1,56 @@
+"""Custo do rastreamento em ``HepatitisPredictor.predict``.
+
+Cada chamada é envolvida em ``tracer.begin``/``tracer.end``, como faz a API por
+requisição, com o rastreamento desligado, amostrado (``--sample-rate``) e
+ligado em todas as chamadas. As linhas JSON vão para ``os.devnull``: mede-se o
+custo de montar e serializar os eventos, não o de disco.
+
+Uso: python benchmarks/bench_tracing.py [--repeat 3000] [--sample-rate 0.1]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+import numpy as np
+
+from common import SAMPLE_PAYLOAD, HepatitisPredictor, make_trained_predictor, measure, summarize
+
+from model.tracing import Tracer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    trained = make_trained_predictor()
+    sink = open(os.devnull, "w")
+    scenarios = [
+        ("tracing off", Tracer(enabled=False)),
+        (f"tracing sampled ({args.sample_rate:g})", Tracer(enabled=True, sample_rate=args.sample_rate, stream=sink)),
+        ("tracing on", Tracer(enabled=True, stream=sink)),
+    ]
+
+    results = {}
+    for name, tracer in scenarios:
+        predictor = HepatitisPredictor(trained.paths, tracer=tracer)
+
+        def call():
+            token = tracer.begin()
+            try:
+                predictor.predict(SAMPLE_PAYLOAD)
+            finally:
+                tracer.end(token)
+
+        results[name] = measure(call, repeat=args.repeat)
+        print(summarize(name, results[name]))
+
+    base = np.median(results["tracing off"])
+    for name, samples in results.items():
+        print(f"{name:<28} overhead vs off (p50): {(np.median(samples) / base - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Busca de hiperparâmetros: ingênua vs. pré-processamento e vizinhos compartilhados.
+
+A referência ajusta o pipeline completo (pré-processamento + KNN) para cada
+combinação e fold, como um ``GridSearchCV`` sobre o ``Pipeline``. ``tune``
+ajusta o pré-processamento uma vez por fold e estratégia de imputação e faz
+uma busca de vizinhos por métrica. Ambos avaliam o mesmo espaço e folds.
+
+Uso: python benchmarks/bench_tuning.py [--rows 5000] [--cv 5] [--n-jobs -1]
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+from common import HepatitisPredictor, Paths, make_synthetic_dataset
+from model.dataset_cache import read_dataset
+from model.tuning import DEFAULT_SEARCH_SPACE, tune
+
+
+def naive_search(template, X, y, cv: int) -> float:
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=1).split(X, y))
+    space = DEFAULT_SEARCH_SPACE
+    start = time.perf_counter()
+    for k, w, m, s in itertools.product(
+        space["n_neighbors"], space["weights"], space["metric"], space["imputer_strategy"]
+    ):
+        for train_idx, val_idx in folds:
+            pipeline = clone(template).set_params(
+                model__n_neighbors=k, model__weights=w, model__metric=m, model__algorithm="brute",
+                preprocess__num__imputer__strategy=s,
+            )
+            pipeline.fit(X.iloc[train_idx], y[train_idx]).score(X.iloc[val_idx], y[val_idx])
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    data = make_synthetic_dataset(args.rows)
+    predictor = HepatitisPredictor(Paths(data, Path(tempfile.mkdtemp(prefix="hep-bench-")) / "knn_model.pkl"))
+    df = read_dataset(data)
+    X = df.drop(columns=[predictor.target_col])
+    y = np.unique(df[predictor.target_col].astype(str), return_inverse=True)[1]
+    template = predictor._build_pipeline()
+    n_configs = int(np.prod([len(v) for v in DEFAULT_SEARCH_SPACE.values()]))
+
+    naive = naive_search(template, X, y, args.cv)
+    start = time.perf_counter()
+    report = tune(template, X, y, cv=args.cv, n_jobs=1, random_state=1)
+    shared = time.perf_counter() - start
+    start = time.perf_counter()
+    tune(template, X, y, cv=args.cv, n_jobs=args.n_jobs, random_state=1)
+    pooled = time.perf_counter() - start
+
+    print(f"{args.rows} linhas, {n_configs} configurações x {args.cv} folds")
+    print(f"{'ingênua (pipeline por config)':<36} {naive:8.2f} s")
+    print(f"{'compartilhada, n_jobs=1':<36} {shared:8.2f} s  ({naive / shared:.1f}x)")
+    print(f"{f'compartilhada, n_jobs={args.n_jobs}':<36} {pooled:8.2f} s  ({naive / pooled:.1f}x)")
+    best = report["leaderboard"][0]
+    print(f"melhor: {best['params']} acurácia={best['mean_accuracy']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Utilitários compartilhados pelos benchmarks (executar a partir da raiz do repo).
+
+Os benchmarks nunca sobrescrevem ``model/knn_model.pkl``: cada um treina em um
+diretório temporário a partir do dataset real ou de dados sintéticos.
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from model.prediction_service import HepatitisPredictor, Paths  # noqa: E402,F401
+
+DATASET = ROOT / "model" / "HepatitisCdata.csv"
+
+SAMPLE_PAYLOAD: Dict[str, object] = {
+    "Age": 45, "Sex": "m", "ALB": 40.2, "ALP": 60.1, "ALT": 15.7, "AST": 22.3,
+    "BIL": 5.1, "CHE": 7.2, "CHOL": 3.9, "CREA": 90, "GGT": 25.4, "PROT": 70,
+}
+
+
+def make_synthetic_dataset(n_rows: int, path: Optional[Path] = None, *, seed: int = 0) -> Path:
+    """Gera um CSV no formato de ``HepatitisCdata.csv`` com ``n_rows`` linhas.
+
+    Reamostra linhas reais e aplica ruído gaussiano proporcional ao desvio de
+    cada exame, preservando a relação entre exames e categoria.
+    """
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(DATASET).drop(columns=["Unnamed: 0"], errors="ignore")
+    df = base.iloc[rng.integers(0, len(base), size=n_rows)].reset_index(drop=True)
+    numeric = df.select_dtypes("number").columns
+    noise = rng.normal(size=(n_rows, len(numeric))) * (base[numeric].std().to_numpy() * 0.3)
+    df[numeric] = (df[numeric].to_numpy() + noise).round(2)
+    if path is None:
+        path = Path(tempfile.mkdtemp(prefix="hep-bench-")) / f"synthetic_{n_rows}.csv"
+    df.to_csv(path)
+    return path
+
+
+def make_trained_predictor(data_csv: Path = DATASET, **kwargs) -> HepatitisPredictor:
+    """Treina um preditor em diretório temporário (modelo descartável)."""
+    tmpdir = Path(tempfile.mkdtemp(prefix="hep-bench-"))
+    predictor = HepatitisPredictor(Paths(data_csv=data_csv, model_pkl=tmpdir / "knn_model.pkl"), **kwargs)
+    predictor.train()
+    return predictor
+
+
+def measure(fn: Callable[[], object], *, repeat: int, warmup: int = 10) -> List[float]:
+    """Executa ``fn`` repetidamente e retorna as latências em segundos."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(name: str, samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p50 = statistics.median(ordered) * 1e3
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3
+    return f"{name:<28} p50={p50:8.3f} ms  p99={p99:8.3f} ms  n={len(samples)}"
@@ -44,6 +44,16 @@ class AppServer {
       }
     });
 
+    // Status do re-treino em segundo plano
+    this.app.get('/retrain/:id', async (req, res) => {
+      try {
+        const info = await this.predictionClient.trainingStatus(req.params.id);
+        res.json(info);
+      } catch (err) {
+        res.status(500).json({ error: err.message });
+      }
+    });
+
     // Listagem de diagnósticos salvos
     this.app.get('/diagnosticos', (req, res) => {
       res.json(this.repo.list());
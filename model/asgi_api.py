@@ -0,0 +1,252 @@
+"""Variante ASGI da API: mesmas rotas e respostas, com E/S de banco fora do caminho.
+
+A aplicação Flask de ``model_api.create_app`` é reaproveitada inteira (rotas,
+validação, métricas, rastreamento e registro de versões), mas servida por um
+laço ``asyncio``:
+
+- cada requisição roda a aplicação num pool de threads limitado
+  (``max_workers``), de modo que milhares de conexões abertas custam só
+  corrotinas enquanto a inferência usa no máximo ``max_workers`` threads;
+- ``repo.log`` vira uma tarefa assíncrona disparada sem espera
+  (``AsyncPredictionLogger``): a resposta sai antes do INSERT, que roda num
+  executor próprio. O número de gravações pendentes é limitado; o excedente
+  é descartado e contado, como no write-behind do repositório.
+
+Requer um servidor ASGI (ex.: ``uvicorn``, dependência opcional)::
+
+    uvicorn --factory model.asgi_api:create_asgi_app --port 5000
+
+ou ``python model/asgi_api.py --port 5000``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from .model_api import create_app
+    from .prediction_service import (
+        HepatitisPredictor,
+        PredictionRepository,
+        get_db_url_from_env,
+        get_repository_options_from_env,
+    )
+except ImportError:  # Executado fora de pacote
+    from model_api import create_app
+    from prediction_service import (
+        HepatitisPredictor,
+        PredictionRepository,
+        get_db_url_from_env,
+        get_repository_options_from_env,
+    )
+
+
+class AsyncPredictionLogger:
+    """Entrega ``log`` ao repositório como tarefa assíncrona, sem bloquear a predição.
+
+    Chamado das threads do pool; agenda a gravação no laço de eventos e
+    retorna imediatamente. Fora de um laço (antes do ``bind``) grava de forma
+    síncrona, como o repositório original.
+    """
+
+    def __init__(self, repo: PredictionRepository, *, max_pending: int = 10000, workers: int = 1) -> None:
+        self.repo = repo
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="repo-log")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def bound(self) -> bool:
+        return self._loop is not None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def log(self, payload: Dict[str, Any], result: Dict[str, Any]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.repo.log(payload, result)
+            return
+        loop.call_soon_threadsafe(self._spawn, self.repo.log, payload, result)
+
+    def log_many(self, records: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        # O lote inteiro vira uma única tarefa (um INSERT no repositório)
+        records = list(records)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.repo.log_many(records)
+            return
+        loop.call_soon_threadsafe(self._spawn, self.repo.log_many, records)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.repo.stats(), "async_pending": len(self._pending), "async_dropped": self.dropped}
+
+    def health(self, *, ping: bool = True) -> Dict[str, Any]:
+        body = self.repo.health(ping=ping)
+        if body.get("enabled"):
+            body.update(async_pending=len(self._pending), async_dropped=self.dropped)
+        return body
+
+    async def drain(self) -> None:
+        """Aguarda as gravações já agendadas (chamado no desligamento)."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _spawn(self, write: Any, *args: Any) -> None:
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        task = self._loop.create_task(self._write(write, *args))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _write(self, write: Any, *args: Any) -> None:
+        await self._loop.run_in_executor(self._executor, write, *args)
+
+
+class AsgiApp:
+    """Adapta uma aplicação WSGI para ASGI, executando-a num pool de threads."""
+
+    def __init__(self, wsgi_app: Any, logger: AsyncPredictionLogger, *, max_workers: int) -> None:
+        self.wsgi_app = wsgi_app
+        self.logger = logger
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asgi-worker")
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return  # WebSocket não é suportado
+
+        if not self.logger.bound:
+            # Servidor sem lifespan: liga o logger ao laço na primeira requisição
+            self.logger.bind(asyncio.get_running_loop())
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        environ = _environ(scope, bytes(body))
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+    async def aclose(self) -> None:
+        await self.logger.drain()
+        self.logger.close()
+        self.executor.shutdown(wait=False)
+
+    def _call_wsgi(self, environ: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], List[bytes]]:
+        # Roda inteiro na mesma thread: o teardown do Flask (fim do trace) ocorre no close()
+        response: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+            return chunks.append
+
+        chunks: List[bytes] = []
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                chunks.append(chunk)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], chunks
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.logger.bind(asyncio.get_running_loop())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name, value = raw_name.decode("latin-1").upper().replace("-", "_"), raw_value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue  # Vale o tamanho do corpo lido
+        key = name if name == "CONTENT_TYPE" else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(
+    predictor: Optional[HepatitisPredictor] = None,
+    repo: Optional[PredictionRepository] = None,
+    *,
+    max_workers: Optional[int] = None,
+    max_pending_logs: Optional[int] = None,
+    **options: Any,
+) -> AsgiApp:
+    """Aplicação ASGI com as rotas de ``create_app``; ``options`` vão para ``create_app``."""
+    if repo is None:
+        repo = PredictionRepository(get_db_url_from_env(), **get_repository_options_from_env())
+    if max_workers is None:
+        max_workers = int(os.getenv("ASGI_WORKER_THREADS", str(min(32, (os.cpu_count() or 1) + 4))))
+    if max_pending_logs is None:
+        max_pending_logs = int(os.getenv("ASGI_LOG_PENDING_MAX", "10000"))
+    logger = AsyncPredictionLogger(repo, max_pending=max_pending_logs)
+    return AsgiApp(create_app(predictor, logger, **options), logger, max_workers=max_workers)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve a API via ASGI (uvicorn).")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn não está instalado: pip install uvicorn")
+    uvicorn.run(create_asgi_app(warmup=True), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
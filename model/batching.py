@@ -0,0 +1,172 @@
+"""Micro-lotes dinâmicos na frente de ``HepatitisPredictor.predict``.
+
+Chamadas concorrentes de ``predict`` entram numa fila; uma thread despachante
+junta as que chegam dentro de ``max_wait`` segundos (contados a partir da mais
+antiga) até ``max_batch_size`` registros e faz uma única chamada a
+``predict_many`` (uma passada de ``predict_proba``). Cada chamador recebe o
+próprio resultado, igual ao de ``predict``. Se ``predict_many`` levantar
+exceção, o lote é refeito registro a registro e só o chamador culpado recebe
+o erro.
+
+Com ``max_wait=0`` nada é esperado: o lote é o que já estiver na fila quando
+o despachante fica livre (sem latência extra sob carga baixa).
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+# Intervalo em que o chamador confere se o despachante ainda está vivo
+_WAIT_POLL = 1.0
+
+
+class _Pending:
+    __slots__ = ("payload", "enqueued", "done", "result", "error", "batch_size", "delay")
+
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.payload = payload
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.batch_size = 0
+        self.delay = 0.0
+
+
+class MicroBatcher:
+    """Agrupa predições unitárias concorrentes em lotes para ``predict_many``.
+
+    ``observer(tamanho_do_lote, atrasos_na_fila)`` é chamado a cada lote (usado
+    pelo ``/metrics`` da API).
+    """
+
+    def __init__(
+        self,
+        predictor: Any,
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        observer: Optional[Callable[[int, List[float]], None]] = None,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size deve ser >= 1, recebido {max_batch_size!r}")
+        if max_wait < 0:
+            raise ValueError(f"max_wait não pode ser negativo, recebido {max_wait!r}")
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.observer = observer
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        # Protege _closed junto com o put: nada entra na fila depois do _STOP
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+        self._thread.start()
+
+    def predict(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        pending = _Pending(payload)
+        with self._lock:
+            if self._closed:
+                pending = None
+            else:
+                self._queue.put(pending)
+        if pending is None:
+            return self.predictor.predict(payload)
+        # Espera limitada: se o despachante morreu sem atender, prediz aqui mesmo
+        while not pending.done.wait(_WAIT_POLL):
+            if not self._thread.is_alive() and not pending.done.is_set():
+                return self.predictor.predict(payload)
+        trace = self.predictor.tracer.current()
+        if trace is not None:
+            trace.event("predict.batched", batch_size=pending.batch_size, queue_ms=round(pending.delay * 1000, 3))
+        if pending.error is not None:
+            raise pending.error
+        return pending.result  # type: ignore[return-value]
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Processa o que já está na fila e encerra o despachante."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = first.enqueued + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+        # Nada deveria sobrar depois do _STOP; se sobrar, é atendido antes de sair
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.max_batch_size):
+            self._dispatch(leftover[start:start + self.max_batch_size])
+
+    def _dispatch(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        delays = [started - p.enqueued for p in batch]
+        try:
+            results = self.predictor.predict_many([p.payload for p in batch])
+        except Exception as e:
+            results = None
+            if len(batch) == 1:
+                batch[0].error = e
+            else:
+                # Um payload ruim não pode falhar os outros chamadores do lote:
+                # refaz um a um para que só quem causou a falha receba o erro
+                for p in batch:
+                    try:
+                        p.result = self.predictor.predict(p.payload)
+                    except Exception as item_error:
+                        p.error = item_error
+        for i, p in enumerate(batch):
+            p.batch_size, p.delay = len(batch), delays[i]
+            if results is not None:
+                result = results[i]
+                if "error" in result:
+                    # Mesmo comportamento de predict: registro inválido levanta exceção
+                    p.error = ValueError(result["error"])
+                else:
+                    p.result = result
+        if self.observer is not None:
+            try:
+                self.observer(len(batch), delays)
+            except Exception:
+                pass  # Falha de métrica não pode deixar chamadores esperando
+        for p in batch:
+            p.done.set()
+
+
+def get_batching_options_from_env() -> Dict[str, Any]:
+    # MICROBATCH=1 liga os micro-lotes no /predict; MICROBATCH_MAX_SIZE e
+    # MICROBATCH_MAX_WAIT_MS definem o tamanho máximo e a janela de espera
+    return {
+        "enabled": os.getenv("MICROBATCH") == "1",
+        "max_batch_size": int(os.getenv("MICROBATCH_MAX_SIZE", "64")),
+        "max_wait": float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2")) / 1000,
+    }
@@ -0,0 +1,133 @@
+"""Cache binário (NumPy ``.npz``) do dataset de treino.
+
+``pd.read_csv`` domina o tempo de re-treino em datasets grandes. Aqui o
+DataFrame já tipado é gravado coluna a coluna num ``.npz`` ao lado do CSV e
+reaproveitado enquanto o CSV não mudar. A validade é conferida primeiro por
+tamanho + ``mtime`` (sem ler o CSV); se só o ``mtime`` mudou (ex.: ``touch`` ou
+cópia), o SHA-256 do conteúdo decide e, se igual, o cache continua valendo.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT = 1
+_META_KEY = "__meta__"
+
+
+def default_cache_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.stem + ".cache.npz")
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_dataset(csv_path: Path) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    # Remove coluna de índice sem nome caso exista
+    if "Unnamed: 0" in df.columns:
+        df = df.drop(columns=["Unnamed: 0"])
+    return df
+
+
+def load_dataset_cached(csv_path: Path, cache_path: Optional[Path] = None) -> pd.DataFrame:
+    """Lê o CSV via cache binário, (re)criando o cache quando o CSV mudou."""
+    cache_path = cache_path or default_cache_path(csv_path)
+    stat = csv_path.stat()
+    meta = _read_meta(cache_path)
+    if meta is not None and meta["size"] == stat.st_size:
+        if meta["mtime_ns"] == stat.st_mtime_ns:
+            return _load_frame(cache_path, meta)
+        sha = file_sha256(csv_path)
+        if meta["sha256"] == sha:
+            frame = _load_frame(cache_path, meta)
+            # Conteúdo igual: só atualiza o mtime para a próxima checagem rápida
+            _write_cache(cache_path, frame, {**meta, "mtime_ns": stat.st_mtime_ns})
+            return frame
+
+    df = read_dataset(csv_path)
+    meta = {
+        "format": CACHE_FORMAT,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(csv_path),
+    }
+    _write_cache(cache_path, df, meta)
+    return df
+
+
+def dataset_sha256(csv_path: Path, cache_path: Optional[Path] = None) -> str:
+    """SHA-256 do CSV, reaproveitando o valor gravado no cache se o arquivo não mudou."""
+    stat = csv_path.stat()
+    meta = _read_meta(cache_path or default_cache_path(csv_path))
+    if meta is not None and meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+        return meta["sha256"]
+    return file_sha256(csv_path)
+
+
+def _read_meta(cache_path: Path) -> Optional[Dict[str, Any]]:
+    if not cache_path.exists():
+        return None
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            meta = json.loads(str(data[_META_KEY]))
+    except Exception:
+        return None  # Cache corrompido ou de outra versão: reconstruído
+    return meta if meta.get("format") == CACHE_FORMAT else None
+
+
+def _load_frame(cache_path: Path, meta: Dict[str, Any]) -> pd.DataFrame:
+    columns: Dict[str, Any] = {}
+    with np.load(cache_path, allow_pickle=False) as data:
+        for i, (name, kind) in enumerate(meta["columns"]):
+            if kind == "str":
+                # Texto volta a object; o código -1 aponta para o NaN no fim do
+                # dicionário (ausente, como no read_csv)
+                lookup = np.append(data[f"u{i}"].astype(object), np.nan)
+                columns[name] = lookup[data[f"c{i}"]]
+            else:
+                columns[name] = data[f"c{i}"]
+    return pd.DataFrame(columns)
+
+
+def _write_cache(cache_path: Path, df: pd.DataFrame, meta: Dict[str, Any]) -> None:
+    arrays: Dict[str, np.ndarray] = {}
+    layout = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        if col.dtype.kind in "biuf":
+            arrays[f"c{i}"] = col.to_numpy()
+            layout.append((name, "num"))
+        elif col.dtype == object and pd.api.types.infer_dtype(col, skipna=True) in ("string", "empty"):
+            # Texto codificado como dicionário: códigos inteiros + valores distintos
+            codes, uniques = pd.factorize(col)
+            arrays[f"c{i}"] = codes.astype(np.int32)
+            arrays[f"u{i}"] = np.asarray(uniques, dtype=str)
+            layout.append((name, "str"))
+        else:
+            return  # Tipo sem representação fiel no .npz: segue só com o CSV
+    arrays[_META_KEY] = np.array(json.dumps({**meta, "columns": layout}))
+
+    # Grava em arquivo temporário e troca atomicamente; sem permissão de
+    # escrita o cache é simplesmente ignorado
+    tmp = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, cache_path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,174 @@
+"""Migra o log de predições do formato antigo (JSON truncado) para o compacto.
+
+O formato antigo guardava ``json.dumps(payload)[:2048]`` em ``payload_json``;
+o compacto (``prediction_log_table``) guarda o vetor normalizado em colunas
+tipadas e o hash do payload. A migração copia as linhas, em lotes ordenados
+por ``id`` (ids, datas e resultados preservados), para ``<tabela>_compact_tmp``
+e só no fim, numa transação, copia o que chegou nesse meio tempo e troca os
+nomes: a antiga vira ``<tabela>_legacy`` e a cópia assume ``<tabela>``.
+Payloads que o truncamento deixou inválidos entram com as colunas de exames
+nulas e o hash do texto gravado, e são contados em ``unparsable``.
+
+Até a troca de nomes a tabela do serviço não muda; se a cópia for
+interrompida, rodar de novo continua a partir do maior ``id`` já copiado.
+O serviço detecta o formato na partida: reinicie-o depois da migração (até
+lá os INSERTs dele falham e são contados em ``failed``).
+
+Uso: python model/log_migration.py [--db-url URL] [--batch-size 10000] [--drop-legacy]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    from .prediction_service import (
+        SQLALCHEMY_AVAILABLE,
+        get_db_url_from_env,
+        is_legacy_log_table,
+        legacy_prediction_log_table,
+        log_features,
+        payload_hash,
+        prediction_log_table,
+    )
+except ImportError:  # Executado como script
+    from prediction_service import (
+        SQLALCHEMY_AVAILABLE,
+        get_db_url_from_env,
+        is_legacy_log_table,
+        legacy_prediction_log_table,
+        log_features,
+        payload_hash,
+        prediction_log_table,
+    )
+
+if SQLALCHEMY_AVAILABLE:
+    from sqlalchemy import MetaData, create_engine, func, inspect, select, text
+
+
+def migrate_prediction_log(
+    db_url: str,
+    *,
+    table: str = "predictions",
+    batch_size: int = 10_000,
+    drop_legacy: bool = False,
+) -> Dict[str, Any]:
+    """Converte ``table`` para o formato compacto; não faz nada se já estiver nele.
+
+    Retorna ``status`` (``"migrated"`` ou ``"up_to_date"``), linhas copiadas
+    nesta execução, linhas com JSON inválido e o nome da tabela antiga
+    (``None`` se removida).
+    """
+    if not SQLALCHEMY_AVAILABLE:
+        raise RuntimeError("A migração requer SQLAlchemy.")
+    if batch_size < 1:
+        raise ValueError("batch_size deve ser >= 1.")
+    engine = create_engine(db_url)
+    try:
+        legacy_name = f"{table}_legacy"
+        tmp_name = f"{table}_compact_tmp"
+        quote = engine.dialect.identifier_preparer.quote
+        if not is_legacy_log_table(engine, table):
+            inspector = inspect(engine)
+            if inspector.has_table(table) or not inspector.has_table(tmp_name):
+                return {"status": "up_to_date", "migrated": 0, "unparsable": 0, "legacy_table": None}
+            # Interrompida entre as duas trocas de nome (DDL sem transação, ex.: MySQL)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {quote(tmp_name)} RENAME TO {quote(table)}"))
+            migrated = unparsable = 0
+        else:
+            metadata = MetaData()
+            legacy = legacy_prediction_log_table(metadata, table)
+            compact = prediction_log_table(metadata, tmp_name)
+            compact.create(engine, checkfirst=True)
+            with engine.connect() as conn:
+                last_id = conn.execute(select(func.max(compact.c.id))).scalar()
+
+            migrated = unparsable = 0
+            while True:
+                with engine.begin() as conn:
+                    copied, bad, last_id = _copy_batch(conn, legacy, compact, last_id, batch_size)
+                migrated, unparsable = migrated + copied, unparsable + bad
+                if copied < batch_size:
+                    break
+            # O que o serviço gravou durante a cópia entra junto com a troca de nomes
+            with engine.begin() as conn:
+                while True:
+                    copied, bad, last_id = _copy_batch(conn, legacy, compact, last_id, batch_size)
+                    migrated, unparsable = migrated + copied, unparsable + bad
+                    if copied < batch_size:
+                        break
+                conn.execute(text(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy_name)}"))
+                conn.execute(text(f"ALTER TABLE {quote(tmp_name)} RENAME TO {quote(table)}"))
+
+        if drop_legacy:
+            legacy_prediction_log_table(MetaData(), legacy_name).drop(engine, checkfirst=True)
+        return {
+            "status": "migrated",
+            "migrated": migrated,
+            "unparsable": unparsable,
+            "legacy_table": None if drop_legacy else legacy_name,
+        }
+    finally:
+        engine.dispose()
+
+
+def _copy_batch(conn: Any, legacy: Any, compact: Any, last_id: Optional[int], batch_size: int) -> tuple:
+    # (linhas copiadas, linhas com JSON inválido, último id copiado)
+    query = select(legacy).order_by(legacy.c.id).limit(batch_size)
+    if last_id is not None:
+        query = query.where(legacy.c.id > last_id)
+    rows = conn.execute(query).mappings().all()
+    if not rows:
+        return 0, 0, last_id
+    converted = [_convert(row) for row in rows]
+    unparsable = sum(1 for row in converted if row.pop("_unparsable", False))
+    conn.execute(compact.insert(), converted)
+    return len(rows), unparsable, rows[-1]["id"]
+
+
+def _convert(row: Any) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "id": row["id"],
+        "created_at": row["created_at"],
+        "prediction": row["prediction"],
+        "label": row["label"],
+        "confidence": row["confidence"],
+    }
+    raw = row["payload_json"] or ""
+    try:
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            raise ValueError("payload não é um objeto")
+    except ValueError:
+        # JSON cortado em 2048 caracteres: só o hash do texto que sobrou
+        out["payload_hash"] = hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+        out.update(log_features({}))
+        out["_unparsable"] = True
+        return out
+    out["payload_hash"] = payload_hash(payload)
+    out.update(log_features(payload))
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Migra o log de predições para o formato compacto")
+    parser.add_argument("--db-url", default=None, help="URL SQLAlchemy (padrão: DB_URL)")
+    parser.add_argument("--table", default="predictions")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Linhas copiadas por transação")
+    parser.add_argument("--drop-legacy", action="store_true", help="Remove a tabela antiga ao final")
+    args = parser.parse_args(argv)
+
+    db_url = args.db_url or get_db_url_from_env()
+    if not db_url:
+        parser.error("informe --db-url ou defina DB_URL")
+    summary = migrate_prediction_log(
+        db_url, table=args.table, batch_size=args.batch_size, drop_legacy=args.drop_legacy,
+    )
+    print(json.dumps(summary), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Limites (segundos) pensados para latências de 0,1 ms a 5 s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+# Tamanhos de lote (registros) dos micro-lotes do /predict
+BATCH_SIZE_BUCKETS: Tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Contador monotônico com rótulos, no formato de exposição do Prometheus."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}" for key, v in items]
+
+
+class Histogram:
+    """Histograma de baldes fixos; observar custa uma busca binária e um incremento."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por rótulo: [contagem por balde (+Inf no fim), soma]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge calculado sob demanda (só no scrape) a partir de uma função."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def collect(self) -> List[str]:
+        lines = []
+        for labels, value in self.fn():
+            lines.append(f"{self.name}{_labels(list(labels), list(labels.values()))} {_fmt(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        out = []
+        for metric in self._metrics:
+            try:
+                lines = metric.collect()
+            except Exception:
+                continue  # Um coletor com falha não derruba o scrape inteiro
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+class ApiMetrics:
+    """Métricas do serviço de predição: requisições, erros e latência por etapa.
+
+    Etapas de ``/predict``: ``normalize`` (normalização do payload),
+    ``preprocess``, ``neighbor_search``, ``decode`` (rótulos) e ``repo_log``.
+    """
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.register(Counter(
+            "hep_requests_total", "Requisições HTTP atendidas.", ("endpoint", "method", "status")))
+        self.errors = self.registry.register(Counter(
+            "hep_request_errors_total", "Requisições com status >= 400.", ("endpoint",)))
+        self.request_latency = self.registry.register(Histogram(
+            "hep_request_duration_seconds", "Latência das requisições HTTP.", ("endpoint",)))
+        self.stage_latency = self.registry.register(Histogram(
+            "hep_stage_duration_seconds", "Latência por etapa da predição.", ("stage",)))
+        self.model_requests = self.registry.register(Counter(
+            "hep_model_requests_total", "Requisições atendidas por versão do registro de modelos.", ("version",)))
+        self.batch_size = self.registry.register(Histogram(
+            "hep_batch_size", "Registros por micro-lote do /predict.", buckets=BATCH_SIZE_BUCKETS))
+        self.batch_queue_delay = self.registry.register(Histogram(
+            "hep_batch_queue_seconds", "Espera na fila dos micro-lotes até o despacho."))
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float) -> None:
+        self.requests.inc(endpoint=endpoint, method=method, status=status)
+        if status >= 400:
+            self.errors.inc(endpoint=endpoint)
+        self.request_latency.observe(seconds, endpoint=endpoint)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_latency.observe(seconds, stage=stage)
+
+    def observe_model(self, version: str) -> None:
+        self.model_requests.inc(version=version)
+
+    def observe_batch(self, size: int, delays: Sequence[float]) -> None:
+        self.batch_size.observe(size)
+        for delay in delays:
+            self.batch_queue_delay.observe(delay)
+
+    def render(self) -> str:
+        return self.registry.render()
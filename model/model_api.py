@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import json
+import math
 import os
+import re
+import threading
+import time
 import traceback
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 
 # Import flexível: permite executar como módulo ou script direto.
 try:  # Tentativa com import relativo
@@ -14,32 +24,468 @@ try:  # Tentativa com import relativo
         PredictionRepository,
         make_default_paths,
         get_db_url_from_env,
+        get_predictor_options_from_env,
+        get_repository_options_from_env,
     )
+    from .batching import MicroBatcher, get_batching_options_from_env
+    from .metrics import CONTENT_TYPE, ApiMetrics, GaugeCallback
+    from .registry import ModelRegistry
 except ImportError:  # Fallback caso executado fora de pacote
     from prediction_service import (
         HepatitisPredictor,
         PredictionRepository,
         make_default_paths,
         get_db_url_from_env,
+        get_predictor_options_from_env,
+        get_repository_options_from_env,
     )
+    from batching import MicroBatcher, get_batching_options_from_env
+    from metrics import CONTENT_TYPE, ApiMetrics, GaugeCallback
+    from registry import ModelRegistry
 
 
-def create_app() -> Flask:
+# Limite de registros aceitos por chamada em /predict/batch
+BATCH_MAX_RECORDS = int(os.getenv("PREDICT_BATCH_MAX", "50000"))
+REQUIRED_ANY_FIELDS = ["Age", "ALB", "ALT", "AST"]
+
+
+def _has_expected_fields(payload: Any) -> bool:
+    return isinstance(payload, dict) and any(k in payload for k in REQUIRED_ANY_FIELDS)
+
+
+def _to_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    # Formato público da resposta (confiança exposta como "accuracy")
+    response = {
+        "prediction": result.get("prediction"),
+        "label": result.get("label"),
+    }
+    if result.get("confidence") is not None:
+        response["accuracy"] = result.get("confidence")
+    return response
+
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+
+class TrainingJobs:
+    """Executa re-treinos em segundo plano, um por vez, e guarda o status de cada job.
+
+    O preditor monta o novo modelo fora do caminho das requisições e o publica
+    atomicamente, então ``/predict`` nunca espera pelo treino.
+
+    Com ``state_dir`` o status de cada job também é gravado em
+    ``<state_dir>/<id>.json``: no servidor multi-processo qualquer worker (e os
+    que substituem os antigos após o re-treino) responde ``/train/<id>``.
+    """
+
+    def __init__(
+        self,
+        predictor: HepatitisPredictor,
+        on_done: Optional[Callable[[], None]] = None,
+        max_history: int = 50,
+        state_dir: Optional[Path] = None,
+    ) -> None:
+        self.predictor = predictor
+        self.on_done = on_done
+        self.max_history = max_history
+        self.state_dir = Path(state_dir) if state_dir is not None else None
+        if self.state_dir is not None:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="train-job")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, task: Optional[Callable[[], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        # Sem task, o job re-treina o preditor principal
+        job = {"id": uuid.uuid4().hex, "status": "queued", "created_at": _now()}
+        with self._lock:
+            self._jobs[job["id"]] = job
+            # Mantém apenas o histórico recente
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+        self._update(job)
+        self._prune_state()
+        future = self._executor.submit(self._run, job, task or self.predictor.train)
+        self._update(job, _future=future)
+        return self.get(job["id"])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return _public(job)
+        # Job de outro worker (ou de um worker já substituído)
+        if self.state_dir is None or not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            return json.loads((self.state_dir / f"{job_id}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            future = self._jobs.get(job_id, {}).get("_future")
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+        return self.get(job_id)
+
+    def _run(self, job: Dict[str, Any], task: Callable[[], Dict[str, Any]]) -> None:
+        self._update(job, status="running", started_at=_now())
+        try:
+            result = task()
+            # "done" é gravado antes de avisar o servidor multi-processo, que em
+            # seguida substitui este worker pelos que carregam o novo modelo
+            self._update(job, status="done", result=result, finished_at=_now())
+            if self.on_done is not None:
+                self.on_done()
+        except Exception as e:
+            self._update(job, status="failed", error=str(e), finished_at=_now())
+
+    def _update(self, job: Dict[str, Any], **fields: Any) -> None:
+        with self._lock:
+            job.update(fields)
+            # _future e afins só existem neste processo; não mudam o status gravado
+            if self.state_dir is not None and not (fields and all(k.startswith("_") for k in fields)):
+                self._persist(job)
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        # Grava e renomeia: quem lê nunca vê um JSON pela metade
+        path = self.state_dir / f"{job['id']}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(_public(job), default=str), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass  # Status em disco é melhor esforço; o da memória continua valendo
+
+    def _prune_state(self) -> None:
+        # Mesmo limite de histórico da memória, contado entre todos os workers
+        if self.state_dir is None:
+            return
+        try:
+            files = sorted(self.state_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for path in files[:-self.max_history]:
+                path.unlink()
+        except OSError:
+            pass
+
+
+class Warmup:
+    """Aquece o modelo em segundo plano e informa a prontidão para o ``/ready``."""
+
+    def __init__(self, predictor: HepatitisPredictor) -> None:
+        self.predictor = predictor
+        self.status = "pending"
+        self.details: Dict[str, Any] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self) -> None:
+        self.status = "warming"
+        self._thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        try:
+            self.details = self.predictor.warm_up()
+            self.status = "ready"
+        except Exception as e:
+            self.details = {"error": str(e)}
+            self.status = "failed"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+
+def get_registry_from_env() -> Optional[ModelRegistry]:
+    # MODEL_REGISTRY=1 liga o registro de versões em model/registry (ou MODEL_REGISTRY_DIR)
+    if os.getenv("MODEL_REGISTRY") != "1":
+        return None
+    defaults = make_default_paths()
+    root = Path(os.getenv("MODEL_REGISTRY_DIR") or defaults.model_pkl.parent / "registry")
+    registry = ModelRegistry(root, defaults.data_csv, predictor_options=get_predictor_options_from_env())
+    registry.load()
+    return registry
+
+
+def create_app(
+    predictor: Optional[HepatitisPredictor] = None,
+    repo: Optional[PredictionRepository] = None,
+    on_model_updated: Optional[Callable[[], None]] = None,
+    warmup: Optional[bool] = None,
+    registry: Optional[ModelRegistry] = None,
+    microbatch: Optional[Dict[str, Any]] = None,
+    jobs_dir: Optional[Path] = None,
+) -> Flask:
     app = Flask(__name__)
 
     # Instancia o preditor e o repositório opcional (MySQL se configurado)
-    paths = make_default_paths()
-    predictor = HepatitisPredictor(paths)
-    repo = PredictionRepository(get_db_url_from_env())
+    if predictor is None:
+        predictor = HepatitisPredictor(make_default_paths(), **get_predictor_options_from_env())
+    if repo is None:
+        repo = PredictionRepository(get_db_url_from_env(), **get_repository_options_from_env())
+
+    if registry is None:
+        registry = get_registry_from_env()
+
+    jobs = TrainingJobs(predictor, on_done=on_model_updated, state_dir=jobs_dir)
+
+    # Com aquecimento, o modelo é carregado e exercitado antes do 1º request;
+    # sem ele, o carregamento continua preguiçoso e /ready responde sempre pronto
+    if warmup is None:
+        warmup = os.getenv("WARMUP") == "1"
+    warm = Warmup(predictor)
+    if warmup:
+        warm.start()
+    else:
+        warm.status = "ready"
+
+    # Métricas em memória do processo (em modo prefork, uma série por worker)
+    metrics = ApiMetrics()
+    predictor.stage_observer = metrics.observe_stage
+    metrics.registry.register(GaugeCallback(
+        "hep_cache_entries", "Entradas no cache de predições.",
+        lambda: [({}, predictor.cache_stats().get("size", 0))],
+    ))
+    metrics.registry.register(GaugeCallback(
+        "hep_repo_rows", "Linhas do log de predições por situação.",
+        lambda: [({"state": k}, v) for k, v in repo.stats().items() if k != "write_behind"],
+    ))
+
+    def log_prediction(payload: Dict[str, Any], result: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        repo.log(payload, result)  # Registro opcional (ignorado se sem DB)
+        metrics.observe_stage("repo_log", time.perf_counter() - start)
+
+    def log_predictions(records: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        # Lote: um único INSERT (executemany) em vez de um por registro
+        if not records:
+            return
+        start = time.perf_counter()
+        repo.log_many(records)
+        metrics.observe_stage("repo_log", time.perf_counter() - start)
+
+    # O rastreador é o do preditor: eventos da API e do modelo saem no mesmo trace_id
+    tracer = predictor.tracer
+
+    # Micro-lotes (MICROBATCH=1): /predict concorrentes viram um predict_many;
+    # um despachante por modelo (principal e cada versão do registro)
+    if microbatch is None:
+        microbatch = get_batching_options_from_env()
+    batching = dict(microbatch)
+    batching_enabled = batching.pop("enabled", True)
+    batchers: Dict[HepatitisPredictor, MicroBatcher] = {}
+    batchers_lock = threading.Lock()
+    # Versões já descarregadas: requisições que as escolheram antes da troca
+    # predizem direto, sem recriar um despachante que nenhum gancho encerraria
+    detached: "weakref.WeakSet[HepatitisPredictor]" = weakref.WeakSet()
+
+    def predict_one(model: HepatitisPredictor, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not batching_enabled:
+            return model.predict(payload)
+        batcher = batchers.get(model)
+        if batcher is None:
+            with batchers_lock:
+                batcher = batchers.get(model)
+                if batcher is None:
+                    if model in detached:
+                        batcher = None
+                    else:
+                        batcher = batchers[model] = MicroBatcher(model, observer=metrics.observe_batch, **batching)
+            if batcher is None:
+                return model.predict(payload)
+        return batcher.predict(payload)
+
+    if registry is not None:
+        def attach(versioned: HepatitisPredictor) -> None:
+            versioned.stage_observer = metrics.observe_stage
+            versioned.tracer = tracer
+            with batchers_lock:
+                detached.discard(versioned)
+
+        registry.add_load_hook(attach)
+
+        def detach(versioned: HepatitisPredictor) -> None:
+            # Versão descarregada: encerra o despachante para não acumular threads
+            with batchers_lock:
+                detached.add(versioned)
+                batcher = batchers.pop(versioned, None)
+            if batcher is not None:
+                batcher.close()
+
+        registry.add_unload_hook(detach)
+
+    def choose_model(requested: Optional[str]):
+        # Com o registro ativo a versão vem do cabeçalho ou da divisão de tráfego;
+        # sem ele (ou sem versões) vale o modelo principal
+        if registry is None or (not requested and not registry.active):
+            return None, predictor
+        version, chosen = registry.select(requested)
+        metrics.observe_model(version)
+        return version, chosen
+
+    def unknown_version(version: Optional[str]):
+        return jsonify({"error": f"Versão de modelo não encontrada: {version}"}), 404
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        # Reaproveita o id enviado pelo cliente (ex.: gateway Node) quando houver
+        g.trace_token = tracer.begin(request.headers.get("X-Trace-Id"))
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            # Rótulo pela regra da rota (ex.: /train/<job_id>) para não explodir a cardinalidade
+            endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            elapsed = time.perf_counter() - start
+            metrics.observe_request(endpoint, request.method, response.status_code, elapsed)
+            trace = tracer.current()
+            if trace is not None:
+                trace.event(
+                    "http.request",
+                    method=request.method,
+                    endpoint=endpoint,
+                    status=response.status_code,
+                    duration_ms=round(elapsed * 1000, 3),
+                )
+                response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+
+    @app.teardown_request
+    def end_trace(exc):
+        tracer.end(g.pop("trace_token", None))
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+    @app.route("/ready", methods=["GET"])
+    def ready_endpoint():
+        body = {"ready": warm.ready, "status": warm.status, **warm.details}
+        return jsonify(body), (200 if warm.ready else 503)
+
+    @app.route("/health/db", methods=["GET"])
+    def health_db_endpoint():
+        # Uso do pool, latência dos INSERTs e um SELECT 1 (?ping=0 pula a consulta);
+        # 503 só quando há banco configurado e ele não responde
+        body = repo.health(ping=request.args.get("ping") != "0")
+        return jsonify(body), (503 if body["status"] == "error" else 200)
 
     @app.route("/train", methods=["POST"])
     def train_endpoint():
-        # Re-treina o modelo manualmente
+        # Agenda o re-treino em segundo plano e devolve o id do job;
+        # ?wait=1 aguarda a conclusão (compatível com clientes antigos);
+        # ?tune=1 escolhe os hiperparâmetros por validação cruzada antes do ajuste
+        wait = request.args.get("wait") == "1"
+        if wait:
+            # Validado antes de agendar: timeout inválido não dispara treino
+            try:
+                timeout = float(request.args.get("timeout", "300"))
+            except ValueError:
+                timeout = math.nan
+            if not 0 <= timeout < math.inf:
+                return jsonify({"error": "timeout deve ser um número de segundos >= 0."}), 400
+        if request.args.get("tune") == "1":
+            job = jobs.submit(lambda: predictor.train(tune=True))
+        else:
+            job = jobs.submit()
+        status_url = f"/train/{job['id']}"
+        if wait:
+            job = jobs.wait(job["id"], timeout=timeout)
+            if job["status"] == "failed":
+                return jsonify({"ok": False, "job_id": job["id"], "error": job.get("error")}), 500
+            if job["status"] == "done":
+                return jsonify({"ok": True, "job_id": job["id"], **job["result"]})
+        return jsonify({"ok": True, "job_id": job["id"], "status": job["status"], "status_url": status_url}), 202
+
+    @app.route("/train/<job_id>", methods=["GET"])
+    def train_status_endpoint(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job de treino não encontrado."}), 404
+        return jsonify(job)
+
+    @app.route("/samples", methods=["POST"])
+    def samples_endpoint():
+        # Acrescenta casos confirmados (exames + "Category") ao modelo sem re-treino;
+        # se a deriva do pré-processamento passar do limite, agenda um /train completo
         try:
-            result = predictor.train()
+            body = request.get_json(force=True, silent=True)
+            records = body.get("records") if isinstance(body, dict) else body
+            if not isinstance(records, list) or not records:
+                return jsonify({"error": "Envie uma lista de registros em 'records'."}), 400
+            if len(records) > BATCH_MAX_RECORDS:
+                return jsonify({"error": f"Lote excede o limite de {BATCH_MAX_RECORDS} registros."}), 413
+            try:
+                result = predictor.add_samples(records, refit=False)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            if on_model_updated is not None:
+                on_model_updated()
+            if result["refit_needed"]:
+                job = jobs.submit()
+                result.update(job_id=job["id"], status_url=f"/train/{job['id']}")
             return jsonify({"ok": True, **result})
         except Exception as e:
-            return jsonify({"ok": False, "error": str(e)}), 500
+            debug = os.getenv("DEBUG") == "1"
+            err_payload = {"error": str(e)}
+            if debug:
+                err_payload["traceback"] = traceback.format_exc()
+            return jsonify(err_payload), 500
+
+    @app.route("/cache/stats", methods=["GET"])
+    def cache_stats_endpoint():
+        # Contadores para dimensionar PREDICT_CACHE_SIZE / PREDICT_CACHE_TTL
+        return jsonify(predictor.cache_stats())
+
+    @app.route("/models", methods=["GET"])
+    def models_endpoint():
+        if registry is None:
+            return jsonify({"error": "Registro de modelos desativado (MODEL_REGISTRY=1)."}), 404
+        return jsonify(registry.describe())
+
+    @app.route("/models", methods=["POST"])
+    def create_model_endpoint():
+        # Treina uma nova versão em segundo plano com os hiperparâmetros enviados
+        if registry is None:
+            return jsonify({"error": "Registro de modelos desativado (MODEL_REGISTRY=1)."}), 404
+        params = request.get_json(force=True, silent=True) or {}
+        try:
+            params = registry.validate_params(params)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        job = jobs.submit(lambda: registry.train_version(params))
+        return jsonify({"ok": True, "job_id": job["id"], "status": job["status"],
+                        "status_url": f"/train/{job['id']}"}), 202
+
+    @app.route("/models/traffic", methods=["PUT"])
+    def model_traffic_endpoint():
+        # Ex.: {"v1": 90, "v2": 10}; peso 0 mantém a versão carregada só para o cabeçalho
+        if registry is None:
+            return jsonify({"error": "Registro de modelos desativado (MODEL_REGISTRY=1)."}), 404
+        weights = request.get_json(force=True, silent=True)
+        if not isinstance(weights, dict) or not weights:
+            return jsonify({"error": "Envie um objeto {versão: peso}."}), 400
+        try:
+            registry.set_traffic(weights)
+        except KeyError as e:
+            return jsonify({"error": str(e.args[0])}), 404
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(registry.describe())
 
     @app.route("/predict", methods=["POST"])
     def predict_endpoint():
@@ -48,19 +494,21 @@ def create_app() -> Flask:
             payload: Dict[str, Any] = request.get_json(force=True) or {}
 
             # Validação mínima: exige pelo menos um campo chave
-            if not any(k in payload for k in ["Age", "ALB", "ALT", "AST"]):
+            if not _has_expected_fields(payload):
                 return jsonify({"error": "Payload vazio ou sem campos esperados."}), 400
 
-            result = predictor.predict(payload)
-            repo.log(payload, result)  # Registro opcional (ignorado se sem DB)
+            requested = request.headers.get("X-Model-Version")
+            try:
+                version, model = choose_model(requested)
+            except KeyError:
+                return unknown_version(requested)
+            result = predict_one(model, payload)
+            log_prediction(payload, result)
 
-            response = {
-                "prediction": result.get("prediction"),
-                "label": result.get("label"),
-            }
-            if result.get("confidence") is not None:
-                response["accuracy"] = result.get("confidence")
-            return jsonify(response)
+            response = jsonify(_to_response(result))
+            if version is not None:
+                response.headers["X-Model-Version"] = version
+            return response
         except Exception as e:
             # Se DEBUG=1 retorna traceback para facilitar análise
             debug = os.getenv("DEBUG") == "1"
@@ -69,8 +517,54 @@ def create_app() -> Flask:
                 err_payload["traceback"] = traceback.format_exc()
             return jsonify(err_payload), 500
 
+    @app.route("/predict/batch", methods=["POST"])
+    def predict_batch_endpoint():
+        # Predição em lote: aceita lista JSON ou {"records": [...]}
+        try:
+            body = request.get_json(force=True, silent=True)
+            records = body.get("records") if isinstance(body, dict) else body
+            if not isinstance(records, list) or not records:
+                return jsonify({"error": "Envie uma lista de registros em 'records'."}), 400
+            if len(records) > BATCH_MAX_RECORDS:
+                return jsonify({"error": f"Lote excede o limite de {BATCH_MAX_RECORDS} registros."}), 413
+
+            requested = request.headers.get("X-Model-Version")
+            try:
+                version, model = choose_model(requested)
+            except KeyError:
+                return unknown_version(requested)
+
+            # Registros inválidos recebem erro individual e não vão ao modelo
+            results: list = [
+                None if _has_expected_fields(r) else {"error": "Payload vazio ou sem campos esperados."}
+                for r in records
+            ]
+            valid_pos = [i for i, r in enumerate(results) if r is None]
+
+            predicted = model.predict_many([records[i] for i in valid_pos]) if valid_pos else []
+            logged = []
+            for pos, result in zip(valid_pos, predicted):
+                if "error" in result:
+                    results[pos] = {"error": result["error"]}
+                    continue
+                logged.append((records[pos], result))
+                results[pos] = _to_response(result)
+            log_predictions(logged)
+
+            errors = sum(1 for r in results if "error" in r)
+            response = jsonify({"count": len(results), "errors": errors, "results": results})
+            if version is not None:
+                response.headers["X-Model-Version"] = version
+            return response
+        except Exception as e:
+            debug = os.getenv("DEBUG") == "1"
+            err_payload = {"error": str(e)}
+            if debug:
+                err_payload["traceback"] = traceback.format_exc()
+            return jsonify(err_payload), 500
+
     return app
 
 if __name__ == "__main__":
-    app = create_app()
+    app = create_app(warmup=True)
     app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import copy
+from typing import Optional, Tuple
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.utils.validation import check_array, check_is_fitted, check_X_y
+
+
+class ApproximateKNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """KNN aproximado baseado em índice invertido (IVF) sobre centróides k-means.
+
+    O conjunto de treino é particionado em ``n_lists`` grupos; cada consulta
+    compara-se apenas aos pontos dos ``n_probe`` grupos mais próximos. ``n_probe``
+    é o controle de recall: mais grupos visitados = vizinhos mais exatos e
+    consultas mais lentas (``n_probe == n_lists`` equivale à força bruta).
+    Pode ser alterado após o ``fit`` via ``set_params`` sem re-treinar.
+
+    Usa distância euclidiana e os mesmos pesos (``uniform``/``distance``) do
+    ``KNeighborsClassifier``, de modo que serve como substituto direto no pipeline.
+    """
+
+    def __init__(
+        self,
+        n_neighbors: int = 5,
+        *,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        weights: str = "uniform",
+        random_state: Optional[int] = None,
+    ) -> None:
+        self.n_neighbors = n_neighbors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.weights = weights
+        self.random_state = random_state
+
+    def fit(self, X, y) -> "ApproximateKNeighborsClassifier":
+        if self.weights not in ("uniform", "distance"):
+            raise ValueError(f"weights deve ser 'uniform' ou 'distance', recebido {self.weights!r}")
+        X, y = check_X_y(X, y, dtype=np.float64)
+        self.classes_, y_enc = np.unique(y, return_inverse=True)
+        n_samples = X.shape[0]
+
+        # Padrão sqrt(n) grupos: equilibra custo de centróides e tamanho das listas
+        n_lists = self.n_lists or int(round(np.sqrt(n_samples)))
+        n_lists = max(1, min(n_lists, n_samples))
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_lists,
+            n_init=1,
+            batch_size=min(n_samples, 4096),
+            random_state=self.random_state,
+        ).fit(X)
+        assignments = kmeans.labels_
+
+        # Armazena os pontos ordenados por grupo: cada lista vira uma fatia contígua
+        order = np.argsort(assignments, kind="stable")
+        self.centroids_ = kmeans.cluster_centers_
+        self.list_offsets_ = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        self._fit_X = X[order]
+        self._fit_y = y_enc[order]
+        self._order = order
+        self.n_features_in_ = X.shape[1]
+        self.n_samples_fit_ = n_samples
+        return self
+
+    def append(self, X, y) -> "ApproximateKNeighborsClassifier":
+        """Devolve uma cópia com ``X``/``y`` acrescentados, sem refazer o k-means.
+
+        Cada ponto novo entra na lista do centróide mais próximo; os centróides
+        não mudam (se a distribuição mudar muito, um ``fit`` completo os refaz).
+        O estimador original não é alterado. Os rótulos precisam estar em ``classes_``.
+        """
+        check_is_fitted(self, "centroids_")
+        X, y = check_X_y(X, y, dtype=self._fit_X.dtype)
+        if not np.isin(y, self.classes_).all():
+            raise ValueError("Rótulos fora das classes do modelo; é preciso um fit completo.")
+        codes = np.searchsorted(self.classes_, y)
+
+        n_lists = len(self.centroids_)
+        old_lists = np.repeat(np.arange(n_lists), np.diff(self.list_offsets_))
+        new_lists = np.argmin(euclidean_distances(X, self.centroids_, squared=True), axis=1)
+        lists = np.concatenate([old_lists, new_lists])
+        # Ordenação estável: a ordem dentro de cada lista é preservada e os novos vão ao fim
+        order = np.argsort(lists, kind="stable")
+
+        appended = copy.copy(self)
+        appended.list_offsets_ = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=n_lists))])
+        appended._fit_X = np.concatenate([self._fit_X, X])[order]
+        appended._fit_y = np.concatenate([self._fit_y, codes])[order]
+        new_index = np.arange(self.n_samples_fit_, self.n_samples_fit_ + len(X))
+        appended._order = np.concatenate([self._order, new_index])[order]
+        appended.n_samples_fit_ = self.n_samples_fit_ + len(X)
+        return appended
+
+    def kneighbors(
+        self, X=None, n_neighbors: Optional[int] = None, return_distance: bool = True
+    ):
+        dist, pos = self._search(X, n_neighbors)
+        # Converte posições internas (ordenadas por grupo) para índices do treino
+        ind = self._order[pos]
+        return (dist, ind) if return_distance else ind
+
+    def predict_proba(self, X) -> np.ndarray:
+        dist, pos = self._search(X, None)
+        neigh_y = self._fit_y[pos]
+        if self.weights == "uniform":
+            weights = np.ones_like(dist)
+        else:
+            # Mesma regra do sklearn: distância zero recebe todo o peso
+            with np.errstate(divide="ignore"):
+                weights = 1.0 / dist
+            exact = np.isinf(weights)
+            rows = exact.any(axis=1)
+            weights[rows] = exact[rows].astype(np.float64)
+
+        proba = np.zeros((dist.shape[0], len(self.classes_)), dtype=np.float64)
+        np.add.at(proba, (np.arange(dist.shape[0])[:, None], neigh_y), weights)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _search(self, X, n_neighbors: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        check_is_fitted(self, "centroids_")
+        X = check_array(X, dtype=np.float64)
+        k = min(n_neighbors or self.n_neighbors, self.n_samples_fit_)
+        n_lists = len(self.centroids_)
+        n_probe = max(1, min(self.n_probe, n_lists))
+
+        probe_order = np.argsort(euclidean_distances(X, self.centroids_, squared=True), axis=1)
+        sizes = np.diff(self.list_offsets_)
+        dist = np.empty((X.shape[0], k), dtype=np.float64)
+        pos = np.empty((X.shape[0], k), dtype=np.intp)
+        for i, query in enumerate(X):
+            lists = probe_order[i]
+            # Visita n_probe grupos, ampliando se ainda não houver k candidatos
+            n_visit = n_probe
+            while sizes[lists[:n_visit]].sum() < k:
+                n_visit += 1
+            candidates = np.concatenate([
+                np.arange(self.list_offsets_[g], self.list_offsets_[g + 1]) for g in lists[:n_visit]
+            ])
+            diff = self._fit_X[candidates] - query
+            sq = np.einsum("ij,ij->i", diff, diff)
+            top = np.argpartition(sq, k - 1)[:k] if len(sq) > k else np.arange(len(sq))
+            top = top[np.argsort(sq[top], kind="stable")]
+            dist[i] = np.sqrt(sq[top])
+            pos[i] = candidates[top]
+        return dist, pos
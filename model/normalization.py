@@ -0,0 +1,196 @@
+"""Normalização dos payloads de entrada: por registro e em colunas.
+
+``normalize_sex`` e ``to_float`` definem a semântica de um campo (a mesma usada
+desde sempre por ``HepatitisPredictor._payload_to_row``). ``ColumnarNormalizer``
+aplica essa semântica a um lote inteiro coluna a coluna: tipos simples (números,
+textos, ``None``) são convertidos por operações NumPy/pandas e apenas valores
+incomuns (subclasses, objetos arbitrários, textos não numéricos) caem na função
+por célula, de modo que o resultado e as mensagens de erro são os mesmos do
+caminho registro a registro.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+SEX_ALIASES: Dict[str, str] = {
+    "m": "m", "male": "m", "masculino": "m", "homem": "m",
+    "f": "f", "female": "f", "feminino": "f", "mulher": "f",
+}
+# Classe de cada tipo exato de valor: 0 ausente, 1 número, 2 texto, 3 outro (célula a célula)
+_NONE, _NUMBER, _TEXT, _OTHER = 0, 1, 2, 3
+_KINDS = {type(None): _NONE, int: _NUMBER, float: _NUMBER, bool: _NUMBER, str: _TEXT}
+_PLAIN_TYPES = {type(None), int, float, bool}
+
+
+def normalize_sex(sex: Any) -> Optional[str]:
+    if sex is None:
+        return None
+    if isinstance(sex, (int, float)):
+        return "m" if int(sex) == 1 else "f"
+    s = str(sex).strip().lower()
+    return SEX_ALIASES.get(s, s)
+
+
+def to_float(v: Any) -> Optional[float]:
+    if v is None or v == "":
+        return None
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+
+@dataclass
+class NormalizedBatch:
+    """Resultado de ``ColumnarNormalizer.normalize``.
+
+    ``frame`` tem uma linha por registro válido, nas colunas esperadas (numéricas
+    em float64 com NaN para ausentes); ``positions[i]`` é o índice de entrada da
+    linha ``i``; ``errors`` mapeia o índice de cada registro inválido à mensagem.
+    """
+
+    frame: pd.DataFrame
+    positions: np.ndarray
+    errors: Dict[int, str]
+
+
+class ColumnarNormalizer:
+    """Normaliza um lote de payloads (lista de dicts ou DataFrame) de uma vez."""
+
+    def __init__(self, numeric_cols: List[str], expected_cols: List[str], sex_col: str = "Sex") -> None:
+        self.numeric_cols = list(numeric_cols)
+        self.expected_cols = list(expected_cols)
+        self.sex_col = sex_col
+
+    def normalize(self, payloads: Union[Sequence[Any], pd.DataFrame]) -> NormalizedBatch:
+        errors: Dict[int, str] = {}
+        if isinstance(payloads, pd.DataFrame):
+            n, columns = len(payloads), self._frame_columns(payloads, errors)
+        else:
+            n, columns = len(payloads), self._record_columns(list(payloads), errors)
+
+        sex = self._sex_column(columns.get(self.sex_col), n, errors)
+        data: Dict[str, np.ndarray] = {self.sex_col: sex}
+        for col in self.numeric_cols:
+            data[col] = values = self._numeric_column(columns.get(col), n, errors)
+            # Mesma regra de _payload_to_row: infinito é erro do registro, não do lote
+            for i in np.flatnonzero(np.isinf(values)):
+                errors.setdefault(int(i), f"Valor não finito em '{col}'.")
+
+        valid = np.ones(n, dtype=bool)
+        if errors:
+            valid[list(errors)] = False
+        frame = pd.DataFrame({col: data[col][valid] for col in self.expected_cols}, columns=self.expected_cols)
+        return NormalizedBatch(frame, np.flatnonzero(valid), errors)
+
+    # ---------- Extração das colunas ----------
+    def _record_columns(self, records: List[Any], errors: Dict[int, str]) -> Dict[str, np.ndarray]:
+        if not all(map(isinstance, records, repeat(dict))):
+            for i, record in enumerate(records):
+                if not isinstance(record, dict):
+                    errors[i] = "Registro deve ser um objeto JSON."
+                    records[i] = {}
+        # Só os registros com chaves a limpar (espaços ou não-texto) passam pelo strip
+        keys = set().union(*records) if records else set()
+        dirty = {k for k in keys if not isinstance(k, str) or k.strip() != k}
+        if dirty:
+            for i, record in enumerate(records):
+                if i not in errors and not dirty.isdisjoint(record):
+                    try:
+                        records[i] = {k.strip(): v for k, v in record.items()}
+                    except Exception as e:
+                        errors[i] = str(e)
+                        records[i] = {}
+        n = len(records)
+        return {
+            col: np.fromiter(map(dict.get, records, repeat(col)), dtype=object, count=n)
+            for col in [self.sex_col, *self.numeric_cols]
+        }
+
+    def _frame_columns(self, frame: pd.DataFrame, errors: Dict[int, str]) -> Dict[str, np.ndarray]:
+        # Cada linha equivale ao dict {coluna: valor}; colunas repetidas após o strip: vale a última
+        columns: Dict[str, np.ndarray] = {}
+        for pos, name in enumerate(frame.columns):
+            try:
+                key = name.strip()
+            except Exception as e:
+                errors.update({i: str(e) for i in range(len(frame)) if i not in errors})
+                continue
+            series = frame.iloc[:, pos]
+            # Colunas NumPy bool/int/float convertem direto; o resto vai como objetos
+            numeric = isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf"
+            columns[key] = series.to_numpy(dtype=np.float64 if numeric else object)
+        return columns
+
+    # ---------- Conversões ----------
+    def _numeric_column(self, values: Optional[np.ndarray], n: int, errors: Dict[int, str]) -> np.ndarray:
+        if values is None:
+            return np.full(n, np.nan)
+        if values.dtype != object:
+            return values.astype(np.float64)
+        if set(map(type, values)) <= _PLAIN_TYPES:
+            # Só números e None (caso comum): um único cast, None vira NaN
+            return _to_float_array(values)
+        out = np.full(n, np.nan)
+        kinds = _kinds(values)
+        number = kinds == _NUMBER
+        out[number] = _to_float_array(values[number])
+        text = np.flatnonzero(kinds == _TEXT)
+        if text.size:
+            text = text[values[text] != ""]
+            out[text] = _to_float_array(values[text])
+        for i in np.flatnonzero(kinds == _OTHER):
+            try:
+                value = to_float(values[i])
+            except Exception as e:
+                errors.setdefault(int(i), str(e))
+                continue
+            out[i] = np.nan if value is None else value
+        return out
+
+    def _sex_column(self, values: Optional[np.ndarray], n: int, errors: Dict[int, str]) -> np.ndarray:
+        out = np.full(n, None, dtype=object)
+        if values is None:
+            return out
+        if values.dtype != object:
+            values = values.astype(object)
+        kinds = _kinds(values)
+        done = (kinds == _TEXT) | (kinds == _NONE)
+
+        text = np.flatnonzero(kinds == _TEXT)
+        if text.size:
+            cleaned = list(map(str.lower, map(str.strip, values[text])))
+            out[text] = list(map(SEX_ALIASES.get, cleaned, cleaned))
+
+        number = np.flatnonzero(kinds == _NUMBER)
+        if number.size:
+            x = _to_float_array(values[number])
+            finite = np.isfinite(x)
+            # int(x) == 1 <=> trunc(x) == 1 para valores finitos
+            out[number[finite]] = np.where(np.trunc(x[finite]) == 1, "m", "f")
+            done[number[finite]] = True
+        # NaN/infinito (erro no int()) e tipos incomuns usam a função por célula
+        for i in np.flatnonzero(~done):
+            try:
+                out[i] = normalize_sex(values[i])
+            except Exception as e:
+                errors.setdefault(int(i), str(e))
+        return out
+
+
+def _kinds(values: np.ndarray) -> np.ndarray:
+    return np.fromiter(map(_KINDS.get, map(type, values), repeat(_OTHER)), dtype=np.int8, count=len(values))
+
+
+def _to_float_array(values: np.ndarray) -> np.ndarray:
+    # O cast object -> float64 do NumPy chama float() em cada valor; se algum
+    # falhar (texto não numérico, inteiro enorme) converte célula a célula
+    try:
+        return values.astype(np.float64)
+    except (TypeError, ValueError, OverflowError):
+        return np.array([np.nan if (v := to_float(x)) is None else v for x in values], dtype=np.float64)
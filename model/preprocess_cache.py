@@ -0,0 +1,82 @@
+"""Cache em disco do pré-processamento ajustado (``ColumnTransformer`` + matriz transformada).
+
+Re-treinos e buscas de hiperparâmetros que só mudam o KNN reaplicam o mesmo
+pré-processamento às mesmas linhas. Aqui o resultado fica num arquivo
+``joblib`` por chave, montada a partir do hash do dataset, dos parâmetros da
+divisão treino/teste e da configuração do transformador (``joblib.hash`` do
+estimador não ajustado). Não se faz hash das linhas em si: isso custaria mais
+que o próprio ajuste.
+
+Cada acerto atualiza o ``mtime`` da entrada; ao gravar, as entradas com
+``mtime`` mais antigo são removidas até o total caber em ``max_bytes`` (LRU).
+Falhas de E/S nunca derrubam o treino: a entrada é só recalculada.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import joblib
+
+SUFFIX = ".pre.pkl"
+
+
+class PreprocessCache:
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self.directory / (key + SUFFIX)
+        try:
+            value = joblib.load(path)
+            os.utime(path)  # Marca o uso para a ordem de despejo
+        except FileNotFoundError:
+            return None
+        except Exception:
+            return None  # Entrada corrompida ou de outra versão: recalculada
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self.directory / (key + SUFFIX)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            joblib.dump(value, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove as entradas usadas há mais tempo até o total caber no limite."""
+        entries = []
+        for path in self.directory.glob("*" + SUFFIX):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Removida por outro processo
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*" + SUFFIX))
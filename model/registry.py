@@ -0,0 +1,258 @@
+"""Registro de versões do modelo, com roteamento de tráfego entre elas.
+
+Cada versão fica em ``<root>/<versão>/knn_model.pkl``; o índice
+``<root>/registry.json`` guarda os metadados (acurácia, tempo de treino, hash
+do dataset e dos casos acrescentados, hiperparâmetros) e a divisão de tráfego atual, por exemplo
+``{"v3": 90, "v4": 10}``. Versões com peso 0 ficam carregadas e só respondem
+a quem as pede pelo nome (cabeçalho ``X-Model-Version`` na API).
+
+Todas as versões da divisão são carregadas *antes* de a nova divisão ser
+publicada (uma única atribuição), então trocar de versão nunca lê o disco no
+caminho da requisição e voltar para a versão anterior é imediato.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .prediction_service import HepatitisPredictor, Paths
+except ImportError:  # Executado fora de pacote
+    from prediction_service import HepatitisPredictor, Paths
+
+# Hiperparâmetros que podem variar entre versões
+VERSION_PARAMS = (
+    "n_neighbors", "weights", "metric", "imputer_strategy", "neighbor_algorithm", "approx_n_probe", "inference",
+    "artifact_dtype", "random_state", "chunk_size",
+)
+
+# Hiperparâmetros inteiros e seu mínimo (None: qualquer inteiro)
+_INT_PARAMS = {"n_neighbors": 1, "approx_n_probe": 1, "random_state": None, "chunk_size": 1}
+# Métricas do sklearn que precisam de metric_params ou de outra entrada
+_METRICS_NEEDING_DATA = {"precomputed", "mahalanobis", "seuclidean", "haversine", "pyfunc"}
+
+
+class ModelRegistry:
+    """Mantém versões treinadas lado a lado e escolhe qual atende cada requisição."""
+
+    INDEX_FILE = "registry.json"
+
+    def __init__(
+        self,
+        root: Path,
+        data_csv: Path,
+        *,
+        predictor_options: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.data_csv = Path(data_csv)
+        self.predictor_options = dict(predictor_options or {})
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._load_hooks: List[Callable[[HepatitisPredictor], None]] = []
+        self._unload_hooks: List[Callable[[HepatitisPredictor], None]] = []
+        self._index = self._read_index()
+        self._loaded: Dict[str, HepatitisPredictor] = {}
+        # (versões, preditores, pesos acumulados, total): trocado numa única
+        # atribuição em set_traffic, então o sorteio nunca vê metade da troca
+        self._routes: Tuple[Tuple[str, ...], Tuple[HepatitisPredictor, ...], Tuple[float, ...], float] = (
+            (), (), (), 0.0
+        )
+
+    # ---------- Consulta ----------
+    @property
+    def active(self) -> bool:
+        return self._routes[3] > 0
+
+    def versions(self) -> List[Dict[str, Any]]:
+        return [dict(meta) for meta in self._index["versions"].values()]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "traffic": dict(self._index["traffic"]),
+            "loaded": sorted(self._loaded),
+            "versions": self.versions(),
+        }
+
+    def select(self, version: Optional[str] = None) -> Tuple[str, HepatitisPredictor]:
+        """Versão pedida explicitamente ou sorteada conforme a divisão de tráfego.
+
+        Só versões já carregadas são servidas; ``KeyError`` caso contrário.
+        """
+        if version:
+            predictor = self._loaded.get(version)
+            if predictor is None:
+                raise KeyError(version)
+            return version, predictor
+        versions, predictors, cumulative, total = self._routes
+        if not total:
+            raise KeyError("nenhuma versão com tráfego")
+        i = bisect.bisect_right(cumulative, self._rng.random() * total)
+        return versions[i], predictors[i]
+
+    # ---------- Alterações ----------
+    def add_load_hook(self, hook: Callable[[HepatitisPredictor], None]) -> None:
+        """Executa ``hook`` em cada preditor carregado (atuais e futuros)."""
+        with self._lock:
+            self._load_hooks.append(hook)
+            for predictor in self._loaded.values():
+                hook(predictor)
+
+    def add_unload_hook(self, hook: Callable[[HepatitisPredictor], None]) -> None:
+        """Executa ``hook`` em cada preditor que sai da divisão de tráfego."""
+        with self._lock:
+            self._unload_hooks.append(hook)
+
+    def load(self) -> None:
+        """Carrega as versões da divisão de tráfego salva (chamar na partida)."""
+        self.set_traffic(self._index["traffic"], persist=False)
+
+    def validate_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Confere nomes, tipos e valores antes de agendar o treino (``ValueError`` se inválidos)."""
+        if not isinstance(params, dict):
+            raise ValueError("Parâmetros devem ser um objeto {nome: valor}.")
+        unknown = sorted(set(params) - set(VERSION_PARAMS))
+        if unknown:
+            raise ValueError(f"Parâmetros não suportados: {unknown}; use {list(VERSION_PARAMS)}")
+        for name, minimum in _INT_PARAMS.items():
+            if name not in params or (name == "chunk_size" and params[name] is None):
+                continue  # chunk_size=None desliga o treino em blocos
+            value = params[name]
+            if isinstance(value, bool) or not isinstance(value, int) or (minimum is not None and value < minimum):
+                bound = f" >= {minimum}" if minimum is not None else ""
+                raise ValueError(f"{name} deve ser um inteiro{bound}, recebido {value!r}")
+        if "weights" in params and params["weights"] not in ("uniform", "distance"):
+            raise ValueError(f"weights deve ser 'uniform' ou 'distance', recebido {params['weights']!r}")
+        if params.get("metric") in _METRICS_NEEDING_DATA:
+            raise ValueError(f"metric {params['metric']!r} exige dados extras e não é suportada no registro")
+        # O construtor e a montagem do pipeline validam o resto (algoritmo,
+        # inferência, dtype, imputação, métrica) sem tocar no disco
+        predictor = self._make_predictor("_validate", params)
+        model = predictor._build_pipeline().steps[-1][1]
+        if hasattr(model, "_validate_params"):
+            model._validate_params()
+        return dict(params)
+
+    def train_version(self, params: Optional[Dict[str, Any]] = None, *, test_size: float = 0.2) -> Dict[str, Any]:
+        """Treina uma nova versão e a deixa carregada.
+
+        A primeira versão assume todo o tráfego; as seguintes entram com peso 0
+        (acessíveis só pelo nome) até um ``set_traffic``.
+        """
+        params = self.validate_params(params or {})
+        with self._lock:
+            version = self._next_version()
+            # Reserva o diretório para que treinos simultâneos não colidam
+            (self.root / version).mkdir(parents=True, exist_ok=False)
+
+        predictor = self._make_predictor(version, params)
+        start = time.perf_counter()
+        result = predictor.train(test_size=test_size)
+        # Mesmo conteúdo que o treino leu: dataset + casos acrescentados (add_samples)
+        fingerprint = predictor._dataset_fingerprint()
+        meta = {
+            "version": version,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "accuracy": result["accuracy"],
+            "train_seconds": round(time.perf_counter() - start, 3),
+            "dataset_sha256": fingerprint[0],
+            "samples_sha256": fingerprint[1] if len(fingerprint) > 1 else None,
+            "params": params,
+        }
+        with self._lock:
+            self._index["versions"][version] = meta
+            traffic = dict(self._index["traffic"])
+        traffic[version] = 0 if traffic else 100
+        self.set_traffic(traffic, preloaded={version: predictor})
+        return meta
+
+    def set_traffic(
+        self,
+        weights: Dict[str, float],
+        *,
+        persist: bool = True,
+        preloaded: Optional[Dict[str, HepatitisPredictor]] = None,
+    ) -> None:
+        """Publica uma nova divisão de tráfego, ex.: ``{"v1": 90, "v2": 10}``."""
+        weights = {str(v): float(w) for v, w in weights.items()}
+        missing = [v for v in weights if v not in self._index["versions"]]
+        if missing:
+            raise KeyError(f"Versões inexistentes: {missing}")
+        if any(w < 0 for w in weights.values()):
+            raise ValueError("Pesos de tráfego não podem ser negativos.")
+        if weights and sum(weights.values()) <= 0:
+            raise ValueError("Ao menos uma versão precisa de peso positivo.")
+
+        # Carrega fora do lock e antes de publicar: requisições nunca esperam o disco
+        available = {**self._loaded, **(preloaded or {})}
+        loaded = {v: available.get(v) or self._load_version(v) for v in weights}
+        with self._lock:
+            for version, predictor in loaded.items():
+                if version not in self._loaded:
+                    for hook in self._load_hooks:
+                        hook(predictor)
+            previous, self._loaded = self._loaded, loaded
+            routed = [(v, w) for v, w in weights.items() if w > 0]
+            cumulative, total = [], 0.0
+            for _, w in routed:
+                total += w
+                cumulative.append(total)
+            self._routes = (
+                tuple(v for v, _ in routed), tuple(loaded[v] for v, _ in routed), tuple(cumulative), total
+            )
+            self._index["traffic"] = weights
+            if persist:
+                self._write_index()
+            kept = {id(p) for p in loaded.values()}
+            unloaded = [p for p in previous.values() if id(p) not in kept]
+            unload_hooks = list(self._unload_hooks)
+        # Fora do lock: um gancho pode esperar (ex.: encerrar o despachante de micro-lotes)
+        for predictor in unloaded:
+            for hook in unload_hooks:
+                hook(predictor)
+
+    def activate(self, version: str) -> None:
+        """Envia todo o tráfego para ``version`` (ex.: rollback)."""
+        self.set_traffic({version: 100})
+
+    # ---------- Funções internas ----------
+    def _make_predictor(self, version: str, params: Dict[str, Any]) -> HepatitisPredictor:
+        paths = Paths(data_csv=self.data_csv, model_pkl=self.root / version / "knn_model.pkl")
+        return HepatitisPredictor(paths, **{**self.predictor_options, **params})
+
+    def _load_version(self, version: str) -> HepatitisPredictor:
+        predictor = self._make_predictor(version, self._index["versions"][version].get("params", {}))
+        predictor.warm_up(rounds=1)
+        return predictor
+
+    def _next_version(self) -> str:
+        taken = [int(m.group(1)) for v in self._index["versions"] if (m := re.fullmatch(r"v(\d+)", v))]
+        taken += [int(m.group(1)) for p in self.root.glob("v*") if (m := re.fullmatch(r"v(\d+)", p.name))]
+        return f"v{max(taken, default=0) + 1}"
+
+    def _read_index(self) -> Dict[str, Any]:
+        path = self.root / self.INDEX_FILE
+        if not path.exists():
+            return {"versions": {}, "traffic": {}}
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+        index.setdefault("versions", {})
+        index.setdefault("traffic", {})
+        return index
+
+    def _write_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / self.INDEX_FILE
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
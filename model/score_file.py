@@ -0,0 +1,273 @@
+"""Predição em lote de arquivos CSV/Parquet, fora da API HTTP.
+
+O arquivo de entrada é lido em blocos de ``--chunk-size`` linhas; cada bloco
+vai inteiro para ``HepatitisPredictor.predict_many`` (normalização colunar e
+uma única passada do modelo) e o resultado é acrescentado ao arquivo de saída
+na ordem de entrada. Com ``--workers`` > 1 os blocos são distribuídos a um
+pool de processos: cada worker carrega o artefato com ``mmap_mode="r"`` (as
+matrizes do KNN ficam nas mesmas páginas para todos) e usa uma thread nativa,
+para que processos × threads BLAS/OpenMP não passem do número de núcleos.
+
+A memória é limitada: no máximo ``2 × workers`` blocos ficam em trânsito,
+então o pico depende de ``--chunk-size``, não do tamanho do arquivo.
+
+Saída: ``row`` (posição da linha na entrada), as colunas pedidas em
+``--keep``, ``prediction``, ``label``, ``confidence`` e ``error`` (registros
+que não puderam ser normalizados). Células vazias contam como campo ausente.
+Parquet (entrada ou saída) requer ``pyarrow``.
+
+Uso: python model/score_file.py exames.csv predicoes.csv --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .prediction_service import HepatitisPredictor, Paths, get_predictor_options_from_env, make_default_paths
+except ImportError:  # Executado como script
+    from prediction_service import HepatitisPredictor, Paths, get_predictor_options_from_env, make_default_paths
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except Exception:
+    PARQUET_AVAILABLE = False
+
+RESULT_COLUMNS = ["prediction", "label", "confidence", "error"]
+
+# Preditor de cada processo do pool (criado no initializer)
+_worker_predictor: Optional[HepatitisPredictor] = None
+
+
+def score_file(
+    predictor: HepatitisPredictor,
+    input_path: Path,
+    output_path: Path,
+    *,
+    chunk_size: int = 50_000,
+    workers: int = 1,
+    keep: Sequence[str] = (),
+    progress: bool = False,
+) -> Dict[str, Any]:
+    """Prediz todas as linhas de ``input_path`` e grava em ``output_path``.
+
+    Com ``workers`` > 1 os blocos são preditos em processos separados que
+    carregam o artefato de ``predictor.paths.model_pkl``. Retorna o resumo da
+    execução (linhas, erros, segundos e linhas por segundo).
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size deve ser >= 1.")
+    if workers < 1:
+        raise ValueError("workers deve ser >= 1.")
+    input_path, output_path = Path(input_path), Path(output_path)
+    start = time.perf_counter()
+    # Carrega (ou treina) uma única vez antes de criar os workers, que só leem o artefato
+    predictor.warm_up(rounds=1)
+
+    rows = errors = 0
+    writer = _ChunkWriter(output_path)
+    try:
+        if workers == 1:
+            for offset, chunk in _read_chunks(input_path, chunk_size):
+                out = _score_chunk(predictor, offset, chunk, keep)
+                rows, errors = rows + len(out), errors + int(out["error"].notna().sum())
+                writer.write(out)
+                _report(progress, rows, start)
+        else:
+            options = _worker_options(predictor)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(options,)) as pool:
+                pending: Deque[Future] = deque()
+                for offset, chunk in _read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(_score_in_worker, offset, chunk, list(keep)))
+                    # Resultados na ordem de entrada; no máximo 2 blocos por worker em trânsito
+                    while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                        out = pending.popleft().result()
+                        rows, errors = rows + len(out), errors + int(out["error"].notna().sum())
+                        writer.write(out)
+                        _report(progress, rows, start)
+                while pending:
+                    out = pending.popleft().result()
+                    rows, errors = rows + len(out), errors + int(out["error"].notna().sum())
+                    writer.write(out)
+                    _report(progress, rows, start)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        "output": str(output_path),
+    }
+
+
+# ---------- Leitura e escrita em blocos ----------
+def _read_chunks(path: Path, chunk_size: int) -> Iterator[tuple]:
+    # (posição da primeira linha, bloco) com no máximo chunk_size linhas
+    offset = 0
+    if _is_parquet(path):
+        _require_parquet()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            yield offset, chunk
+            offset += len(chunk)
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield offset, chunk
+            offset += len(chunk)
+
+
+class _ChunkWriter:
+    """Acrescenta blocos ao arquivo de saída (CSV com cabeçalho único ou Parquet)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.parquet = _is_parquet(path)
+        if self.parquet:
+            _require_parquet()
+        self._writer = None
+        self._started = False
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.parquet:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, _output_schema(table.schema))
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            frame.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        self._started = True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        elif not self._started and not self.parquet:
+            # Entrada vazia: saída só com o cabeçalho
+            pd.DataFrame(columns=["row", *RESULT_COLUMNS]).to_csv(self.path, index=False)
+
+
+def _output_schema(first: Any) -> Any:
+    # Tipos fixos para as colunas de resultado: no 1º bloco só com erros elas
+    # seriam inferidas como null e os blocos seguintes não caberiam no schema
+    fixed = {
+        "row": pa.int64(),
+        "prediction": pa.int64(),
+        "label": pa.string(),
+        "confidence": pa.float64(),
+        "error": pa.string(),
+    }
+    fields = []
+    for field in first:
+        if field.name in fixed:
+            field = field.with_type(fixed[field.name])
+        elif pa.types.is_null(field.type):
+            # Coluna mantida (--keep) vazia no 1º bloco: texto aceita qualquer valor depois
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=first.metadata)
+
+
+def _is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in {".parquet", ".pq"}
+
+
+def _require_parquet() -> None:
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Arquivos Parquet requerem pyarrow (pip install pyarrow).")
+
+
+# ---------- Predição de um bloco ----------
+def _score_chunk(predictor: HepatitisPredictor, offset: int, chunk: pd.DataFrame, keep: Sequence[str]) -> pd.DataFrame:
+    results = predictor.predict_many(_blank_to_none(chunk, predictor.normalizer.sex_col))
+    out = pd.DataFrame({"row": np.arange(offset, offset + len(chunk))})
+    for col in keep:
+        out[col] = chunk[col].to_numpy()
+    scored = pd.DataFrame.from_records(results, columns=RESULT_COLUMNS)
+    for col in RESULT_COLUMNS:
+        out[col] = scored[col].to_numpy()
+    # Inteiro anulável: linhas com erro não têm predição
+    out["prediction"] = out["prediction"].astype("Int64")
+    return out
+
+
+def _blank_to_none(chunk: pd.DataFrame, sex_col: str) -> pd.DataFrame:
+    # Célula vazia = campo ausente. Em colunas numéricas NaN já é ausente; em
+    # colunas de texto e em Sex (onde NaN seria um número inválido) vira None
+    chunk = chunk.copy(deep=False)
+    for pos, name in enumerate(chunk.columns):
+        series = chunk.iloc[:, pos]
+        is_text = series.dtype.kind not in "biuf"
+        if (is_text or (isinstance(name, str) and name.strip() == sex_col)) and series.hasnans:
+            chunk.isetitem(pos, series.astype(object).where(series.notna(), None))
+    return chunk
+
+
+def _worker_options(predictor: HepatitisPredictor) -> Dict[str, Any]:
+    return {
+        "paths": predictor.paths,
+        "inference": predictor.inference,
+        "native_threads": predictor.native_threads.limit if predictor.native_threads is not None else 1,
+    }
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    global _worker_predictor
+    _worker_predictor = HepatitisPredictor(
+        options["paths"], mmap_mode="r", inference=options["inference"], native_threads=options["native_threads"],
+    )
+    _worker_predictor.warm_up(rounds=1)
+
+
+def _score_in_worker(offset: int, chunk: pd.DataFrame, keep: List[str]) -> pd.DataFrame:
+    return _score_chunk(_worker_predictor, offset, chunk, keep)
+
+
+def _report(enabled: bool, rows: int, start: float) -> None:
+    if enabled:
+        elapsed = time.perf_counter() - start
+        print(f"[score] {rows} linhas  {rows / elapsed:,.0f} linhas/s", file=sys.stderr, flush=True)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Predição em lote de arquivos CSV/Parquet")
+    parser.add_argument("input", type=Path, help="Arquivo de entrada (.csv ou .parquet)")
+    parser.add_argument("output", type=Path, help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Linhas por bloco")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos de predição")
+    parser.add_argument("--keep", action="append", default=[], help="Coluna da entrada copiada para a saída (repetível)")
+    parser.add_argument("--model-path", type=Path, default=None, help="Artefato .pkl (padrão: model/knn_model.pkl)")
+    parser.add_argument("--progress", action="store_true", help="Mostra linhas/s a cada bloco (stderr)")
+    args = parser.parse_args(argv)
+
+    defaults = make_default_paths()
+    paths = Paths(data_csv=defaults.data_csv, model_pkl=args.model_path or defaults.model_pkl)
+    options = get_predictor_options_from_env()
+    options["cache_size"] = 0  # cada linha é vista uma vez: o cache só custaria memória
+    predictor = HepatitisPredictor(paths, mmap_mode="r", **options)
+    summary = score_file(
+        predictor, args.input, args.output,
+        chunk_size=args.chunk_size, workers=args.workers, keep=args.keep, progress=args.progress,
+    )
+    print(
+        f"[score] {summary['rows']} linhas ({summary['errors']} com erro) em {summary['seconds']:.2f}s"
+        f" = {summary['rows_per_second'] or 0:,.0f} linhas/s -> {summary['output']}",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
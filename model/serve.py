@@ -0,0 +1,195 @@
+"""Servidor de produção com pré-fork de workers (Linux/macOS).
+
+O processo pai carrega e aquece o modelo uma única vez (``joblib`` com
+``mmap_mode="r"``, as matrizes do KNN ficam mapeadas do arquivo e não
+copiadas), abre o socket e só então cria os workers via ``fork``: todos
+compartilham as mesmas páginas do modelo em vez de cada um fazer seu próprio
+``joblib.load``.
+
+Re-treino: um ``/train`` bem-sucedido em qualquer worker grava o novo artefato
+e envia ``SIGHUP`` ao pai, que recarrega o modelo e substitui os workers um a
+um. ``kill -HUP <pid do pai>`` faz o mesmo manualmente. O status dos jobs fica
+em ``<artefato>.jobs/`` (um JSON por job), então ``/train/<id>`` responde em
+qualquer worker, inclusive nos que substituíram o que treinou.
+
+Uso: python model/serve.py --workers 4 --port 5000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+from typing import Callable, Optional, Set
+
+from werkzeug.serving import make_server
+
+try:
+    from .model_api import create_app
+    from .prediction_service import (
+        HepatitisPredictor,
+        Paths,
+        PredictionRepository,
+        get_db_url_from_env,
+        get_predictor_options_from_env,
+        get_repository_options_from_env,
+        make_default_paths,
+    )
+except ImportError:  # Executado como script
+    from model_api import create_app
+    from prediction_service import (
+        HepatitisPredictor,
+        Paths,
+        PredictionRepository,
+        get_db_url_from_env,
+        get_predictor_options_from_env,
+        get_repository_options_from_env,
+        make_default_paths,
+    )
+
+
+class PreforkServer:
+    """Supervisiona N workers WSGI que compartilham socket e modelo do pai."""
+
+    def __init__(
+        self,
+        predictor_factory: Callable[[], HepatitisPredictor],
+        *,
+        host: str = "0.0.0.0",
+        port: int = 5000,
+        workers: int = 2,
+        threaded: bool = False,
+    ) -> None:
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Modo multi-processo requer fork (use model_api.py no Windows).")
+        self.predictor_factory = predictor_factory
+        self.host = host
+        self.port = port
+        self.n_workers = workers
+        self.threaded = threaded
+        self.predictor: Optional[HepatitisPredictor] = None
+        # Status dos jobs de /train compartilhado entre workers (ao lado do artefato)
+        self.jobs_dir: Optional[Path] = None
+        self.sock: Optional[socket.socket] = None
+        self._workers: Set[int] = set()
+        self._stopping = False
+
+    def start(self) -> None:
+        self.predictor = self._load_predictor()
+        model_pkl = self.predictor.paths.model_pkl
+        self.jobs_dir = model_pkl.with_name(model_pkl.stem + ".jobs")
+        self.sock = socket.create_server((self.host, self.port), backlog=1024, reuse_port=False)
+        self.sock.set_inheritable(True)
+        self.port = self.sock.getsockname()[1]
+        for _ in range(self.n_workers):
+            self._workers.add(self._spawn())
+
+    def serve_forever(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._reload)
+        print(f"[serve] pid={os.getpid()} http://{self.host}:{self.port} workers={self.n_workers}", flush=True)
+        while self._workers:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self._workers:
+                continue  # worker antigo, já substituído num reload
+            self._workers.discard(pid)
+            if not self._stopping:
+                self._workers.add(self._spawn())
+        if self.sock is not None:
+            self.sock.close()
+
+    def _load_predictor(self) -> HepatitisPredictor:
+        # Carrega e aquece no pai: os workers já nascem prontos
+        predictor = self.predictor_factory()
+        predictor.warm_up()
+        return predictor
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+        # ---- processo filho ----
+        code = 0
+        repo = None
+        try:
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, _exit_worker)
+            signal.signal(signal.SIGINT, _exit_worker)
+            # Conexões de banco nunca atravessam o fork: cada worker cria as suas
+            repo = PredictionRepository(get_db_url_from_env(), **get_repository_options_from_env())
+            app = create_app(
+                predictor=self.predictor,
+                repo=repo,
+                on_model_updated=lambda: os.kill(os.getppid(), signal.SIGHUP),
+                jobs_dir=self.jobs_dir,
+            )
+            server = make_server(self.host, self.port, app, threaded=self.threaded, fd=self.sock.fileno())
+            server.serve_forever()
+        except SystemExit:
+            pass
+        except BaseException:
+            code = 1
+        finally:
+            if repo is not None:
+                repo.close()
+            os._exit(code)
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = True
+        for pid in list(self._workers):
+            _terminate(pid)
+
+    def _reload(self, signum, frame) -> None:
+        # Recarrega no pai e troca os workers um a um (sempre há workers atendendo)
+        try:
+            self.predictor = self._load_predictor()
+        except Exception as e:
+            print(f"[serve] reload falhou, mantendo modelo atual: {e}", file=sys.stderr, flush=True)
+            return
+        for pid in list(self._workers):
+            self._workers.add(self._spawn())
+            self._workers.discard(pid)
+            _terminate(pid)
+
+
+def _exit_worker(signum, frame) -> None:
+    raise SystemExit(0)
+
+
+def _terminate(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Servidor multi-processo do modelo de hepatite")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--threaded", action="store_true", help="Cada worker atende com threads")
+    parser.add_argument("--model-path", type=Path, default=None, help="Artefato .pkl (padrão: model/knn_model.pkl)")
+    args = parser.parse_args(argv)
+
+    defaults = make_default_paths()
+    paths = Paths(data_csv=defaults.data_csv, model_pkl=args.model_path or defaults.model_pkl)
+    server = PreforkServer(
+        lambda: HepatitisPredictor(paths, mmap_mode="r", **get_predictor_options_from_env()),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threaded=args.threaded,
+    )
+    server.start()
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Treino em blocos para CSVs maiores que a memória.
+
+O CSV (seguido do CSV de casos acrescentados, se houver) é lido três vezes
+em blocos de ``chunk_size`` linhas:
+
+1. amostragem de reservatório do conjunto de validação (tamanho fixo) e
+   levantamento das classes e categorias;
+2. estatísticas do pré-processamento (médias/variâncias por combinação de
+   Chan, contagens para a moda) só com as linhas de treino;
+3. transformação de cada bloco e escrita no armazenamento de vizinhos, um
+   ``np.memmap`` em disco.
+
+O pico de memória depende de ``chunk_size`` e do tamanho do reservatório,
+não do tamanho do arquivo. O resultado é um ``Pipeline`` sklearn comum (os
+parâmetros ajustados são gravados nos mesmos atributos que o ``fit`` usaria),
+então predição, persistência e ``inference="fast"`` funcionam sem mudanças.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+
+# Teto do conjunto de validação amostrado (linhas mantidas em memória)
+HOLDOUT_MAX = 20_000
+
+
+@dataclass
+class StreamingFit:
+    X_holdout: pd.DataFrame
+    y_holdout: np.ndarray
+    holdout_index: np.ndarray  # posições (0-based) das linhas de validação no CSV
+    n_train: int
+
+
+class ReservoirSample:
+    """Amostra uniforme de tamanho fixo de um fluxo de linhas (algoritmo R)."""
+
+    def __init__(self, size: int, rng: np.random.Generator) -> None:
+        self.size = size
+        self.rng = rng
+        self.seen = 0
+        self.index: List[int] = []
+        self.rows: List[tuple] = []
+
+    def offer(self, chunk: pd.DataFrame) -> None:
+        values = chunk.to_numpy(dtype=object)
+        start, n = self.seen, len(values)
+        fill = max(0, min(self.size - start, n))
+        for j in range(fill):
+            self.index.append(start + j)
+            self.rows.append(tuple(values[j]))
+        if fill < n:
+            # A linha de posição i substitui uma vaga sorteada com prob. size / (i + 1)
+            positions = np.arange(start + fill, start + n)
+            draws = self.rng.integers(0, positions + 1)
+            for j in np.nonzero(draws < self.size)[0]:
+                slot = int(draws[j])
+                self.index[slot] = int(positions[j])
+                self.rows[slot] = tuple(values[fill + j])
+        self.seen += n
+
+
+class RunningMoments:
+    """Média e soma dos quadrados dos desvios por coluna, ignorando NaN."""
+
+    def __init__(self, n_columns: int) -> None:
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, X: np.ndarray) -> None:
+        # Combina as estatísticas do bloco com as acumuladas (Chan et al.)
+        present = ~np.isnan(X)
+        count_b = present.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(count_b > 0, np.nansum(X, axis=0) / count_b, 0.0)
+        m2_b = np.nansum((X - mean_b) ** 2, axis=0)
+        total = self.count + count_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(total > 0, count_b / total, 0.0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.count * ratio
+        self.count = total
+
+
+def iter_chunks(csv_path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        # Remove coluna de índice sem nome caso exista
+        if "Unnamed: 0" in chunk.columns:
+            chunk = chunk.drop(columns=["Unnamed: 0"])
+        yield chunk
+
+
+def iter_dataset_chunks(csv_paths: Sequence[Path], chunk_size: int) -> Iterator[pd.DataFrame]:
+    # Os arquivos em sequência, como um só fluxo; as colunas dos seguintes
+    # (ex.: casos acrescentados) são alinhadas às do primeiro
+    columns = None
+    for path in csv_paths:
+        for chunk in iter_chunks(path, chunk_size):
+            if columns is None:
+                columns = list(chunk.columns)
+            elif list(chunk.columns) != columns:
+                chunk = chunk.reindex(columns=columns)
+            yield chunk
+
+
+def _most_frequent(counts: Counter) -> object:
+    # Mesmo desempate do SimpleImputer(strategy="most_frequent"): o menor valor
+    top = max(counts.values())
+    return min(value for value, n in counts.items() if n == top)
+
+
+def fit_streaming(
+    csv_path: Union[Path, Sequence[Path]],
+    pipeline: Pipeline,
+    label_encoder: LabelEncoder,
+    store_path: Path,
+    *,
+    target_col: str,
+    numeric_cols: Sequence[str],
+    categorical_cols: Sequence[str],
+    chunk_size: int,
+    test_size: float,
+    random_state: int,
+    holdout_max: int = HOLDOUT_MAX,
+) -> StreamingFit:
+    """Ajusta ``pipeline`` e ``label_encoder`` lendo o CSV em blocos.
+
+    O pipeline deve ter a estrutura de ``HepatitisPredictor._build_pipeline``;
+    a matriz de treino do estimador final fica em ``store_path`` (``np.memmap``).
+    Só os rótulos de treino (inteiros, um por linha) ficam em memória, pois o
+    próprio estimador os copia no ``fit``. Com uma lista de CSVs eles são lidos
+    em sequência, e ``holdout_index`` conta as linhas do fluxo concatenado.
+    """
+    rng = np.random.default_rng(random_state)
+    csv_paths = [csv_path] if isinstance(csv_path, (str, Path)) else list(csv_path)
+
+    # ---- 1ª passada: validação por reservatório, classes e colunas ----
+    reservoir = ReservoirSample(holdout_max, rng)
+    classes: set = set()
+    columns: List[str] = []
+    for chunk in iter_dataset_chunks(csv_paths, chunk_size):
+        columns = list(chunk.columns)
+        classes.update(chunk[target_col].astype(str).unique())
+        reservoir.offer(chunk)
+    n_rows = reservoir.seen
+    # Mantém a fração test_size em arquivos pequenos (subamostra ainda é uniforme)
+    n_holdout = min(len(reservoir.index), max(1, int(round(test_size * n_rows))))
+    if n_rows - n_holdout < 1:
+        raise ValueError("Dataset pequeno demais para separar treino e validação.")
+    keep = np.sort(rng.choice(len(reservoir.index), size=n_holdout, replace=False))
+    holdout_index = np.asarray(reservoir.index)[keep]
+    order = np.argsort(holdout_index)
+    holdout_index = holdout_index[order]
+    holdout = pd.DataFrame([reservoir.rows[keep[i]] for i in order], columns=columns)
+    for col in numeric_cols:
+        holdout[col] = pd.to_numeric(holdout[col])
+    label_encoder.fit(np.array(sorted(classes)))
+
+    feature_cols = [c for c in columns if c != target_col]
+
+    def train_chunks() -> Iterator[pd.DataFrame]:
+        offset = 0
+        for chunk in iter_dataset_chunks(csv_paths, chunk_size):
+            positions = np.arange(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk[~np.isin(positions, holdout_index)]
+
+    # ---- 2ª passada: estatísticas de imputação/padronização e modas ----
+    moments = RunningMoments(len(numeric_cols))
+    category_counts: Dict[str, Counter] = {c: Counter() for c in categorical_cols}
+    n_train = 0
+    for chunk in train_chunks():
+        n_train += len(chunk)
+        moments.update(chunk[list(numeric_cols)].to_numpy(dtype=np.float64))
+        for col in categorical_cols:
+            category_counts[col].update(chunk[col].dropna())
+    if np.any(moments.count == 0) or any(not c for c in category_counts.values()):
+        raise ValueError("Há colunas sem nenhum valor preenchido no treino.")
+
+    # Ajusta a estrutura do ColumnTransformer num resumo pequeno (uma linha por
+    # categoria) e grava por cima os parâmetros calculados no fluxo
+    preprocess = pipeline.steps[0][1]
+    n_summary = max(len(c) for c in category_counts.values())
+    summary = pd.DataFrame({col: [np.nan] * n_summary for col in feature_cols})
+    for i, col in enumerate(numeric_cols):
+        summary[col] = moments.mean[i]
+    for col in categorical_cols:
+        values = sorted(category_counts[col])
+        summary[col] = values + [values[0]] * (n_summary - len(values))
+    summary = summary.astype({col: object for col in categorical_cols})
+    preprocess.fit(summary)
+
+    num_steps = preprocess.named_transformers_["num"].named_steps
+    cat_steps = preprocess.named_transformers_["cat"].named_steps
+    num_steps["imputer"].statistics_ = moments.mean.copy()
+    # Variância populacional após a imputação pela média (entradas imputadas têm desvio zero)
+    var = moments.m2 / n_train
+    scaler = num_steps["scaler"]
+    scaler.mean_ = moments.mean.copy()
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    scaler.n_samples_seen_ = n_train
+    cat_steps["imputer"].statistics_ = np.array(
+        [_most_frequent(category_counts[c]) for c in categorical_cols], dtype=object
+    )
+
+    # ---- 3ª passada: armazena as linhas transformadas no memmap ----
+    n_features = np.asarray(preprocess.transform(summary.iloc[:1])).shape[1]
+    X_store = np.memmap(store_path, dtype=np.float64, mode="w+", shape=(n_train, n_features))
+    y_store = np.empty(n_train, dtype=np.int64)
+    offset = 0
+    for chunk in train_chunks():
+        Xt = preprocess.transform(chunk[feature_cols])
+        if hasattr(Xt, "toarray"):
+            Xt = Xt.toarray()
+        X_store[offset:offset + len(chunk)] = Xt
+        y_store[offset:offset + len(chunk)] = label_encoder.transform(chunk[target_col].astype(str))
+        offset += len(chunk)
+    X_store.flush()
+
+    pipeline.steps[-1][1].fit(X_store, y_store)
+
+    y_holdout = label_encoder.transform(holdout[target_col].astype(str))
+    return StreamingFit(
+        X_holdout=holdout.drop(columns=[target_col]),
+        y_holdout=y_holdout,
+        holdout_index=holdout_index,
+        n_train=n_train,
+    )
@@ -0,0 +1,158 @@
+"""Rastreamento estruturado (linhas JSON) com custo nulo quando desligado.
+
+Cada requisição amostrada recebe um ``trace_id``; os eventos registrados
+durante ela viram uma linha JSON cada. Os pontos de instrumentação seguem o
+padrão::
+
+    trace = tracer.current()
+    if trace is not None:
+        trace.event("predict.normalized", row=rows[0])
+
+de modo que, sem rastreamento ativo, nada é montado nem formatado: o custo é
+uma leitura de ``ContextVar``.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("hep_trace", default=None)
+
+# Arquivos de TRACE_FILE abertos no processo, um por caminho, compartilhados
+# por todos os Tracer (cada HepatitisPredictor cria o seu)
+_trace_files: Dict[str, TextIO] = {}
+_trace_files_lock = threading.Lock()
+
+
+class Trace:
+    """Um rastro ativo: acumula o tempo desde o início e emite eventos."""
+
+    __slots__ = ("trace_id", "_tracer", "_start")
+
+    def __init__(self, tracer: "Tracer", trace_id: str) -> None:
+        self.trace_id = trace_id
+        self._tracer = tracer
+        self._start = time.perf_counter()
+
+    def event(self, name: str, **fields: Any) -> None:
+        record = {
+            "ts": round(time.time(), 6),
+            "trace_id": self.trace_id,
+            "event": name,
+            "elapsed_ms": round((time.perf_counter() - self._start) * 1000, 3),
+        }
+        record.update(fields)
+        self._tracer.emit(record)
+
+
+class Tracer:
+    """Fábrica de rastros com amostragem e saída em linhas JSON.
+
+    ``enabled=False`` (padrão) desliga tudo; com ``sample_rate`` < 1 apenas
+    essa fração das requisições é rastreada.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 1.0,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate deve estar entre 0 e 1, recebido {sample_rate!r}")
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current() -> Optional[Trace]:
+        return _current.get()
+
+    def begin(self, trace_id: Optional[str] = None) -> Optional[Token]:
+        """Inicia um rastro no contexto atual; ``None`` se desligado ou fora da amostra."""
+        if not self.enabled:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        return _current.set(Trace(self, trace_id or uuid.uuid4().hex))
+
+    def end(self, token: Optional[Token]) -> None:
+        if token is not None:
+            _current.reset(token)
+
+    @contextmanager
+    def trace(self, trace_id: Optional[str] = None) -> Iterator[Optional[Trace]]:
+        token = self.begin(trace_id)
+        try:
+            yield _current.get() if token is not None else None
+        finally:
+            self.end(token)
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(_clean(record), default=_json_default, ensure_ascii=False)
+        stream = self.stream or sys.stderr
+        with self._lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+
+def _clean(value: Any) -> Any:
+    # NaN (campo ausente) vira null para manter o JSON válido
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    # Escalares e arrays NumPy expõem .tolist(); o resto vira texto
+    if hasattr(value, "tolist"):
+        return _clean(value.tolist())
+    return str(value)
+
+
+def get_tracing_options_from_env() -> Dict[str, Any]:
+    # TRACE=1 liga o rastreamento; TRACE_SAMPLE_RATE define a fração amostrada;
+    # TRACE_FILE grava as linhas JSON num arquivo em vez do stderr
+    options: Dict[str, Any] = {
+        "enabled": os.getenv("TRACE") == "1",
+        "sample_rate": float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+    }
+    trace_file = os.getenv("TRACE_FILE")
+    if trace_file:
+        options["stream"] = open_trace_file(trace_file)
+    return options
+
+
+def open_trace_file(path: str) -> TextIO:
+    """Destino de linhas JSON em ``path``, aberto uma única vez por processo."""
+    key = os.path.abspath(path)
+    with _trace_files_lock:
+        stream = _trace_files.get(key)
+        if stream is None or stream.closed:
+            stream = _trace_files[key] = open(key, "a", encoding="utf-8", buffering=1)
+        return stream
+
+
+def _close_trace_files() -> None:
+    with _trace_files_lock:
+        for stream in _trace_files.values():
+            stream.close()
+        _trace_files.clear()
+
+
+atexit.register(_close_trace_files)
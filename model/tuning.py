@@ -0,0 +1,187 @@
+"""Busca de hiperparâmetros com validação cruzada, em paralelo.
+
+O espaço combina escolhas de pré-processamento (``imputer_strategy``) com as
+do KNN (``n_neighbors``, ``weights``, ``metric``). Cada tarefa do pool é um
+par (fold, pré-processamento): o ``ColumnTransformer`` é ajustado uma única
+vez e as matrizes transformadas servem a todas as combinações do KNN. Dentro
+da tarefa, os vizinhos são buscados uma vez por métrica com o maior ``k`` do
+espaço; os ``k`` menores e as duas ponderações reaproveitam essa busca.
+Com ``cache`` (``PreprocessCache``), as matrizes de cada fold ficam em disco e
+buscas repetidas sobre os mesmos dados não reajustam o pré-processamento.
+"""
+from __future__ import annotations
+
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import joblib
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+
+DEFAULT_SEARCH_SPACE: Dict[str, List[Any]] = {
+    "n_neighbors": [3, 5, 7, 9, 11, 15],
+    "weights": ["uniform", "distance"],
+    "metric": ["euclidean", "manhattan"],
+    "imputer_strategy": ["mean", "median"],
+}
+SEARCH_PARAMS = tuple(DEFAULT_SEARCH_SPACE)
+
+KnnSetting = Tuple[int, str, str]  # (n_neighbors, weights, metric)
+
+
+def _vote(neigh_y: np.ndarray, dist: np.ndarray, n_classes: int, weights: str) -> np.ndarray:
+    # Mesma regra do KNeighborsClassifier: distância zero leva todo o peso e,
+    # no empate, vence o menor índice de classe
+    if weights == "uniform":
+        w = np.ones_like(dist)
+    else:
+        with np.errstate(divide="ignore"):
+            w = 1.0 / dist
+        exact = np.isinf(w)
+        rows = exact.any(axis=1)
+        w[rows] = exact[rows].astype(np.float64)
+    votes = np.zeros((len(neigh_y), n_classes))
+    np.add.at(votes, (np.arange(len(neigh_y))[:, None], neigh_y), w)
+    return np.argmax(votes, axis=1)
+
+
+def _transform_fold(preprocess: Any, X_train: pd.DataFrame, X_val: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    Xt_train = np.asarray(preprocess.fit_transform(X_train), dtype=np.float64)
+    return Xt_train, np.asarray(preprocess.transform(X_val), dtype=np.float64)
+
+
+def _score_fold(
+    preprocess: Any,
+    X_train: pd.DataFrame,
+    y_train: np.ndarray,
+    X_val: pd.DataFrame,
+    y_val: np.ndarray,
+    n_classes: int,
+    settings: Sequence[KnnSetting],
+    cache: Any = None,
+    cache_key: Optional[str] = None,
+) -> Tuple[float, Dict[KnnSetting, Tuple[float, float]]]:
+    """Acurácia e tempo de cada combinação do KNN num fold; roda num worker do pool."""
+    start = time.perf_counter()
+    cached = cache.get(cache_key) if cache_key is not None else None
+    if cached is not None:
+        Xt_train, Xt_val = cached
+    else:
+        Xt_train, Xt_val = _transform_fold(preprocess, X_train, X_val)
+        if cache_key is not None:
+            cache.put(cache_key, (Xt_train, Xt_val))
+    preprocess_seconds = time.perf_counter() - start
+
+    results: Dict[KnnSetting, Tuple[float, float]] = {}
+    for metric in dict.fromkeys(m for _, _, m in settings):
+        group = [s for s in settings if s[2] == metric]
+        start = time.perf_counter()
+        k_max = max(k for k, _, _ in group)
+        search = KNeighborsClassifier(n_neighbors=k_max, metric=metric, algorithm="brute")
+        dist, ind = search.fit(Xt_train, y_train).kneighbors(Xt_val)
+        neigh_y = y_train[ind]
+        # A busca compartilhada é rateada entre as combinações da métrica
+        shared = (time.perf_counter() - start) / len(group)
+        for setting in group:
+            k, weights, _ = setting
+            start = time.perf_counter()
+            pred = _vote(neigh_y[:, :k], dist[:, :k], n_classes, weights)
+            accuracy = float(np.mean(pred == y_val))
+            results[setting] = (accuracy, shared + time.perf_counter() - start)
+    return preprocess_seconds, results
+
+
+def tune(
+    template: Pipeline,
+    X: pd.DataFrame,
+    y: np.ndarray,
+    *,
+    search_space: Optional[Dict[str, Sequence[Any]]] = None,
+    cv: int = 5,
+    n_jobs: int = -1,
+    random_state: int = 1,
+    cache: Any = None,
+    cache_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Avalia o espaço de busca com ``cv`` folds estratificados em um pool de processos.
+
+    ``template`` deve ter a estrutura de ``HepatitisPredictor._build_pipeline``.
+    Retorna o ranking (melhor primeiro), com acurácia média/desvio e o tempo de
+    relógio gasto por configuração somando os folds (o pré-processamento de cada
+    fold é rateado entre as combinações que o compartilham).
+
+    ``cache_key`` identifica ``X``/``y`` (ex.: hash do dataset + divisão) para
+    o ``cache`` de pré-processamento; sem ele nada é gravado.
+    """
+    space = {**DEFAULT_SEARCH_SPACE, **(search_space or {})}
+    unknown = sorted(set(space) - set(SEARCH_PARAMS))
+    if unknown:
+        raise ValueError(f"Parâmetros de busca não suportados: {unknown}; use {list(SEARCH_PARAMS)}")
+    settings: List[KnnSetting] = [
+        (int(k), w, m)
+        for k, w, m in itertools.product(space["n_neighbors"], space["weights"], space["metric"])
+    ]
+    strategies = list(dict.fromkeys(space["imputer_strategy"]))
+    if not settings or not strategies:
+        raise ValueError("Espaço de busca vazio.")
+
+    y = np.asarray(y)
+    n_classes = int(y.max()) + 1
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state).split(X, y))
+    smallest_train = min(len(train_idx) for train_idx, _ in folds)
+    if max(k for k, _, _ in settings) > smallest_train:
+        raise ValueError("n_neighbors maior que o número de linhas de treino de um fold.")
+
+    preprocess = template.steps[0][1]
+    tasks = []
+    for strategy in strategies:
+        candidate = clone(preprocess).set_params(num__imputer__strategy=strategy)
+        for i, (train_idx, val_idx) in enumerate(folds):
+            key = None
+            if cache is not None and cache_key is not None:
+                key = cache.key(cache_key, "fold", cv, random_state, i, joblib.hash(candidate))
+            tasks.append((strategy, candidate, train_idx, val_idx, key))
+
+    start = time.perf_counter()
+    outputs = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_score_fold)(
+            candidate, X.iloc[train_idx], y[train_idx], X.iloc[val_idx], y[val_idx], n_classes, settings,
+            cache, key,
+        )
+        for _, candidate, train_idx, val_idx, key in tasks
+    )
+    wall = time.perf_counter() - start
+
+    scores: Dict[Tuple[str, KnnSetting], List[float]] = {}
+    seconds: Dict[Tuple[str, KnnSetting], float] = {}
+    for (strategy, *_), (preprocess_seconds, results) in zip(tasks, outputs):
+        for setting, (accuracy, elapsed) in results.items():
+            key = (strategy, setting)
+            scores.setdefault(key, []).append(accuracy)
+            seconds[key] = seconds.get(key, 0.0) + elapsed + preprocess_seconds / len(settings)
+
+    leaderboard = [
+        {
+            "params": {"n_neighbors": k, "weights": w, "metric": m, "imputer_strategy": strategy},
+            "mean_accuracy": round(float(np.mean(values)), 4),
+            "std_accuracy": round(float(np.std(values)), 4),
+            "seconds": round(seconds[(strategy, (k, w, m))], 6),
+        }
+        for (strategy, (k, w, m)), values in scores.items()
+    ]
+    # Empate na acurácia: menor variação entre folds e, depois, menos vizinhos
+    leaderboard.sort(key=lambda r: (-r["mean_accuracy"], r["std_accuracy"], r["params"]["n_neighbors"]))
+    for rank, row in enumerate(leaderboard, start=1):
+        row["rank"] = rank
+    return {
+        "best_params": dict(leaderboard[0]["params"]),
+        "leaderboard": leaderboard,
+        "cv": cv,
+        "wall_seconds": round(wall, 4),
+    }
@@ -19,7 +19,7 @@ class PredictionClient {
     }
   }
 
-  // Solicita re-treino do modelo no backend Python
+  // Solicita re-treino do modelo no backend Python (retorna o id do job em segundo plano)
   async retrain() {
     try {
       const res = await axios.post(`${this.baseUrl}/train`, {}, { timeout: 20000 });
@@ -28,6 +28,16 @@ class PredictionClient {
       throw new Error(`Falha ao re-treinar modelo: ${err.message}`);
     }
   }
+
+  // Consulta o status de um job de re-treino
+  async trainingStatus(jobId) {
+    try {
+      const res = await axios.get(`${this.baseUrl}/train/${encodeURIComponent(jobId)}`, { timeout: 8000 });
+      return res.data;
+    } catch (err) {
+      throw new Error(`Falha ao consultar re-treino: ${err.message}`);
+    }
+  }
 }
 
 module.exports = { PredictionClient };
\ No newline at end of file
@@ -46,6 +46,21 @@ describe('PredictionClient', () => {
     expect(result).toEqual({ retrained: true });
   });
 
+  test('trainingStatus consulta GET /train/:id', async () => {
+    const client = new PredictionClient(baseUrl);
+
+    axios.get.mockResolvedValue({ data: { id: 'abc', status: 'done' } });
+
+    const result = await client.trainingStatus('abc');
+
+    expect(axios.get).toHaveBeenCalledWith(
+      `${baseUrl}/train/abc`,
+      { timeout: 8000 }
+    );
+
+    expect(result).toEqual({ id: 'abc', status: 'done' });
+  });
+
   test('retrain lança erro se axios falhar', async () => {
     const client = new PredictionClient(baseUrl);
 
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from model.asgi_api import create_asgi_app
+from model.model_api import create_app
+from model.prediction_service import HepatitisPredictor, Paths, PredictionRepository
+from tests.test_prediction_service import make_dataset
+
+PAYLOAD = {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60}
+
+
+class SlowRepository(PredictionRepository):
+    """Repositorio que demora em cada gravacao, como um INSERT remoto."""
+
+    def __init__(self, delay):
+        super().__init__(None)
+        self.delay = delay
+        self.rows = []
+        self.release = threading.Event()
+
+    def log(self, payload, result):
+        self.release.wait(self.delay)
+        self.rows.append((payload, result))
+
+    def log_many(self, records):
+        self.release.wait(self.delay)
+        self.rows.extend(records)
+
+
+async def call(app, method, path, body=None, headers=(), query=b""):
+    """Executa uma requisicao ASGI e devolve (status, cabecalhos, corpo)."""
+    raw = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query, "http_version": "1.1",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 1234), "scheme": "http", "root_path": "",
+    }
+    messages = [{"type": "http.request", "body": raw, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, payload = sent
+    return start["status"], dict(start["headers"]), payload["body"]
+
+
+class TestAsgiApp(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = Path(tempfile.mkdtemp())
+        paths = Paths(data_csv=make_dataset(cls.tmpdir), model_pkl=cls.tmpdir / "knn_model.pkl")
+        cls.predictor = HepatitisPredictor(paths, random_state=0, n_neighbors=3)
+        cls.predictor.train(test_size=0.3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_same_responses_as_flask_app(self):
+        """/predict, /predict/batch e erros tem o mesmo status e corpo da versao WSGI."""
+        flask_client = create_app(predictor=self.predictor, repo=PredictionRepository(None)).test_client()
+        app = create_asgi_app(self.predictor, PredictionRepository(None), max_workers=2)
+        batch = {"records": [PAYLOAD, {"Extra": 1}]}
+
+        async def scenario():
+            return [
+                await call(app, "POST", "/predict", PAYLOAD),
+                await call(app, "POST", "/predict/batch", batch),
+                await call(app, "POST", "/predict", {"Extra": 1}),
+                await call(app, "GET", "/cache/stats"),
+                await call(app, "GET", "/health/db"),
+            ]
+
+        results = asyncio.run(scenario())
+        expected = [
+            flask_client.post("/predict", json=PAYLOAD),
+            flask_client.post("/predict/batch", json=batch),
+            flask_client.post("/predict", json={"Extra": 1}),
+            flask_client.get("/cache/stats"),
+            flask_client.get("/health/db"),
+        ]
+        for (status, headers, body), response in zip(results, expected):
+            self.assertEqual(status, response.status_code)
+            self.assertEqual(json.loads(body), response.get_json())
+            self.assertEqual(headers[b"content-type"], b"application/json")
+
+    def test_logging_does_not_delay_response(self):
+        """A resposta sai antes da gravacao lenta, que termina em segundo plano."""
+        repo = SlowRepository(delay=5.0)
+        app = create_asgi_app(self.predictor, repo, max_workers=2)
+
+        async def scenario():
+            start = time.perf_counter()
+            status, _, _ = await call(app, "POST", "/predict", PAYLOAD)
+            elapsed = time.perf_counter() - start
+            pending = app.logger.stats()["async_pending"]
+            repo.release.set()
+            await app.logger.drain()
+            return status, elapsed, pending
+
+        status, elapsed, pending = asyncio.run(scenario())
+        self.assertEqual(status, 200)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(pending, 1)
+        self.assertEqual(len(repo.rows), 1)
+        app.logger.close()
+
+    def test_pending_logs_are_bounded(self):
+        """Acima de max_pending_logs as gravacoes sao descartadas e contadas."""
+        repo = SlowRepository(delay=5.0)
+        app = create_asgi_app(self.predictor, repo, max_workers=2, max_pending_logs=2)
+
+        async def scenario():
+            await asyncio.gather(*(call(app, "POST", "/predict", PAYLOAD) for _ in range(4)))
+            stats = app.logger.stats()
+            repo.release.set()
+            await app.logger.drain()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual((stats["async_pending"], stats["async_dropped"]), (2, 2))
+        self.assertEqual(len(repo.rows), 2)
+        app.logger.close()
+
+    def test_batch_logging_is_one_task(self):
+        """/predict/batch agenda uma unica gravacao assincrona para o lote inteiro."""
+        repo = SlowRepository(delay=5.0)
+        app = create_asgi_app(self.predictor, repo, max_workers=2)
+
+        async def scenario():
+            status, _, _ = await call(app, "POST", "/predict/batch", {"records": [PAYLOAD] * 3})
+            pending = len(app.logger._pending)
+            repo.release.set()
+            await app.logger.drain()
+            return status, pending
+
+        self.assertEqual(asyncio.run(scenario()), (200, 1))
+        self.assertEqual(len(repo.rows), 3)
+        app.logger.close()
+
+    def test_headers_and_query_string_reach_flask(self):
+        """Cabecalhos (X-Model-Version) e query string chegam a aplicacao."""
+        app = create_asgi_app(self.predictor, PredictionRepository(None), max_workers=1)
+        status, _, body = asyncio.run(
+            call(app, "POST", "/predict", PAYLOAD, headers=[(b"x-model-version", b"v9")])
+        )
+        # Sem registro de versoes o cabecalho e ignorado e o modelo principal responde
+        self.assertEqual(status, 200)
+        self.assertIn("label", json.loads(body))
+        status, _, _ = asyncio.run(call(app, "GET", "/train/inexistente", query=b"wait=1"))
+        self.assertEqual(status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
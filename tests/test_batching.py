@@ -0,0 +1,149 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from model.batching import _STOP, MicroBatcher
+from model.model_api import create_app
+from model.prediction_service import HepatitisPredictor, Paths, PredictionRepository
+from tests.test_prediction_service import make_dataset
+
+PAYLOADS = [
+    {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60},
+    {"Age": 61, "Sex": "f", "ALB": 25, "AST": 77},
+    {"Age": 30, "ALB": 34, "CHOL": 180},
+    {"Age": 52, "Sex": "m", "ALB": 28, "ALP": 102},
+]
+
+
+class TestMicroBatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = Path(tempfile.mkdtemp())
+        paths = Paths(data_csv=make_dataset(cls.tmpdir), model_pkl=cls.tmpdir / "knn_model.pkl")
+        cls.predictor = HepatitisPredictor(paths, random_state=0, n_neighbors=3)
+        cls.predictor.train(test_size=0.3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def run_concurrently(self, batcher, payloads):
+        results = [None] * len(payloads)
+        barrier = threading.Barrier(len(payloads))
+
+        def call(i):
+            barrier.wait()
+            try:
+                results[i] = batcher.predict(payloads[i])
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(payloads))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_concurrent_calls_share_one_batch_with_same_results(self):
+        """Chamadas simultaneas viram um lote e cada uma recebe o resultado de predict."""
+        batches = []
+        batcher = MicroBatcher(self.predictor, max_batch_size=64, max_wait=0.5,
+                               observer=lambda size, delays: batches.append((size, delays)))
+        try:
+            with mock.patch.object(self.predictor, "predict_many", wraps=self.predictor.predict_many) as many:
+                results = self.run_concurrently(batcher, PAYLOADS * 2)
+        finally:
+            batcher.close()
+        self.assertEqual(results, [self.predictor.predict(p) for p in PAYLOADS * 2])
+        self.assertLess(many.call_count, len(PAYLOADS) * 2)
+        self.assertEqual(sum(size for size, _ in batches), len(PAYLOADS) * 2)
+        self.assertTrue(all(len(delays) == size and min(delays) >= 0 for size, delays in batches))
+
+    def test_max_batch_size_is_respected(self):
+        """Nenhum lote passa de max_batch_size."""
+        sizes = []
+        batcher = MicroBatcher(self.predictor, max_batch_size=3, max_wait=0.2,
+                               observer=lambda size, delays: sizes.append(size))
+        try:
+            self.run_concurrently(batcher, PAYLOADS * 3)
+        finally:
+            batcher.close()
+        self.assertEqual(sum(sizes), 12)
+        self.assertLessEqual(max(sizes), 3)
+
+    def test_invalid_record_raises_only_for_its_caller(self):
+        """Registro invalido levanta ValueError so para o proprio chamador."""
+        bad = ["nao", "e", "objeto"]
+        with self.assertRaises(Exception) as direct:
+            self.predictor.predict(bad)
+        batcher = MicroBatcher(self.predictor, max_wait=0.2)
+        try:
+            results = self.run_concurrently(batcher, [PAYLOADS[0], bad])
+        finally:
+            batcher.close()
+        self.assertEqual(results[0], self.predictor.predict(PAYLOADS[0]))
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(str(results[1]), str(direct.exception))
+
+    def test_failed_batch_is_retried_per_caller(self):
+        """Se predict_many levanta excecao, so o chamador do payload ruim recebe o erro."""
+        bad = ["nao", "e", "objeto"]
+        payloads = [PAYLOADS[0], bad, PAYLOADS[1], PAYLOADS[2]]
+        batcher = MicroBatcher(self.predictor, max_wait=0.5)
+        try:
+            with mock.patch.object(self.predictor, "predict_many", side_effect=RuntimeError("lote falhou")) as many:
+                results = self.run_concurrently(batcher, payloads)
+        finally:
+            batcher.close()
+        self.assertTrue(many.called)
+        for pos in (0, 2, 3):
+            self.assertEqual(results[pos], self.predictor.predict(payloads[pos]))
+        self.assertIsInstance(results[1], Exception)
+
+    def test_close_during_concurrent_calls_never_hangs(self):
+        """close() concorrente com chamadas: todas terminam, pelo lote ou direto."""
+        batcher = MicroBatcher(self.predictor, max_wait=0.01)
+        results = []
+        callers = [threading.Thread(target=lambda: results.append(batcher.predict(PAYLOADS[0]))) for _ in range(16)]
+        for t in callers:
+            t.start()
+        batcher.close()
+        for t in callers:
+            t.join(10)
+        self.assertFalse(any(t.is_alive() for t in callers))
+        self.assertEqual(results, [self.predictor.predict(PAYLOADS[0])] * 16)
+
+    def test_dead_dispatcher_falls_back_to_direct_predict(self):
+        """Pedido enfileirado depois que o despachante saiu nao espera para sempre."""
+        batcher = MicroBatcher(self.predictor)
+        batcher._queue.put(_STOP)  # despachante sai sem passar por close()
+        batcher._thread.join(5)
+        with mock.patch("model.batching._WAIT_POLL", 0.01):
+            self.assertEqual(batcher.predict(PAYLOADS[1]), self.predictor.predict(PAYLOADS[1]))
+
+    def test_closed_batcher_predicts_directly(self):
+        batcher = MicroBatcher(self.predictor)
+        batcher.close()
+        self.assertEqual(batcher.predict(PAYLOADS[0]), self.predictor.predict(PAYLOADS[0]))
+
+    def test_api_exposes_batch_metrics(self):
+        """Com micro-lotes ligados, /predict responde igual e /metrics mostra lotes e espera."""
+        plain = create_app(predictor=self.predictor, repo=PredictionRepository(None), microbatch={"enabled": False})
+        batched = create_app(predictor=self.predictor, repo=PredictionRepository(None),
+                             microbatch={"max_batch_size": 8, "max_wait": 0.001})
+        client = batched.test_client()
+        for payload in PAYLOADS:
+            expected = plain.test_client().post("/predict", json=payload)
+            response = client.post("/predict", json=payload)
+            self.assertEqual(response.get_json(), expected.get_json())
+        body = client.get("/metrics").get_data(as_text=True)
+        self.assertIn("hep_batch_size_count 4", body)
+        self.assertIn("hep_batch_queue_seconds_count 4", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from model import dataset_cache
+from model.dataset_cache import default_cache_path, load_dataset_cached, read_dataset
+from model.prediction_service import HepatitisPredictor, Paths
+from tests.test_prediction_service import make_dataset
+
+
+class TestDatasetCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.csv = make_dataset(self.tmpdir)
+        # Valores ausentes em texto e em numero, e coluna de indice sem nome
+        df = pd.read_csv(self.csv)
+        df.loc[2, "Sex"] = None
+        df.loc[3, "ALB"] = None
+        df.to_csv(self.csv)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_cached_frame_matches_csv(self):
+        """O DataFrame vindo do cache e identico ao do read_csv."""
+        expected = read_dataset(self.csv)
+        first = load_dataset_cached(self.csv)
+        self.assertTrue(default_cache_path(self.csv).exists())
+        with mock.patch.object(dataset_cache.pd, "read_csv") as read_csv:
+            second = load_dataset_cached(self.csv)
+        read_csv.assert_not_called()
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+        self.assertNotIn("Unnamed: 0", second.columns)
+
+    def test_modified_csv_invalidates_cache(self):
+        """Alterar o CSV faz o cache ser reconstruido."""
+        load_dataset_cached(self.csv)
+        df = pd.read_csv(self.csv)
+        df.loc[0, "Age"] = 99
+        df.to_csv(self.csv, index=False)
+        self.assertEqual(load_dataset_cached(self.csv).loc[0, "Age"], 99)
+
+    def test_touch_without_changes_reuses_cache(self):
+        """Mudou so o mtime: o hash confirma e o CSV nao e re-parseado."""
+        load_dataset_cached(self.csv)
+        st = self.csv.stat()
+        os.utime(self.csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with mock.patch.object(dataset_cache.pd, "read_csv") as read_csv:
+            load_dataset_cached(self.csv)
+        read_csv.assert_not_called()
+
+    def test_corrupted_cache_is_rebuilt(self):
+        """Um cache ilegivel e ignorado e regravado."""
+        default_cache_path(self.csv).write_bytes(b"lixo")
+        pd.testing.assert_frame_equal(load_dataset_cached(self.csv), read_dataset(self.csv))
+        with mock.patch.object(dataset_cache.pd, "read_csv") as read_csv:
+            load_dataset_cached(self.csv)
+        read_csv.assert_not_called()
+
+    def test_predictor_can_disable_cache(self):
+        """dataset_cache=False treina direto do CSV, sem gravar o .npz."""
+        paths = Paths(data_csv=self.csv, model_pkl=self.tmpdir / "knn_model.pkl")
+        HepatitisPredictor(paths, n_neighbors=3, dataset_cache=False).train(test_size=0.3)
+        self.assertFalse(default_cache_path(self.csv).exists())
+        HepatitisPredictor(paths, n_neighbors=3).train(test_size=0.3)
+        self.assertTrue(default_cache_path(self.csv).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
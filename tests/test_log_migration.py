@@ -0,0 +1,115 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from model.prediction_service import (
+    SQLALCHEMY_AVAILABLE,
+    PredictionRepository,
+    legacy_prediction_log_table,
+    payload_hash,
+)
+
+if SQLALCHEMY_AVAILABLE:
+    from sqlalchemy import MetaData, create_engine, inspect, select, text
+
+    from model import log_migration
+    from model.log_migration import migrate_prediction_log
+
+
+@unittest.skipUnless(SQLALCHEMY_AVAILABLE, "SQLAlchemy nao esta instalado")
+class TestMigratePredictionLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.db_url = f"sqlite:///{self.tmpdir / 'predictions.db'}"
+        self.engine = create_engine(self.db_url)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def create_legacy_rows(self):
+        table = legacy_prediction_log_table(MetaData())
+        table.create(self.engine)
+        payloads = [{"Age": 40 + i, "Sex": "f", "ALB": 30.5} for i in range(5)]
+        rows = [
+            {"created_at": datetime(2024, 1, 1), "payload_json": json.dumps(p), "prediction": 1,
+             "label": "Live", "confidence": 0.8}
+            for p in payloads
+        ]
+        # JSON truncado pelo formato antigo
+        rows.append({**rows[0], "payload_json": json.dumps({"Obs": "x" * 3000})[:2048]})
+        with self.engine.begin() as conn:
+            conn.execute(table.insert(), rows)
+        return payloads
+
+    def test_copies_rows_into_compact_table(self):
+        """Linhas antigas viram colunas tipadas com ids preservados; JSON truncado e contado."""
+        payloads = self.create_legacy_rows()
+        summary = migrate_prediction_log(self.db_url, batch_size=4)
+
+        self.assertEqual(summary, {"status": "migrated", "migrated": 6, "unparsable": 1,
+                                   "legacy_table": "predictions_legacy"})
+        repo = PredictionRepository(self.db_url)
+        self.assertFalse(repo.legacy_schema)
+        with repo.engine.connect() as conn:
+            rows = conn.execute(select(repo.table).order_by(repo.table.c.id)).mappings().all()
+        self.assertEqual([r["id"] for r in rows], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([r["age"] for r in rows[:5]], [40.0, 41.0, 42.0, 43.0, 44.0])
+        self.assertEqual(rows[0]["payload_hash"], payload_hash(payloads[0]))
+        self.assertIsNone(rows[5]["age"])
+
+        # Novos registros continuam a sequencia de ids
+        repo.log({"Age": 50}, {"prediction": 0, "label": "Die", "confidence": None})
+        with repo.engine.connect() as conn:
+            self.assertEqual(conn.execute(select(repo.table.c.id).order_by(repo.table.c.id.desc())).first()[0], 7)
+
+    def test_drop_legacy_and_second_run_is_noop(self):
+        self.create_legacy_rows()
+        self.assertIsNone(migrate_prediction_log(self.db_url, drop_legacy=True)["legacy_table"])
+        self.assertNotIn("predictions_legacy", inspect(self.engine).get_table_names())
+        self.assertEqual(migrate_prediction_log(self.db_url)["status"], "up_to_date")
+
+    def test_interrupted_copy_resumes_without_touching_service_table(self):
+        """Falha no meio da copia deixa a tabela antiga no lugar; nova execucao continua do ultimo id."""
+        self.create_legacy_rows()
+        original = log_migration._convert
+        calls = []
+
+        def flaky(row):
+            calls.append(row["id"])
+            if row["id"] == 5 and calls.count(5) == 1:
+                raise RuntimeError("conexao perdida")
+            return original(row)
+
+        with mock.patch.object(log_migration, "_convert", side_effect=flaky):
+            with self.assertRaises(RuntimeError):
+                migrate_prediction_log(self.db_url, batch_size=2)
+            self.assertTrue(PredictionRepository(self.db_url).legacy_schema)
+            summary = migrate_prediction_log(self.db_url, batch_size=2)
+
+        self.assertEqual((summary["status"], summary["migrated"]), ("migrated", 2))
+        self.assertEqual(calls, [1, 2, 3, 4, 5, 5, 6])
+        self.assertNotIn("predictions_compact_tmp", inspect(self.engine).get_table_names())
+        repo = PredictionRepository(self.db_url)
+        self.assertFalse(repo.legacy_schema)
+        with repo.engine.connect() as conn:
+            self.assertEqual([r[0] for r in conn.execute(select(repo.table.c.id).order_by(repo.table.c.id))],
+                             [1, 2, 3, 4, 5, 6])
+
+    def test_finishes_rename_left_halfway(self):
+        """Sem a tabela principal mas com a copia pronta, a migracao so conclui a troca de nomes."""
+        self.create_legacy_rows()
+        migrate_prediction_log(self.db_url)
+        with self.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE predictions RENAME TO predictions_compact_tmp"))
+        self.assertEqual(migrate_prediction_log(self.db_url)["status"], "migrated")
+        self.assertFalse(PredictionRepository(self.db_url).legacy_schema)
+        self.assertEqual(migrate_prediction_log(self.db_url)["status"], "up_to_date")
+
+
+if __name__ == "__main__":
+    unittest.main()
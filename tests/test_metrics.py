@@ -0,0 +1,40 @@
+import unittest
+
+from model.metrics import Counter, GaugeCallback, Histogram, MetricsRegistry
+
+
+class TestMetricsFormat(unittest.TestCase):
+    def test_counter_renders_labels(self):
+        """Contador acumula por combinacao de rotulos."""
+        c = Counter("reqs_total", "Requisicoes.", ("endpoint",))
+        c.inc(endpoint="/predict")
+        c.inc(2, endpoint="/predict")
+        c.inc(endpoint="/train")
+        self.assertEqual(c.value(endpoint="/predict"), 3)
+        self.assertIn('reqs_total{endpoint="/predict"} 3', c.collect())
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Baldes acumulam contagens e o +Inf coincide com _count."""
+        h = Histogram("lat_seconds", "Latencia.", ("stage",), buckets=(0.01, 0.1))
+        for v in (0.005, 0.05, 0.5):
+            h.observe(v, stage="x")
+        lines = h.collect()
+        self.assertIn('lat_seconds_bucket{stage="x",le="0.01"} 1', lines)
+        self.assertIn('lat_seconds_bucket{stage="x",le="0.1"} 2', lines)
+        self.assertIn('lat_seconds_bucket{stage="x",le="+Inf"} 3', lines)
+        self.assertIn('lat_seconds_count{stage="x"} 3', lines)
+        self.assertEqual(h.count(stage="x"), 3)
+
+    def test_registry_skips_failing_collector(self):
+        """Um gauge com erro nao impede a exposicao das demais metricas."""
+        reg = MetricsRegistry()
+        reg.register(GaugeCallback("broken", "Falha.", lambda: 1 / 0))
+        reg.register(GaugeCallback("ok_value", "Ok.", lambda: [({"k": "v"}, 2)]))
+        text = reg.render()
+        self.assertNotIn("broken", text)
+        self.assertIn("# TYPE ok_value gauge", text)
+        self.assertIn('ok_value{k="v"} 2', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
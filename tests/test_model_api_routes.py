@@ -0,0 +1,308 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from model.model_api import create_app
+from model.prediction_service import SQLALCHEMY_AVAILABLE, HepatitisPredictor, Paths, PredictionRepository
+from tests.test_prediction_service import make_dataset
+
+
+class ApiTestCase(unittest.TestCase):
+    """Sobe o app com um preditor treinado em diretorio temporario."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = Path(tempfile.mkdtemp())
+        paths = Paths(data_csv=make_dataset(cls.tmpdir), model_pkl=cls.tmpdir / "knn_model.pkl")
+        cls.predictor = HepatitisPredictor(paths, random_state=0, n_neighbors=3)
+        cls.predictor.train(test_size=0.3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        self.repo = PredictionRepository(None)
+        app = create_app(predictor=self.predictor, repo=self.repo)
+        app.testing = True
+        self.client = app.test_client()
+
+
+class TestBatchEndpoint(ApiTestCase):
+    def test_batch_returns_results_in_order_with_row_errors(self):
+        """Lote mistura registros validos e invalidos e preserva a ordem."""
+        records = [
+            {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60},
+            {"Extra": 1},
+            {"Age": 61, "Sex": "f", "ALB": 25, "AST": 77},
+        ]
+        with mock.patch.object(self.repo, "log_many") as log_many:
+            response = self.client.post("/predict/batch", json={"records": records})
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(data["errors"], 1)
+        self.assertIn("error", data["results"][1])
+        for pos in (0, 2):
+            single = self.client.post("/predict", json=records[pos]).get_json()
+            self.assertEqual(data["results"][pos], single)
+        log_many.assert_called_once()
+        self.assertEqual([payload for payload, _ in log_many.call_args.args[0]], [records[0], records[2]])
+
+    def test_batch_non_finite_value_is_row_error(self):
+        """Valor infinito em um registro nao derruba o lote inteiro."""
+        records = [{"Age": 45, "ALB": 31}, {"Age": "inf", "ALB": 31}, {"Age": 50, "ALB": 1e999}]
+        with mock.patch.object(self.repo, "log_many"):
+            response = self.client.post("/predict/batch", json={"records": records})
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["errors"], 2)
+        self.assertIn("label", data["results"][0])
+        self.assertIn("error", data["results"][1])
+        self.assertIn("error", data["results"][2])
+
+    def test_batch_accepts_plain_list(self):
+        """Uma lista JSON simples tambem e aceita como lote."""
+        response = self.client.post("/predict/batch", json=[{"Age": 30, "ALB": 40}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["count"], 1)
+
+    def test_cache_stats_route(self):
+        """/cache/stats expoe os contadores do cache (desligado por padrao)."""
+        self.assertEqual(self.client.get("/cache/stats").get_json(), {"enabled": False})
+
+    def test_batch_rejects_empty_or_invalid_body(self):
+        """Corpo sem lista de registros retorna 400."""
+        self.assertEqual(self.client.post("/predict/batch", json={"records": []}).status_code, 400)
+        self.assertEqual(self.client.post("/predict/batch", data="x", content_type="text/plain").status_code, 400)
+
+
+class TestTrainJobs(ApiTestCase):
+    def test_train_returns_job_id_and_status_route_reports_result(self):
+        """POST /train agenda o job; GET /train/<id> mostra o resultado ao terminar."""
+        response = self.client.post("/train")
+        data = response.get_json()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(data["status_url"], f"/train/{data['job_id']}")
+
+        deadline = time.monotonic() + 30
+        status = {}
+        while time.monotonic() < deadline:
+            status = self.client.get(data["status_url"]).get_json()
+            if status["status"] in ("done", "failed"):
+                break
+            time.sleep(0.05)
+        self.assertEqual(status["status"], "done")
+        self.assertIn("accuracy", status["result"])
+
+    def test_train_wait_returns_metrics_and_calls_hook(self):
+        """Com ?wait=1 a resposta traz as metricas, e o hook de atualizacao e chamado."""
+        hook = mock.Mock()
+        app = create_app(predictor=self.predictor, repo=self.repo, on_model_updated=hook)
+        response = app.test_client().post("/train?wait=1")
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data["ok"])
+        self.assertIn("accuracy", data)
+        hook.assert_called_once()
+
+    def test_failed_job_is_reported(self):
+        """Falha no treino aparece no status do job, sem derrubar o app."""
+        with mock.patch.object(self.predictor, "train", side_effect=RuntimeError("sem dados")):
+            response = self.client.post("/train?wait=1")
+        self.assertEqual(response.status_code, 500)
+        job = self.client.get(f"/train/{response.get_json()['job_id']}").get_json()
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("sem dados", job["error"])
+
+    def test_job_status_is_shared_through_jobs_dir(self):
+        """Com jobs_dir, outro app (outro worker) ve o status, ja "done" quando o hook roda."""
+        jobs_dir = self.tmpdir / "knn_model.jobs"
+        seen = []
+        other = create_app(predictor=self.predictor, repo=self.repo, jobs_dir=jobs_dir).test_client()
+        hook = lambda: seen.extend(other.get(f"/train/{p.stem}").get_json()["status"] for p in jobs_dir.glob("*.json"))
+        worker = create_app(predictor=self.predictor, repo=self.repo, on_model_updated=hook, jobs_dir=jobs_dir)
+        job_id = worker.test_client().post("/train?wait=1").get_json()["job_id"]
+
+        self.assertEqual(seen, ["done"])
+        status = other.get(f"/train/{job_id}").get_json()
+        self.assertEqual(status["status"], "done")
+        self.assertIn("accuracy", status["result"])
+        self.assertEqual(other.get("/train/../../etc").status_code, 404)
+        self.assertEqual(other.get("/train/" + "0" * 32).status_code, 404)
+
+    def test_invalid_wait_timeout_returns_400(self):
+        """timeout nao numerico (ou negativo/infinito) em ?wait=1 responde 400 sem agendar treino."""
+        with mock.patch.object(self.predictor, "train") as train:
+            for value in ("abc", "-1", "inf", "nan"):
+                response = self.client.post(f"/train?wait=1&timeout={value}")
+                self.assertEqual(response.status_code, 400, value)
+                self.assertIn("timeout", response.get_json()["error"])
+        train.assert_not_called()
+
+    def test_unknown_job_returns_404(self):
+        self.assertEqual(self.client.get("/train/nao-existe").status_code, 404)
+
+
+class TestSamplesEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+        self.predictor = HepatitisPredictor(paths, random_state=0, n_neighbors=3)
+        self.predictor.train(test_size=0.3)
+        self.hook = mock.Mock()
+        app = create_app(predictor=self.predictor, repo=PredictionRepository(None), on_model_updated=self.hook)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        if self.predictor._index_thread is not None:
+            self.predictor._index_thread.join(10)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_samples_are_appended_and_drift_schedules_train(self):
+        """/samples acrescenta os casos, avisa os workers e agenda /train se houver deriva."""
+        self.predictor.refit_drift_threshold = None
+        record = {"Age": 58, "Sex": "m", "ALB": 27, "ALT": 77, "Category": "Die"}
+        response = self.client.post("/samples", json={"records": [record]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual((body["added"], body["total_samples"], body["refit_needed"]), (1, 9, False))
+        self.assertNotIn("job_id", body)
+        self.hook.assert_called_once()
+
+        self.predictor.refit_drift_threshold = 0.0
+        body = self.client.post("/samples", json=[dict(record, ALT=300)]).get_json()
+        self.assertTrue(body["refit_needed"])
+        deadline = time.monotonic() + 10
+        while self.client.get(body["status_url"]).get_json()["status"] in ("queued", "running"):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(self.client.get(body["status_url"]).get_json()["status"], "done")
+        self.assertIsNone(self.predictor._ensure_loaded().appended)
+
+    def test_invalid_samples_are_rejected(self):
+        self.assertEqual(self.client.post("/samples", json={"records": []}).status_code, 400)
+        response = self.client.post("/samples", json=[{"Age": 50, "Category": "Outra"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Outra", response.get_json()["error"])
+        self.hook.assert_not_called()
+
+    def test_unexpected_samples_error_returns_json(self):
+        """Falha inesperada em /samples responde JSON 500, com traceback so em DEBUG=1."""
+        records = [{"Age": 50, "ALB": 30, "Category": "Live"}]
+        with mock.patch.object(self.predictor, "add_samples", side_effect=OSError("disco cheio")):
+            response = self.client.post("/samples", json=records)
+            self.assertEqual((response.status_code, response.get_json()), (500, {"error": "disco cheio"}))
+            with mock.patch.dict(os.environ, {"DEBUG": "1"}):
+                self.assertIn("traceback", self.client.post("/samples", json=records).get_json())
+
+
+class TestMetricsEndpoint(ApiTestCase):
+    def test_metrics_counts_requests_errors_and_stages(self):
+        """/metrics expoe contagem por rota/status, erros e latencia por etapa."""
+        self.client.post("/predict", json={"Age": 45, "Sex": "m", "ALB": 31})
+        self.client.post("/predict", json={"Extra": 1})
+        self.client.post("/predict/batch", json=[{"Age": 30, "ALB": 40}, {"Age": 50, "AST": 20}])
+
+        response = self.client.get("/metrics")
+        text = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        self.assertIn('hep_requests_total{endpoint="/predict",method="POST",status="200"} 1', text)
+        self.assertIn('hep_requests_total{endpoint="/predict",method="POST",status="400"} 1', text)
+        self.assertIn('hep_request_errors_total{endpoint="/predict"} 1', text)
+        for stage in ("normalize", "preprocess", "neighbor_search", "decode"):
+            # Uma observacao do /predict e uma do lote
+            self.assertIn(f'hep_stage_duration_seconds_count{{stage="{stage}"}} 2', text)
+        # repo_log e medido por gravacao: uma no /predict e uma para o lote inteiro
+        self.assertIn('hep_stage_duration_seconds_count{stage="repo_log"} 2', text)
+        self.assertIn('hep_request_duration_seconds_bucket{endpoint="/predict/batch",le="+Inf"} 1', text)
+
+    def test_route_templates_are_used_as_labels(self):
+        """Ids dinamicos nao viram rotulos distintos."""
+        self.client.get("/train/abc")
+        self.client.get("/train/def")
+        text = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn('hep_requests_total{endpoint="/train/<job_id>",method="GET",status="404"} 2', text)
+
+
+class TestDbHealthEndpoint(ApiTestCase):
+    def test_without_database_reports_disabled(self):
+        response = self.client.get("/health/db")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["status"], "disabled")
+
+    @unittest.skipUnless(SQLALCHEMY_AVAILABLE, "SQLAlchemy nao esta instalado")
+    def test_reports_pool_and_insert_latency(self):
+        """/health/db mostra o pool e os percentis dos INSERTs das predicoes logadas."""
+        db = self.tmpdir / "health.db"
+        repo = PredictionRepository(f"sqlite:///{db}", pool_size=2, max_overflow=0)
+        client = create_app(predictor=self.predictor, repo=repo).test_client()
+        for age in (30, 40, 50):
+            client.post("/predict", json={"Age": age, "Sex": "m", "ALB": 31})
+
+        response = client.get("/health/db")
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["insert_latency_ms"]["count"], 3)
+        self.assertEqual((data["pool"]["size"], data["pool"]["checked_out"]), (2, 0))
+        self.assertIn("ping_ms", data)
+
+        # Banco inacessivel: 503 com o erro
+        db.unlink()
+        db.mkdir()
+        repo.engine.dispose()
+        self.assertEqual(client.get("/health/db").status_code, 503)
+        self.assertNotIn("ping_ms", client.get("/health/db?ping=0").get_json())
+
+
+class TestReadiness(ApiTestCase):
+    def test_ready_without_warmup_reports_ready(self):
+        """Sem aquecimento (padrao) o /ready responde pronto imediatamente."""
+        response = self.client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["ready"])
+
+    def test_ready_is_503_until_warmup_finishes(self):
+        """Com aquecimento, /ready so fica 200 depois que o modelo foi carregado e exercitado."""
+        gate = threading.Event()
+        original = self.predictor.warm_up
+
+        def slow_warm_up():
+            gate.wait(5)
+            return original()
+
+        with mock.patch.object(self.predictor, "warm_up", side_effect=slow_warm_up):
+            client = create_app(predictor=self.predictor, repo=self.repo, warmup=True).test_client()
+            self.assertEqual(client.get("/ready").status_code, 503)
+            gate.set()
+            deadline = time.monotonic() + 10
+            while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.02)
+
+        data = client.get("/ready").get_json()
+        self.assertTrue(data["ready"])
+        self.assertIn("warmup_seconds", data)
+
+    def test_failed_warmup_is_reported(self):
+        with mock.patch.object(self.predictor, "warm_up", side_effect=FileNotFoundError("sem modelo")):
+            app = create_app(predictor=self.predictor, repo=self.repo, warmup=True)
+            client = app.test_client()
+            deadline = time.monotonic() + 5
+            while client.get("/ready").get_json()["status"] == "warming" and time.monotonic() < deadline:
+                time.sleep(0.02)
+        data = client.get("/ready").get_json()
+        self.assertEqual(data["status"], "failed")
+        self.assertIn("sem modelo", data["error"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
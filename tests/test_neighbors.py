@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+
+from model.neighbors import ApproximateKNeighborsClassifier
+
+
+def make_blobs(n=2000, d=13, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 4, size=(4, d))
+    y = rng.integers(0, 4, size=n)
+    X = centers[y] + rng.normal(size=(n, d))
+    return X, y
+
+
+class TestApproximateKNeighborsClassifier(unittest.TestCase):
+    def setUp(self):
+        self.X, self.y = make_blobs()
+        self.queries = self.X[:200] + 0.01
+
+    def test_full_probe_matches_exact_knn(self):
+        """Visitando todos os grupos o resultado deve ser o mesmo da forca bruta."""
+        approx = ApproximateKNeighborsClassifier(n_neighbors=5, n_lists=16, n_probe=16, random_state=0)
+        approx.fit(self.X, self.y)
+        exact = KNeighborsClassifier(n_neighbors=5, algorithm="brute").fit(self.X, self.y)
+
+        dist_a, ind_a = approx.kneighbors(self.queries)
+        dist_e, ind_e = exact.kneighbors(self.queries)
+        np.testing.assert_allclose(dist_a, dist_e)
+        np.testing.assert_array_equal(np.sort(ind_a, axis=1), np.sort(ind_e, axis=1))
+        np.testing.assert_allclose(approx.predict_proba(self.queries), exact.predict_proba(self.queries))
+
+    def test_recall_grows_with_n_probe(self):
+        """Mais grupos visitados nunca reduz o recall dos vizinhos."""
+        exact = KNeighborsClassifier(n_neighbors=10, algorithm="brute").fit(self.X, self.y)
+        truth = exact.kneighbors(self.queries, return_distance=False)
+        approx = ApproximateKNeighborsClassifier(n_neighbors=10, n_lists=32, random_state=0).fit(self.X, self.y)
+
+        recalls = []
+        for n_probe in (1, 4, 32):
+            approx.set_params(n_probe=n_probe)
+            found = approx.kneighbors(self.queries, return_distance=False)
+            recalls.append(np.mean([len(set(a) & set(b)) / 10 for a, b in zip(found, truth)]))
+        self.assertEqual(recalls, sorted(recalls))
+        self.assertEqual(recalls[-1], 1.0)
+
+    def test_returns_k_neighbors_even_with_tiny_lists(self):
+        """Se os grupos visitados tem menos de k pontos, a busca amplia a sondagem."""
+        approx = ApproximateKNeighborsClassifier(n_neighbors=7, n_lists=200, n_probe=1, random_state=0)
+        approx.fit(self.X[:300], self.y[:300])
+        self.assertEqual(approx.kneighbors(self.queries[:5], return_distance=False).shape, (5, 7))
+
+    def test_distance_weights_give_exact_match_full_weight(self):
+        """Com weights='distance', um ponto identico ao treino decide a classe sozinho."""
+        approx = ApproximateKNeighborsClassifier(n_neighbors=5, weights="distance", n_lists=8, n_probe=8)
+        approx.fit(self.X, self.y)
+        proba = approx.predict_proba(self.X[:20])
+        np.testing.assert_array_equal(approx.classes_[np.argmax(proba, axis=1)], self.y[:20])
+        np.testing.assert_array_equal(proba.max(axis=1), np.ones(20))
+
+    def test_append_matches_fit_on_concatenated_data_with_full_probe(self):
+        """append coloca os novos pontos nas listas e equivale ao treino com todos os dados."""
+        approx = ApproximateKNeighborsClassifier(n_neighbors=5, n_lists=16, n_probe=16, random_state=0)
+        approx.fit(self.X[:1500], self.y[:1500])
+        appended = approx.append(self.X[1500:], self.y[1500:])
+        exact = KNeighborsClassifier(n_neighbors=5, algorithm="brute").fit(self.X, self.y)
+
+        dist_a, ind_a = appended.kneighbors(self.queries)
+        dist_e, ind_e = exact.kneighbors(self.queries)
+        np.testing.assert_allclose(dist_a, dist_e)
+        np.testing.assert_array_equal(np.sort(ind_a, axis=1), np.sort(ind_e, axis=1))
+        # O original nao muda e os centroides sao reaproveitados
+        self.assertEqual(approx.n_samples_fit_, 1500)
+        self.assertIs(appended.centroids_, approx.centroids_)
+        with self.assertRaises(ValueError):
+            approx.append(self.X[:2], np.array([0, 9]))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+import math
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model.normalization import ColumnarNormalizer
+from model.prediction_service import HepatitisPredictor, Paths
+
+SEX_VALUES = [
+    None, "", "m", " Male ", "F", "mulher", "HOMEM", "x", " ", 1, 0, 2, 1.7, -0.2, True, False,
+    float("nan"), float("inf"), 10 ** 400, np.float64(1.0), np.int64(1), Decimal("1"), [1], "1",
+]
+NUMERIC_VALUES = [
+    None, "", "3.5", " 4 ", "1_000", "1e3", "abc", "inf", "NaN", 5, -2, 5.5, True, False,
+    float("nan"), float("inf"), 10 ** 400, np.float64(2.5), np.int64(7), Decimal("1.5"), [1], {"a": 1},
+]
+
+
+def same(a, b):
+    # Igualdade de valores normalizados com NaN == NaN
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    return type(a) is type(b) and a == b
+
+
+class TestColumnarNormalizer(unittest.TestCase):
+    def setUp(self):
+        self.predictor = HepatitisPredictor(Paths(data_csv=Path("dados.csv"), model_pkl=Path("modelo.pkl")))
+        self.normalizer = ColumnarNormalizer(self.predictor.numeric_cols, self.predictor.expected_cols)
+
+    def random_payloads(self, rng, n):
+        payloads = []
+        for _ in range(n):
+            roll = rng.random()
+            if roll < 0.03:
+                payloads.append(["texto", 3, None, [1, 2]][rng.integers(4)])
+                continue
+            payload = {}
+            for col in self.predictor.expected_cols + ["Extra"]:
+                if rng.random() < 0.2:
+                    continue
+                key = f" {col} " if rng.random() < 0.1 else col
+                values = SEX_VALUES if col == "Sex" else NUMERIC_VALUES
+                payload[key] = values[rng.integers(len(values))]
+            if roll > 0.98:
+                payload[7] = "chave nao textual"
+            payloads.append(payload)
+        return payloads
+
+    def reference(self, payloads):
+        rows, errors = {}, {}
+        for i, payload in enumerate(payloads):
+            try:
+                rows[i] = self.predictor._payload_to_row(payload)
+            except Exception as e:
+                errors[i] = str(e)
+        return rows, errors
+
+    def assert_equivalent(self, payloads, batch):
+        rows, errors = self.reference(payloads)
+        self.assertEqual(batch.errors, errors)
+        self.assertEqual(batch.positions.tolist(), sorted(rows))
+        self.assertEqual(list(batch.frame.columns), self.predictor.expected_cols)
+        for pos, got in zip(batch.positions, batch.frame.to_dict("records")):
+            expected = rows[pos]
+            for col in self.predictor.expected_cols:
+                self.assertTrue(same(got[col], expected[col]), (pos, col, got[col], expected[col]))
+
+    def test_matches_single_record_semantics_on_random_payloads(self):
+        """Lotes aleatorios: mesmas linhas e mesmos erros que _payload_to_row registro a registro."""
+        rng = np.random.default_rng(7)
+        for n in (1, 5, 50, 500):
+            payloads = self.random_payloads(rng, n)
+            with self.subTest(n=n):
+                self.assert_equivalent(payloads, self.normalizer.normalize(payloads))
+
+    def test_dataframe_input_matches_its_records(self):
+        """DataFrame equivale a lista de dicts das suas linhas, inclusive com colunas tipadas."""
+        frame = pd.DataFrame({
+            " Age": [30, 41, 52, 63],
+            "Sex": [1, 0, 1, 0],
+            "ALB": [31.5, np.nan, 28.0, 40.1],
+            "ALT": ["12", "", None, "abc"],
+            "GGT": [True, False, True, True],
+            "Extra": ["a", "b", "c", "d"],
+        })
+        self.assert_equivalent(frame.to_dict("records"), self.normalizer.normalize(frame))
+        with_nan_sex = frame.assign(Sex=[1.0, np.nan, "f", None])
+        self.assert_equivalent(with_nan_sex.to_dict("records"), self.normalizer.normalize(with_nan_sex))
+
+    def test_empty_batch(self):
+        batch = self.normalizer.normalize([])
+        self.assertEqual((len(batch.frame), batch.errors), (0, {}))
+        self.assertEqual(list(batch.frame.columns), self.predictor.expected_cols)
+
+
+if __name__ == "__main__":
+    unittest.main()
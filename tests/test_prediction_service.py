@@ -1,16 +1,26 @@
+import os
 import shutil
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from unittest import mock
 
+import numpy as np
 import pandas as pd
 
+from sklearn.compose import ColumnTransformer
+from sklearn.neighbors import KNeighborsClassifier
+
 from model.prediction_service import (
     HepatitisPredictor,
     Paths,
     PredictionRepository,
     SQLALCHEMY_AVAILABLE,
+    get_repository_options_from_env,
+    legacy_prediction_log_table,
+    payload_hash,
 )
 
 
@@ -68,6 +78,551 @@ class TestHepatitisPredictor(unittest.TestCase):
         self.assertIn("label", result)
         self.assertTrue(self.predictor.paths.model_pkl.exists())
 
+    def test_warm_up_loads_model_and_reports_timings(self):
+        """warm_up treina/carrega o modelo antes da primeira requisicao real."""
+        timings = self.predictor.warm_up(rounds=1)
+
+        self.assertIsNotNone(self.predictor.pipeline)
+        self.assertTrue(self.predictor.paths.model_pkl.exists())
+        self.assertGreaterEqual(timings["load_seconds"], 0.0)
+        self.assertGreaterEqual(timings["warmup_seconds"], 0.0)
+
+    def test_warm_up_skips_cache_and_stage_metrics(self):
+        """Predicoes sinteticas do warm_up nao contam no cache nem nas metricas por etapa."""
+        predictor = HepatitisPredictor(self.predictor.paths, n_neighbors=3, cache_size=16)
+        stages = []
+        predictor.stage_observer = lambda stage, seconds: stages.append(stage)
+        predictor.warm_up(rounds=2)
+
+        self.assertEqual(stages, [])
+        stats = predictor.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (0, 0, 0))
+        predictor.predict({"Age": 45, "Sex": "m", "ALB": 31})
+        self.assertIn("normalize", stages)
+        self.assertEqual(predictor.cache_stats()["misses"], 1)
+
+    def test_neighbor_backend_is_persisted_with_model(self):
+        """O backend de vizinhos treinado e restaurado ao carregar o artefato."""
+        paths = self.predictor.paths
+        trained = HepatitisPredictor(paths, n_neighbors=3, neighbor_algorithm="approximate", approx_n_probe=2)
+        trained.train(test_size=0.3)
+
+        loaded = HepatitisPredictor(paths)
+        loaded._ensure_loaded()
+
+        self.assertEqual(loaded.neighbor_algorithm, "approximate")
+        self.assertEqual(loaded.approx_n_probe, 2)
+        self.assertEqual(loaded.n_neighbors, 3)
+        payload = {"Age": 45, "Sex": "m", "ALB": 31}
+        self.assertEqual(loaded.predict(payload), trained.predict(payload))
+
+    def test_invalid_neighbor_algorithm_rejected(self):
+        with self.assertRaises(ValueError):
+            HepatitisPredictor(self.predictor.paths, neighbor_algorithm="lsh")
+
+    def test_train_swaps_model_state_atomically(self):
+        """Re-treino publica um novo estado sem alterar o que leitores ja seguram."""
+        before = self.predictor._ensure_loaded()
+        pipeline, encoder = before.pipeline, before.label_encoder
+
+        self.predictor.train(test_size=0.3)
+
+        self.assertIsNot(self.predictor._state, before)
+        self.assertIs(before.pipeline, pipeline)
+        self.assertIs(before.label_encoder, encoder)
+
+    def test_predictions_keep_working_during_retrain(self):
+        """Predicoes concorrentes com re-treinos nunca falham."""
+        self.predictor.train(test_size=0.3)
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    self.predictor.predict({"Age": 45, "Sex": "m", "ALB": 31})
+                except Exception as e:  # pragma: no cover - so em caso de falha
+                    errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for _ in range(3):
+            self.predictor.train(test_size=0.3)
+        stop.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_predict_many_matches_single_predictions(self):
+        """Lote deve produzir o mesmo resultado que chamadas individuais, na mesma ordem."""
+        self.predictor.train(test_size=0.3)
+        payloads = [
+            {"Age": 45, "Sex": "male", "ALB": 31, "ALT": 60},
+            {"Age": 61, "Sex": "f", "ALB": 25, "ALP": 112, "ALT": 81, "AST": 77},
+            {"Age": "30", "Sex": 0, "ALB": "33.5"},
+        ]
+        batch = self.predictor.predict_many(payloads)
+        self.assertEqual(batch, [self.predictor.predict(p) for p in payloads])
+
+    def test_predict_without_predict_proba_omits_confidence(self):
+        """Estimadores sem predict_proba ainda predizem, apenas sem confianca."""
+        from sklearn.svm import SVC
+
+        self.predictor.train(test_size=0.3)
+        df = self.predictor._load_dataset()
+        self.predictor.pipeline.steps[-1] = ("model", SVC(probability=False))
+        self.predictor.pipeline.fit(
+            df.drop(columns=["Category"]), self.predictor.label_encoder.transform(df["Category"])
+        )
+        result = self.predictor.predict({"Age": 45, "Sex": "m", "ALB": 31})
+
+        self.assertIn("label", result)
+        self.assertNotIn("confidence", result)
+
+    def test_predict_many_reports_row_errors(self):
+        """Registros invalidos recebem erro proprio sem afetar os demais."""
+        self.predictor.train(test_size=0.3)
+        results = self.predictor.predict_many([{"Age": 40, "ALB": 30}, "nao-eh-dict"])
+
+        self.assertIn("label", results[0])
+        self.assertIn("error", results[1])
+
+    def test_predict_many_non_finite_values_are_row_errors(self):
+        """inf (texto, float ou numero enorme) vira erro do registro nos dois caminhos de normalizacao."""
+        self.predictor.train(test_size=0.3)
+        bad = [{"Age": "inf", "ALB": 30}, {"Age": 40, "ALB": float("inf")}, {"Age": 40, "ALT": "1" * 400}]
+        for size in (4, 100):
+            payloads = [{"Age": 40, "ALB": 30}] * (size - len(bad)) + bad
+            with self.subTest(size=size):
+                results = self.predictor.predict_many(payloads)
+                self.assertTrue(all("label" in r for r in results[:-3]))
+                self.assertEqual([r.get("error") for r in results[-3:]], [
+                    "Valor não finito em 'Age'.", "Valor não finito em 'ALB'.", "Valor não finito em 'ALT'.",
+                ])
+
+
+class TestFastInference(unittest.TestCase):
+    """O modo 'fast' deve reproduzir bit a bit o pre-processamento do sklearn."""
+
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+        HepatitisPredictor(paths, random_state=0, n_neighbors=3).train(test_size=0.3)
+        self.slow = HepatitisPredictor(paths, n_neighbors=3)
+        self.fast = HepatitisPredictor(paths, n_neighbors=3, inference="fast")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def random_payloads(self, n):
+        rng = np.random.default_rng(42)
+        sexes = ["m", "F", "male", "mulher", 1, 0, None, "x", ""]
+        payloads = []
+        for _ in range(n):
+            payload = {}
+            for col in self.slow.numeric_cols:
+                roll = rng.random()
+                if roll < 0.15:
+                    continue
+                if roll < 0.25:
+                    payload[col] = rng.choice(["", "oops", None])
+                else:
+                    payload[col] = float(rng.normal(50, 30))
+            payload["Sex"] = sexes[rng.integers(len(sexes))]
+            payloads.append(payload)
+        return payloads
+
+    def test_transform_is_bit_identical_to_pipeline(self):
+        """Matriz transformada identica ao ColumnTransformer para entradas variadas."""
+        payloads = self.random_payloads(300)
+        self.slow.predict(payloads[0])
+        rows = [self.slow._payload_to_row(p) for p in payloads]
+
+        expected = self.slow.pipeline.named_steps["preprocess"].transform(
+            pd.DataFrame(rows, columns=self.slow.expected_cols)
+        )
+        compiled = self.fast._ensure_loaded().compiled
+
+        self.assertIsNotNone(compiled)
+        np.testing.assert_array_equal(compiled.transform(rows), expected)
+
+    def test_predictions_match_pipeline_path(self):
+        """Predicoes individuais e em lote coincidem entre os dois modos."""
+        payloads = self.random_payloads(50)
+        self.assertEqual([self.fast.predict(p) for p in payloads], [self.slow.predict(p) for p in payloads])
+        self.assertEqual(self.fast.predict_many(payloads), self.slow.predict_many(payloads))
+
+    def test_columnar_batch_matches_single_predictions(self):
+        """Lotes grandes (normalizacao colunar) coincidem com predict registro a registro."""
+        payloads = self.random_payloads(200) + ["nao-eh-dict", {"Age": [1]}]
+        for predictor in (self.fast, self.slow):
+            expected = []
+            for p in payloads:
+                try:
+                    expected.append(predictor.predict(p))
+                except Exception as e:
+                    expected.append({"error": str(e)})
+            self.assertEqual(predictor.predict_many(payloads), expected)
+
+    def test_invalid_inference_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            HepatitisPredictor(self.slow.paths, inference="turbo")
+
+
+class TestArtifactFormat(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.data_csv = make_dataset(self.tmpdir)
+        self.payloads = [
+            {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60},
+            {"Age": 61, "Sex": "f", "ALB": 25, "AST": 77},
+            {"Age": 30, "ALB": 34, "CHOL": 180},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def paths(self, name):
+        return Paths(data_csv=self.data_csv, model_pkl=self.tmpdir / name)
+
+    def test_float32_artifact_keeps_predictions_and_mmaps(self):
+        """Artefato float32 passa na paridade, e mapeado do disco e prediz igual ao float64."""
+        reference = HepatitisPredictor(self.paths("f64.pkl"), random_state=0, n_neighbors=3)
+        reference.train(test_size=0.3)
+        compact = HepatitisPredictor(
+            self.paths("f32.pkl"), random_state=0, n_neighbors=3, artifact_dtype="float32"
+        )
+        result = compact.train(test_size=0.3)
+        self.assertEqual(result["artifact_dtype"], "float32")
+        self.assertEqual(result["float32_accuracy"], result["accuracy"])
+
+        served = HepatitisPredictor(self.paths("f32.pkl"), mmap_mode="r")
+        served._ensure_loaded()
+        fit_X = served.pipeline.steps[-1][1]._fit_X
+        self.assertEqual(fit_X.dtype, np.float32)
+        self.assertIsInstance(fit_X, np.memmap)
+        self.assertEqual([served.predict(p) for p in self.payloads], [reference.predict(p) for p in self.payloads])
+
+    def test_float32_rejected_when_accuracy_drops(self):
+        """Sem paridade de acuracia o artefato continua em float64."""
+        predictor = HepatitisPredictor(self.paths("m.pkl"), n_neighbors=3, artifact_dtype="float32")
+        with mock.patch("model.prediction_service.FLOAT32_PARITY_TOLERANCE", -1.0):
+            result = predictor.train(test_size=0.3)
+        self.assertEqual(result["artifact_dtype"], "float64")
+        self.assertEqual(predictor.pipeline.steps[-1][1]._fit_X.dtype, np.float64)
+
+    def test_format_version_is_recorded_and_checked(self):
+        """O artefato registra a versao do formato; versoes futuras sao recusadas."""
+        import joblib
+        from model.prediction_service import ARTIFACT_FORMAT_VERSION
+
+        HepatitisPredictor(self.paths("m.pkl"), n_neighbors=3).train(test_size=0.3)
+        saved = joblib.load(self.tmpdir / "m.pkl")
+        self.assertEqual(saved["format_version"], ARTIFACT_FORMAT_VERSION)
+
+        # Formato 1 (sem versao) continua legivel
+        legacy = {k: saved[k] for k in ("pipeline", "label_encoder")}
+        joblib.dump(legacy, self.tmpdir / "legacy.pkl")
+        self.assertIn("label", HepatitisPredictor(self.paths("legacy.pkl")).predict(self.payloads[0]))
+
+        joblib.dump({**saved, "format_version": ARTIFACT_FORMAT_VERSION + 1}, self.tmpdir / "future.pkl")
+        with self.assertRaises(ValueError):
+            HepatitisPredictor(self.paths("future.pkl")).predict(self.payloads[0])
+
+    def test_compressed_export_is_smaller_and_loadable(self):
+        """export_artifact com compressao gera arquivo menor com as mesmas predicoes."""
+        predictor = HepatitisPredictor(self.paths("m.pkl"), n_neighbors=3)
+        predictor.train(test_size=0.3)
+        shipped = predictor.export_artifact(self.tmpdir / "shipped.pkl", compress=3)
+        self.assertLess(shipped.stat().st_size, predictor.paths.model_pkl.stat().st_size)
+        loaded = HepatitisPredictor(self.paths("shipped.pkl"))
+        self.assertEqual([loaded.predict(p) for p in self.payloads], [predictor.predict(p) for p in self.payloads])
+
+    def test_invalid_artifact_dtype_rejected(self):
+        with self.assertRaises(ValueError):
+            HepatitisPredictor(self.paths("m.pkl"), artifact_dtype="float16")
+
+
+class TestPreprocessCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.data_csv = make_dataset(self.tmpdir)
+        self.cache_dir = self.tmpdir / "preprocess"
+        self.payload = {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def predictor(self, **kwargs):
+        paths = Paths(data_csv=self.data_csv, model_pkl=self.tmpdir / "knn_model.pkl")
+        return HepatitisPredictor(paths, random_state=0, preprocess_cache=self.cache_dir, **kwargs)
+
+    def count_preprocess_fits(self, predictor):
+        original = ColumnTransformer.fit_transform
+        with mock.patch.object(ColumnTransformer, "fit_transform", autospec=True, side_effect=original) as fit:
+            predictor.train(test_size=0.3)
+        return fit.call_count
+
+    def test_knn_only_change_reuses_fitted_preprocess(self):
+        """Mudar so o KNN reaproveita o pre-processamento; mudar a imputacao reajusta."""
+        self.assertEqual(self.count_preprocess_fits(self.predictor(n_neighbors=3)), 1)
+        self.assertEqual(self.count_preprocess_fits(self.predictor(n_neighbors=5, weights="distance")), 0)
+        self.assertEqual(self.count_preprocess_fits(self.predictor(imputer_strategy="median")), 1)
+
+    def test_cached_training_matches_uncached(self):
+        """Modelo treinado via cache prediz igual, tambem depois de recarregado."""
+        self.predictor(n_neighbors=3).train(test_size=0.3)
+        cached = self.predictor(n_neighbors=3)
+        cached.train(test_size=0.3)
+        reloaded = HepatitisPredictor(cached.paths)
+        plain = HepatitisPredictor(Paths(self.data_csv, self.tmpdir / "plain.pkl"), random_state=0, n_neighbors=3)
+        plain.train(test_size=0.3)
+        self.assertEqual(cached.predict(self.payload), plain.predict(self.payload))
+        self.assertEqual(reloaded.predict(self.payload), plain.predict(self.payload))
+
+    def test_changed_dataset_misses_cache(self):
+        """CSV alterado gera nova chave e o pre-processamento e reajustado."""
+        self.predictor().train(test_size=0.3)
+        df = pd.read_csv(self.data_csv)
+        df.loc[0, "ALB"] = 99
+        df.to_csv(self.data_csv, index=False)
+        self.assertEqual(self.count_preprocess_fits(self.predictor()), 1)
+
+    def test_size_cap_evicts_entries(self):
+        """Entradas mais antigas saem quando o total passa do limite."""
+        self.predictor().train(test_size=0.3)
+        entry_size = self.predictor().preprocess_cache.size_bytes()
+        predictor = self.predictor(imputer_strategy="median", preprocess_cache_bytes=entry_size + 1)
+        self.assertEqual(self.count_preprocess_fits(predictor), 1)
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+        # A entrada "mean" foi despejada; a "median" (mais recente) continua valendo
+        self.assertEqual(self.count_preprocess_fits(self.predictor()), 1)
+
+
+class TestConcurrentPredict(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+        HepatitisPredictor(self.paths, random_state=0, n_neighbors=3).train(test_size=0.3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_concurrent_predict_during_retrain(self):
+        """Varias threads predizendo enquanto o modelo e retreinado: sem excecoes e respostas validas."""
+        predictor = HepatitisPredictor(self.paths, random_state=0, n_neighbors=3, native_threads=1)
+        payload = {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60}
+        predictor.predict(payload)
+        errors, results = [], []
+        stop = threading.Event()
+
+        def client():
+            try:
+                while not stop.is_set():
+                    results.append(predictor.predict(payload))
+                    results.extend(predictor.predict_many([payload, {"Age": 30}]))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for k in (5, 3, 7):
+            predictor.n_neighbors = k
+            predictor.train(test_size=0.3)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(len(results), 0)
+        for result in results:
+            self.assertIn(result["prediction"], (0, 1))
+            self.assertTrue(0.0 <= result["confidence"] <= 1.0)
+
+    def test_native_threads_limit_applies_per_request_thread(self):
+        """native_threads fixa o OpenMP na thread da requisicao e rejeita valores < 1."""
+        from threadpoolctl import threadpool_info
+
+        predictor = HepatitisPredictor(self.paths, n_neighbors=3, native_threads=2)
+        seen = []
+
+        def request():
+            predictor.predict({"Age": 45})
+            seen.extend(p["num_threads"] for p in threadpool_info() if p["user_api"] == "openmp")
+
+        t = threading.Thread(target=request)
+        t.start()
+        t.join()
+        if not seen:
+            self.skipTest("nenhum runtime OpenMP carregado")
+        self.assertEqual(set(seen), {2})
+        with self.assertRaises(ValueError):
+            HepatitisPredictor(self.paths, native_threads=0)
+
+
+class TestAddSamples(unittest.TestCase):
+    NEW_CASES = [
+        {"Age": 58, "Sex": "m", "ALB": 27, "ALP": 104, "ALT": 77, "AST": 71, "Category": "Die"},
+        {"Age": 35, "Sex": "f", "ALB": 33, "ALP": 90, "ALT": 56, "AST": 55, "Category": "Live"},
+        {"Age": 66, "ALB": 24, "ALT": 85, "Category": "Die"},
+    ]
+    QUERIES = [
+        {"Age": 57, "Sex": "m", "ALB": 27, "ALT": 76},
+        {"Age": 36, "Sex": "f", "ALB": 33, "ALT": 57},
+        {"Age": 65, "ALB": 25, "ALT": 84},
+    ]
+
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+        self.predictors = []
+
+    def tearDown(self):
+        for predictor in self.predictors:
+            if predictor._index_thread is not None:
+                predictor._index_thread.join(10)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def predictor(self, **kwargs):
+        kwargs.setdefault("refit_drift_threshold", None)
+        predictor = HepatitisPredictor(self.paths, random_state=0, n_neighbors=3, **kwargs)
+        predictor.train(test_size=0.3)
+        self.predictors.append(predictor)
+        return predictor
+
+    def test_append_equals_fit_on_extended_matrix(self):
+        """Predicoes apos add_samples iguais a um KNN ajustado na matriz estendida."""
+        predictor = self.predictor(neighbor_algorithm="kd_tree")
+        before = predictor.pipeline
+        rows = pd.DataFrame([predictor._payload_to_row(r) for r in self.NEW_CASES], columns=predictor.expected_cols)
+        labels = predictor.label_encoder.transform([r["Category"] for r in self.NEW_CASES])
+        model = before.named_steps["model"]
+        reference = KNeighborsClassifier(n_neighbors=3).fit(
+            np.vstack([model._fit_X, before.named_steps["preprocess"].transform(rows)]),
+            np.concatenate([model.classes_[model._y], labels]),
+        )
+
+        result = predictor.add_samples(self.NEW_CASES)
+        self.assertEqual((result["added"], result["total_samples"], result["index"]), (3, 11, "rebuilding"))
+        queries = before.named_steps["preprocess"].transform(
+            pd.DataFrame([predictor._payload_to_row(q) for q in self.QUERIES], columns=predictor.expected_cols)
+        )
+        expected = reference.classes_[np.argmax(reference.predict_proba(queries), axis=1)]
+        self.assertEqual([predictor.predict(q)["prediction"] for q in self.QUERIES], expected.tolist())
+
+        # A arvore volta em segundo plano, com o mesmo resultado
+        predictor._index_thread.join(10)
+        self.assertEqual(predictor.pipeline.named_steps["model"]._fit_method, "kd_tree")
+        self.assertEqual([predictor.predict(q)["prediction"] for q in self.QUERIES], expected.tolist())
+
+    def test_samples_persist_and_join_next_train(self):
+        """Casos acrescentados sobrevivem a recarga e entram no proximo train()."""
+        predictor = self.predictor()
+        predictor.add_samples(self.NEW_CASES)
+        self.assertTrue(self.paths.samples_csv.exists())
+
+        reloaded = HepatitisPredictor(self.paths)
+        self.assertEqual(reloaded._ensure_loaded().appended.count, 3)
+        self.assertEqual(reloaded.pipeline.named_steps["model"].n_samples_fit_, 11)
+
+        predictor.train(test_size=0.2)
+        self.assertEqual(predictor.pipeline.named_steps["model"].n_samples_fit_, 12)
+        self.assertIsNone(predictor._ensure_loaded().appended)
+
+    def test_drift_over_threshold_forces_full_refit(self):
+        """Deriva acima do limite: refit_needed e, com refit=True, um train() completo."""
+        predictor = self.predictor(refit_drift_threshold=0.05)
+        shifted = [dict(r, ALT=r["ALT"] * 3) for r in self.NEW_CASES]
+        report = predictor.add_samples(shifted, refit=False)
+        self.assertTrue(report["refit_needed"])
+        self.assertNotIn("retrain", report)
+
+        result = predictor.add_samples(self.NEW_CASES)
+        self.assertIn("accuracy", result["retrain"])
+        self.assertIsNone(predictor._ensure_loaded().appended)
+
+        tolerant = self.predictor(refit_drift_threshold=10.0)
+        self.assertFalse(tolerant.add_samples(self.NEW_CASES)["refit_needed"])
+
+    def test_invalid_records_leave_model_untouched(self):
+        """Categoria desconhecida ou ausente levanta ValueError sem alterar o modelo."""
+        predictor = self.predictor()
+        state = predictor._ensure_loaded()
+        for records in ([dict(self.NEW_CASES[0], Category="Cirrhosis")], [{"Age": 40}], []):
+            with self.assertRaises(ValueError):
+                predictor.add_samples(records)
+        self.assertIs(predictor._ensure_loaded(), state)
+        self.assertFalse(self.paths.samples_csv.exists())
+
+
+class TestPredictionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+        self.predictor = HepatitisPredictor(paths, random_state=0, n_neighbors=3, cache_size=2)
+        self.predictor.train(test_size=0.3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_equivalent_payloads_hit_cache(self):
+        """Payloads que normalizam para o mesmo vetor reutilizam o resultado."""
+        first = self.predictor.predict({"Age": 45, "Sex": "m", "ALB": 31})
+        second = self.predictor.predict({" Age ": "45", "Sex": "MALE", "ALB": 31.0})
+
+        self.assertEqual(first, second)
+        stats = self.predictor.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_lru_eviction_is_counted(self):
+        for age in (30, 40, 50):
+            self.predictor.predict({"Age": age, "ALB": 31})
+        self.predictor.predict({"Age": 30, "ALB": 31})  # expulso pelo LRU
+
+        stats = self.predictor.cache_stats()
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["hits"], 0)
+
+    def test_ttl_expires_entries(self):
+        self.predictor.cache.ttl = 60
+        payload = {"Age": 30, "ALB": 31}
+        self.predictor.predict(payload)
+        with mock.patch("model.prediction_service.time.monotonic", return_value=time.monotonic() + 120):
+            self.predictor.predict(payload)
+        self.assertEqual(self.predictor.cache_stats()["expirations"], 1)
+
+    def test_new_model_invalidates_cache(self):
+        """train() instala novo modelo e descarta os resultados anteriores."""
+        payload = {"Age": 30, "ALB": 31}
+        self.predictor.predict(payload)
+        self.predictor.train(test_size=0.3)
+        self.predictor.predict(payload)
+
+        stats = self.predictor.cache_stats()
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["size"], 1)
+
+    def test_stale_generation_is_not_cached(self):
+        cache = self.predictor.cache
+        generation = cache.generation
+        cache.invalidate()
+        cache.put(("k",), {"label": "old"}, generation)
+        self.assertIsNone(cache.get(("k",)))
+
+    def test_predict_many_uses_cache(self):
+        payloads = [{"Age": 30, "ALB": 31}, {"Age": 30, "ALB": 31}]
+        self.predictor.predict(payloads[0])
+        self.assertEqual(self.predictor.predict_many(payloads), [self.predictor.predict(payloads[0])] * 2)
+        self.assertEqual(self.predictor.cache_stats()["hits"], 3)
+
+    def test_cache_disabled_by_default(self):
+        predictor = HepatitisPredictor(self.predictor.paths)
+        self.assertIsNone(predictor.cache)
+        self.assertEqual(predictor.cache_stats(), {"enabled": False})
+
 
 class TestPredictionRepository(unittest.TestCase):
     def test_repository_disabled_without_url(self):
@@ -84,6 +639,19 @@ class TestPredictionRepository(unittest.TestCase):
             self.assertFalse(repo.enabled)
 
     @unittest.skipUnless(SQLALCHEMY_AVAILABLE, "SQLAlchemy nao esta instalado")
+    def test_repository_options_from_env(self):
+        """DB_POOL_* viram opcoes do repositorio; ausentes ficam no padrao do SQLAlchemy."""
+        env = {"DB_POOL_SIZE": "8", "DB_POOL_RECYCLE": "1800", "DB_POOL_PRE_PING": "30"}
+        with mock.patch.dict(os.environ, env):
+            options = get_repository_options_from_env()
+        self.assertEqual((options["pool_size"], options["pool_recycle"], options["pre_ping"]), (8, 1800, 30.0))
+        self.assertIsNone(options["max_overflow"])
+        with mock.patch.dict(os.environ, {"DB_POOL_PRE_PING": "never"}):
+            self.assertEqual(get_repository_options_from_env()["pre_ping"], "never")
+
+    def test_disabled_repository_health(self):
+        self.assertEqual(PredictionRepository(None).health(), {"status": "disabled", "enabled": False})
+
     def test_repository_init_invokes_db_setup(self):
         """Quando SQLAlchemy existe, _init_db deve ser invocado na construcao."""
         called = {}
@@ -98,6 +666,191 @@ class TestPredictionRepository(unittest.TestCase):
         self.assertTrue(called.get("hit"))
 
 
+@unittest.skipUnless(SQLALCHEMY_AVAILABLE, "SQLAlchemy nao esta instalado")
+class TestPredictionRepositorySQLite(unittest.TestCase):
+    """Usa SQLite em arquivo temporario como substituto local do MySQL."""
+
+    result = {"prediction": 1, "label": "Live", "confidence": 0.9}
+
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.db_url = f"sqlite:///{self.tmpdir / 'predictions.db'}"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def count_rows(self, repo):
+        from sqlalchemy import func, select
+
+        with repo.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(repo.table)).scalar()
+
+    def test_synchronous_log_inserts_immediately(self):
+        """Sem write-behind cada log vira um INSERT imediato."""
+        repo = PredictionRepository(self.db_url)
+        repo.log({"Age": 30}, self.result)
+        self.assertEqual(self.count_rows(repo), 1)
+
+    def test_write_behind_batches_and_flushes(self):
+        """Com write-behind os registros so aparecem apos o flush, em lote."""
+        repo = PredictionRepository(self.db_url, write_behind=True, batch_size=1000, flush_interval=60)
+        try:
+            with mock.patch.object(repo, "_insert", wraps=repo._insert) as insert:
+                for age in range(25):
+                    repo.log({"Age": age}, self.result)
+                self.assertTrue(repo.flush(timeout=5))
+            self.assertEqual(insert.call_count, 1)
+            self.assertEqual(len(insert.call_args.args[0]), 25)
+            self.assertEqual(self.count_rows(repo), 25)
+            self.assertEqual(repo.stats()["written"], 25)
+        finally:
+            repo.close()
+
+    def test_close_during_concurrent_logging_loses_no_rows(self):
+        """Logs concorrentes com close(): toda linha e gravada (fila ou sincrona) ou contada."""
+        repo = PredictionRepository(self.db_url, write_behind=True, batch_size=50, flush_interval=60)
+        started = threading.Barrier(5)
+
+        def writer():
+            started.wait()
+            for age in range(200):
+                repo.log({"Age": age}, self.result)
+
+        threads = [threading.Thread(target=writer) for _ in range(4)]
+        for t in threads:
+            t.start()
+        started.wait()
+        repo.close()
+        for t in threads:
+            t.join()
+        stats = repo.stats()
+        self.assertEqual(stats["written"] + stats["dropped"] + stats["failed"], 800)
+        self.assertEqual(self.count_rows(repo), stats["written"])
+
+    def test_write_behind_flushes_on_size_threshold(self):
+        """Atingir batch_size dispara a escrita sem esperar o intervalo."""
+        repo = PredictionRepository(self.db_url, write_behind=True, batch_size=5, flush_interval=60)
+        try:
+            for age in range(5):
+                repo.log({"Age": age}, self.result)
+            deadline = time.monotonic() + 5
+            while repo.stats()["written"] < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.count_rows(repo), 5)
+        finally:
+            repo.close()
+
+    def test_full_queue_counts_dropped_records(self):
+        """Fila cheia descarta o registro e incrementa o contador."""
+        repo = PredictionRepository(self.db_url, write_behind=True, max_queue=2, flush_interval=60)
+        release = threading.Event()
+        original_insert = repo._insert
+        repo._insert = lambda rows: (release.wait(5), original_insert(rows))
+        try:
+            repo.log({"Age": 1}, self.result)
+            repo.flush(timeout=0)  # writer bloqueia no insert do primeiro registro
+            for age in range(10):
+                repo.log({"Age": age}, self.result)
+            self.assertGreater(repo.dropped, 0)
+        finally:
+            release.set()
+            repo.close()
+
+    def test_close_flushes_pending_rows_and_falls_back_to_sync(self):
+        """close grava o que estava pendente; logs posteriores sao sincronos."""
+        repo = PredictionRepository(self.db_url, write_behind=True, batch_size=1000, flush_interval=60)
+        for age in range(3):
+            repo.log({"Age": age}, self.result)
+        repo.close()
+        self.assertEqual(self.count_rows(repo), 3)
+
+        repo.log({"Age": 99}, self.result)
+        self.assertEqual(self.count_rows(repo), 4)
+
+    def test_rows_store_normalized_features_and_payload_hash(self):
+        """Cada linha guarda o vetor normalizado em colunas tipadas e o hash do payload."""
+        from sqlalchemy import select
+
+        repo = PredictionRepository(self.db_url)
+        payload = {" Age ": "45", "Sex": "Male", "ALB": 31.5, "ALT": "abc", "Obs": "x" * 5000}
+        repo.log(payload, self.result)
+        repo.log({"Age": 30, "Sex": "outro"}, self.result)
+        with repo.engine.connect() as conn:
+            first, second = conn.execute(select(repo.table).order_by(repo.table.c.id)).mappings().all()
+
+        self.assertNotIn("payload_json", first)
+        self.assertEqual((first["age"], first["sex"], first["alb"], first["alt"]), (45.0, "m", 31.5, None))
+        self.assertEqual(first["payload_hash"], payload_hash(payload))
+        self.assertEqual(len(first["payload_hash"]), 16)
+        self.assertEqual(second["sex"], "?")
+        self.assertEqual(repo.health(ping=False)["schema"], "compact")
+
+    def test_payload_hash_ignores_key_order(self):
+        self.assertEqual(payload_hash({"a": 1, "b": 2}), payload_hash({"b": 2, "a": 1}))
+        self.assertNotEqual(payload_hash({"a": 1}), payload_hash({"a": 2}))
+
+    def test_legacy_table_keeps_legacy_rows(self):
+        """Tabela ainda no formato antigo continua recebendo JSON ate ser migrada."""
+        from sqlalchemy import MetaData, create_engine
+
+        legacy_prediction_log_table(MetaData()).create(create_engine(self.db_url))
+        repo = PredictionRepository(self.db_url)
+        repo.log({"Age": 30}, self.result)
+
+        self.assertTrue(repo.legacy_schema)
+        self.assertEqual(self.count_rows(repo), 1)
+        self.assertEqual(repo.health(ping=False)["schema"], "legacy")
+
+    def test_pool_options_reach_the_engine(self):
+        """Tamanho do pool, overflow e pre-ping configurados chegam ao engine."""
+        repo = PredictionRepository(self.db_url, pool_size=3, max_overflow=1, pool_recycle=600, pre_ping="never")
+        pool = repo.engine.pool
+        self.assertEqual((pool.size(), pool._max_overflow, pool._recycle, pool._pre_ping), (3, 1, 600, False))
+        self.assertTrue(PredictionRepository(self.db_url).engine.pool._pre_ping)
+
+    def test_idle_pre_ping_only_checks_idle_connections(self):
+        """Com pre_ping em segundos, so conexoes ociosas alem do limite recebem SELECT 1."""
+        repo = PredictionRepository(self.db_url, pre_ping=0.05)
+        self.assertFalse(repo.engine.pool._pre_ping)
+        repo.log({"Age": 1}, self.result)
+        repo.log({"Age": 2}, self.result)
+        self.assertEqual(repo.pings, 0)
+        time.sleep(0.1)
+        repo.log({"Age": 3}, self.result)
+        self.assertEqual((repo.pings, self.count_rows(repo)), (1, 3))
+
+    def test_health_reports_pool_and_insert_latency(self):
+        repo = PredictionRepository(self.db_url, pool_size=2)
+        for age in range(5):
+            repo.log({"Age": age}, self.result)
+        health = repo.health()
+
+        self.assertEqual((health["status"], health["dialect"]), ("ok", "sqlite"))
+        self.assertEqual(health["insert_latency_ms"]["count"], 5)
+        self.assertLessEqual(health["insert_latency_ms"]["p50"], health["insert_latency_ms"]["p99"])
+        self.assertEqual((health["pool"]["size"], health["pool"]["checked_out"]), (2, 0))
+        self.assertGreaterEqual(health["ping_ms"], 0)
+        self.assertEqual(health["written"], 5)
+
+    def test_log_many_writes_batch_in_one_insert(self):
+        """log_many grava o lote inteiro num unico INSERT e ignora pares invalidos."""
+        repo = PredictionRepository(self.db_url)
+        repo.log_many([({"Age": age}, self.result) for age in range(3)] + [({"Age": 9}, {"prediction": None})])
+
+        self.assertEqual(self.count_rows(repo), 3)
+        self.assertEqual((repo.written, repo.health(ping=False)["insert_latency_ms"]["count"]), (3, 1))
+
+    def test_health_reports_unreachable_database(self):
+        repo = PredictionRepository(self.db_url)
+        (self.tmpdir / "predictions.db").unlink()
+        (self.tmpdir / "predictions.db").mkdir()  # caminho passa a ser um diretorio: conexao falha
+        repo.engine.dispose()
+        repo.log({"Age": 1}, self.result)
+        health = repo.health()
+        self.assertEqual((health["status"], health["failed"]), ("error", 1))
+        self.assertIn("error", health)
+
+
 class TestInputNormalization(unittest.TestCase):
     """Casos unitarios focados em normalizacao de payload."""
 
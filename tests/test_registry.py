@@ -0,0 +1,189 @@
+import json
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+from model.batching import MicroBatcher
+from model.dataset_cache import file_sha256
+from model.model_api import create_app
+from model.prediction_service import HepatitisPredictor, Paths, PredictionRepository
+from model.registry import ModelRegistry
+from tests.test_prediction_service import make_dataset
+
+PAYLOAD = {"Age": 45, "Sex": "m", "ALB": 31, "ALT": 60}
+
+
+class RegistryTestCase(unittest.TestCase):
+    """Registro com duas versoes (k=3 e k=5) em diretorio temporario."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = Path(tempfile.mkdtemp())
+        cls.data_csv = make_dataset(cls.tmpdir)
+        cls.root = cls.tmpdir / "registry"
+        registry = ModelRegistry(cls.root, cls.data_csv, predictor_options={"random_state": 0})
+        cls.v1 = registry.train_version({"n_neighbors": 3}, test_size=0.3)
+        cls.v2 = registry.train_version({"n_neighbors": 5}, test_size=0.3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        # Cada teste parte do indice salvo (v1 com 100%, v2 com peso 0)
+        index = json.loads((self.root / "registry.json").read_text())
+        index["traffic"] = {"v1": 100, "v2": 0}
+        (self.root / "registry.json").write_text(json.dumps(index))
+        self.registry = ModelRegistry(self.root, self.data_csv, seed=7)
+        self.registry.load()
+
+
+class TestModelRegistry(RegistryTestCase):
+    def test_versions_are_recorded_with_metadata(self):
+        """Cada versao tem artefato proprio e metadados de treino."""
+        self.assertEqual((self.v1["version"], self.v2["version"]), ("v1", "v2"))
+        for meta in (self.v1, self.v2):
+            self.assertTrue((self.root / meta["version"] / "knn_model.pkl").exists())
+            self.assertIn("accuracy", meta)
+            self.assertGreater(meta["train_seconds"], 0)
+            self.assertEqual(len(meta["dataset_sha256"]), 64)
+            self.assertIsNone(meta["samples_sha256"])
+        self.assertEqual(self.v2["params"], {"n_neighbors": 5})
+
+    def test_fingerprint_includes_appended_samples(self):
+        """Casos acrescentados entram no hash gravado da versao."""
+        tmpdir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        data_csv = make_dataset(tmpdir)
+        samples = Paths(data_csv, tmpdir / "knn_model.pkl").samples_csv
+        samples.write_text("Category,Age,Sex,ALB\nLive,30,f,33\n")
+
+        meta = ModelRegistry(tmpdir / "registry", data_csv).train_version(test_size=0.3)
+        self.assertEqual(meta["dataset_sha256"], file_sha256(data_csv))
+        self.assertEqual(meta["samples_sha256"], file_sha256(samples))
+
+    def test_first_version_takes_traffic_and_new_ones_are_pinned(self):
+        """Sem divisao explicita tudo vai para v1; v2 so responde pelo nome."""
+        self.assertEqual({self.registry.select()[0] for _ in range(20)}, {"v1"})
+        version, predictor = self.registry.select("v2")
+        self.assertEqual((version, predictor.n_neighbors), ("v2", 5))
+        with self.assertRaises(KeyError):
+            self.registry.select("v9")
+
+    def test_traffic_split_follows_weights(self):
+        """A divisao 70/30 e respeitada aproximadamente."""
+        self.registry.set_traffic({"v1": 70, "v2": 30})
+        counts = Counter(self.registry.select()[0] for _ in range(2000))
+        self.assertAlmostEqual(counts["v2"] / 2000, 0.3, delta=0.05)
+        # Persistido para a proxima partida
+        reloaded = ModelRegistry(self.root, self.data_csv)
+        self.assertEqual(reloaded.describe()["traffic"], {"v1": 70.0, "v2": 30.0})
+
+    def test_switching_versions_does_not_touch_disk_on_select(self):
+        """Depois de set_traffic, escolher versoes nao carrega nada do disco."""
+        self.registry.set_traffic({"v1": 0, "v2": 100})
+        with mock.patch("model.prediction_service.joblib.load") as load:
+            self.assertEqual(self.registry.select()[0], "v2")
+            self.registry.select("v1")[1].predict(PAYLOAD)
+            self.registry.activate("v1")
+            self.registry.select()[1].predict(PAYLOAD)
+        load.assert_not_called()
+
+    def test_invalid_traffic_rejected(self):
+        with self.assertRaises(KeyError):
+            self.registry.set_traffic({"v9": 100})
+        with self.assertRaises(ValueError):
+            self.registry.set_traffic({"v1": 0})
+        with self.assertRaises(ValueError):
+            self.registry.validate_params({"learning_rate": 1})
+        for bad in ({"n_neighbors": "abc"}, {"n_neighbors": 0}, {"weights": "foo"}, {"metric": "foo"},
+                    {"metric": "precomputed"}, {"neighbor_algorithm": "lsh"}, {"chunk_size": 1.5}):
+            with self.subTest(params=bad), self.assertRaises(ValueError):
+                self.registry.validate_params(bad)
+        self.assertEqual(self.registry.validate_params({"n_neighbors": 7, "metric": "manhattan", "chunk_size": None}),
+                         {"n_neighbors": 7, "metric": "manhattan", "chunk_size": None})
+
+
+    def test_unload_hook_runs_for_dropped_versions(self):
+        """Versoes que saem da divisao passam pelo gancho de descarga."""
+        v2 = self.registry.select("v2")[1]
+        unloaded = []
+        self.registry.add_unload_hook(unloaded.append)
+        self.registry.set_traffic({"v1": 100}, persist=False)
+        self.assertEqual(unloaded, [v2])
+        self.assertEqual(self.registry.describe()["loaded"], ["v1"])
+
+
+class TestRegistryApi(RegistryTestCase):
+    def setUp(self):
+        super().setUp()
+        base = HepatitisPredictor(Paths(self.data_csv, self.tmpdir / "base.pkl"), n_neighbors=3)
+        app = create_app(predictor=base, repo=PredictionRepository(None), registry=self.registry)
+        app.testing = True
+        self.client = app.test_client()
+
+    def test_predict_routes_by_header(self):
+        """X-Model-Version escolhe a versao e e ecoado na resposta."""
+        default = self.client.post("/predict", json=PAYLOAD)
+        pinned = self.client.post("/predict", json=PAYLOAD, headers={"X-Model-Version": "v2"})
+        self.assertEqual(default.headers["X-Model-Version"], "v1")
+        self.assertEqual(pinned.headers["X-Model-Version"], "v2")
+        self.assertEqual(pinned.get_json(), _expected(self.registry, "v2"))
+
+        batch = self.client.post("/predict/batch", json=[PAYLOAD], headers={"X-Model-Version": "v2"})
+        self.assertEqual(batch.headers["X-Model-Version"], "v2")
+        missing = self.client.post("/predict", json=PAYLOAD, headers={"X-Model-Version": "v9"})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_dropped_version_batcher_is_closed(self):
+        """Com micro-lotes, descarregar uma versao encerra e remove o despachante dela."""
+        base = HepatitisPredictor(Paths(self.data_csv, self.tmpdir / "base.pkl"), n_neighbors=3)
+        app = create_app(predictor=base, repo=PredictionRepository(None), registry=self.registry,
+                         microbatch={"enabled": True, "max_batch_size": 8, "max_wait": 0.0})
+        client = app.test_client()
+        v2 = self.registry.select("v2")[1]
+        client.post("/predict", json=PAYLOAD, headers={"X-Model-Version": "v2"})
+
+        with mock.patch.object(MicroBatcher, "close", autospec=True, side_effect=MicroBatcher.close) as close:
+            response = client.put("/models/traffic", json={"v1": 100})
+        self.assertEqual(response.status_code, 200)
+        (batcher,), _ = close.call_args
+        self.assertIs(batcher.predictor, v2)
+        self.assertTrue(batcher._closed)
+
+        # Requisicao que escolheu v2 antes da troca prediz direto, sem novo despachante
+        with mock.patch.object(self.registry, "select", return_value=("v2", v2)), \
+                mock.patch("model.model_api.MicroBatcher") as factory:
+            late = client.post("/predict", json=PAYLOAD, headers={"X-Model-Version": "v2"})
+        self.assertEqual(late.status_code, 200)
+        result = v2.predict(PAYLOAD)
+        self.assertEqual(late.get_json()["label"], result["label"])
+        factory.assert_not_called()
+
+    def test_models_endpoints(self):
+        """GET /models lista versoes; PUT /models/traffic troca a divisao."""
+        listed = self.client.get("/models").get_json()
+        self.assertEqual([v["version"] for v in listed["versions"]], ["v1", "v2"])
+
+        response = self.client.put("/models/traffic", json={"v2": 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.post("/predict", json=PAYLOAD).headers["X-Model-Version"], "v2")
+        self.assertEqual(self.client.put("/models/traffic", json={"v9": 1}).status_code, 404)
+        self.assertEqual(self.client.post("/models", json={"bogus": 1}).status_code, 400)
+        self.assertEqual(self.client.post("/models", json={"n_neighbors": "abc"}).status_code, 400)
+        self.assertEqual(self.client.post("/models", json={"weights": "foo"}).status_code, 400)
+
+        metrics = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn('hep_model_requests_total{version="v2"} 1', metrics)
+
+
+def _expected(registry, version):
+    result = registry.select(version)[1].predict(PAYLOAD)
+    return {"prediction": result["prediction"], "label": result["label"], "accuracy": result["confidence"]}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import io
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from model.prediction_service import HepatitisPredictor, Paths
+from model.score_file import PARQUET_AVAILABLE, main, score_file
+from tests.test_prediction_service import make_dataset
+
+
+class TestScoreFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+        self.predictor = HepatitisPredictor(self.paths, random_state=0, n_neighbors=3)
+        self.predictor.train(test_size=0.3)
+        rng = np.random.default_rng(0)
+        n = 150
+        self.frame = pd.DataFrame({
+            "id": [f"p{i}" for i in range(n)],
+            "Age": rng.integers(20, 80, n),
+            "Sex": [["m", "f", None, " Female "][i % 4] for i in range(n)],
+            "ALB": rng.normal(30, 4, n).round(1),
+            "ALT": np.where(rng.random(n) < 0.2, np.nan, rng.normal(60, 10, n).round(1)),
+            "GGT": rng.normal(35, 8, n).round(1),
+        })
+        self.input = self.tmpdir / "exames.csv"
+        self.frame.to_csv(self.input, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def expected(self):
+        # Mesmos registros via predict, com celulas vazias como campos ausentes
+        records = self.frame.drop(columns=["id"]).astype(object).to_dict("records")
+        return [
+            self.predictor.predict({k: None if isinstance(v, float) and v != v else v for k, v in r.items()})
+            for r in records
+        ]
+
+    def test_chunks_match_single_predictions(self):
+        """Blocos menores que o arquivo produzem as mesmas predicoes, na ordem e com as colunas mantidas."""
+        output = self.tmpdir / "saida.csv"
+        summary = score_file(self.predictor, self.input, output, chunk_size=40, keep=["id"])
+        out = pd.read_csv(output)
+
+        self.assertEqual((summary["rows"], summary["errors"]), (150, 0))
+        self.assertGreater(summary["rows_per_second"], 0)
+        self.assertEqual(list(out.columns), ["row", "id", "prediction", "label", "confidence", "error"])
+        self.assertEqual(out["row"].tolist(), list(range(150)))
+        self.assertEqual(out["id"].tolist(), self.frame["id"].tolist())
+        expected = self.expected()
+        self.assertEqual(out["label"].tolist(), [r["label"] for r in expected])
+        self.assertEqual(out["confidence"].tolist(), [r["confidence"] for r in expected])
+
+    def test_process_pool_matches_single_process(self):
+        """Com workers > 1 a saida e identica a de um processo so."""
+        single, pooled = self.tmpdir / "um.csv", self.tmpdir / "pool.csv"
+        score_file(self.predictor, self.input, single, chunk_size=25)
+        summary = score_file(self.predictor, self.input, pooled, chunk_size=25, workers=2)
+
+        self.assertEqual(summary["rows"], 150)
+        pd.testing.assert_frame_equal(pd.read_csv(single), pd.read_csv(pooled))
+
+    def test_invalid_rows_get_error_column(self):
+        """Linhas que nao normalizam recebem erro sem derrubar o arquivo."""
+        pd.DataFrame({"Age": [40, 50, 60], "Sex": [1.0, np.inf, np.nan], "ALB": [30, 31, 32]}).to_csv(
+            self.input, index=False
+        )
+        output = self.tmpdir / "saida.csv"
+        summary = score_file(self.predictor, self.input, output)
+        out = pd.read_csv(output)
+
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(out["error"].notna().tolist(), [False, True, False])
+        self.assertTrue(np.isnan(out.loc[1, "prediction"]))
+
+    def test_non_finite_cell_fills_row_error(self):
+        """Celula inf em coluna numerica vira erro da linha, nos dois caminhos de normalizacao."""
+        for n in (3, 100):
+            frame = self.frame.head(n).copy()
+            frame["ALB"] = frame["ALB"].astype(object)
+            frame.loc[1, "ALB"] = "inf"
+            frame.loc[2, "GGT"] = np.inf
+            frame.to_csv(self.input, index=False)
+            output = self.tmpdir / "saida.csv"
+            with self.subTest(rows=n):
+                summary = score_file(self.predictor, self.input, output)
+                out = pd.read_csv(output)
+                self.assertEqual((summary["rows"], summary["errors"]), (n, 2))
+                self.assertEqual(out["error"].notna().tolist(), [False, True, True] + [False] * (n - 3))
+                self.assertIn("ALB", out.loc[1, "error"])
+
+    def test_cli_reports_throughput(self):
+        output = self.tmpdir / "saida.csv"
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            main([str(self.input), str(output), "--workers", "1", "--model-path", str(self.paths.model_pkl)])
+        self.assertIn("linhas/s", stdout.getvalue())
+        self.assertEqual(len(pd.read_csv(output)), 150)
+
+    @unittest.skipUnless(PARQUET_AVAILABLE, "pyarrow nao instalado")
+    def test_parquet_round_trip(self):
+        source, output = self.tmpdir / "exames.parquet", self.tmpdir / "saida.parquet"
+        self.frame.to_parquet(source, index=False)
+        score_file(self.predictor, source, output, chunk_size=40)
+        csv_output = self.tmpdir / "saida.csv"
+        score_file(self.predictor, self.input, csv_output, chunk_size=40)
+        self.assertEqual(pd.read_parquet(output)["label"].tolist(), pd.read_csv(csv_output)["label"].tolist())
+
+
+    @unittest.skipUnless(PARQUET_AVAILABLE, "pyarrow nao instalado")
+    def test_parquet_first_chunk_with_only_errors(self):
+        """Primeiro bloco so com erros nao fixa colunas de resultado como null no schema."""
+        frame = self.frame.copy()
+        frame.loc[:9, "ALB"] = np.inf
+        source, output = self.tmpdir / "exames.parquet", self.tmpdir / "saida.parquet"
+        frame.to_parquet(source, index=False)
+        summary = score_file(self.predictor, source, output, chunk_size=10, keep=["id"])
+
+        out = pd.read_parquet(output)
+        self.assertEqual((summary["rows"], summary["errors"]), (150, 10))
+        self.assertTrue(out["label"].iloc[:10].isna().all())
+        self.assertTrue(out["label"].iloc[10:].notna().all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from model.prediction_service import HepatitisPredictor, Paths
+from model.streaming import ReservoirSample, RunningMoments, fit_streaming
+from tests.test_prediction_service import make_dataset
+
+
+class TestStreamingHelpers(unittest.TestCase):
+    def test_running_moments_match_numpy(self):
+        """Media e variancia combinadas por bloco batem com o calculo direto."""
+        rng = np.random.default_rng(0)
+        X = rng.normal(5, 3, size=(1000, 4))
+        X[rng.random(X.shape) < 0.1] = np.nan
+        moments = RunningMoments(4)
+        for start in range(0, len(X), 37):
+            moments.update(X[start:start + 37])
+        np.testing.assert_allclose(moments.mean, np.nanmean(X, axis=0))
+        np.testing.assert_allclose(moments.m2 / moments.count, np.nanvar(X, axis=0))
+        np.testing.assert_array_equal(moments.count, (~np.isnan(X)).sum(axis=0))
+
+    def test_reservoir_keeps_fixed_size_sample(self):
+        """O reservatorio guarda exatamente size linhas distintas do fluxo."""
+        df = pd.DataFrame({"a": np.arange(500)})
+        reservoir = ReservoirSample(50, np.random.default_rng(1))
+        for start in range(0, 500, 64):
+            reservoir.offer(df.iloc[start:start + 64])
+        self.assertEqual(reservoir.seen, 500)
+        self.assertEqual(len(set(reservoir.index)), 50)
+        self.assertEqual([r[0] for r in reservoir.rows], reservoir.index)
+        # Nao fica preso ao inicio do arquivo
+        self.assertGreater(max(reservoir.index), 250)
+
+
+class TestStreamingTraining(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.csv = make_dataset(self.tmpdir)
+        df = pd.read_csv(self.csv)
+        df.loc[1, "ALB"] = None
+        df.loc[4, "Sex"] = None
+        df.to_csv(self.csv)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_streaming_fit_matches_in_memory_fit_on_same_rows(self):
+        """Pre-processamento e predicoes iguais ao fit do sklearn nas mesmas linhas de treino."""
+        predictor = HepatitisPredictor(Paths(self.csv, self.tmpdir / "unused.pkl"), n_neighbors=3)
+        pipeline, encoder = predictor._build_pipeline(), LabelEncoder()
+        fit = fit_streaming(
+            self.csv, pipeline, encoder, self.tmpdir / "store.dat",
+            target_col="Category", numeric_cols=predictor.numeric_cols,
+            categorical_cols=predictor.categorical_cols, chunk_size=5, test_size=0.3, random_state=0,
+        )
+
+        df = predictor._load_dataset()
+        train = df.drop(index=fit.holdout_index)
+        reference = predictor._build_pipeline()
+        reference_encoder = LabelEncoder()
+        y = reference_encoder.fit_transform(train["Category"].astype(str))
+        reference.fit(train.drop(columns=["Category"]), y)
+
+        self.assertEqual(fit.n_train, len(train))
+        pd.testing.assert_frame_equal(
+            fit.X_holdout.reset_index(drop=True),
+            df.loc[fit.holdout_index].drop(columns=["Category"]).reset_index(drop=True),
+            check_dtype=False,
+        )
+        np.testing.assert_allclose(
+            pipeline.steps[0][1].transform(df.drop(columns=["Category"])),
+            reference.steps[0][1].transform(df.drop(columns=["Category"])),
+            rtol=1e-12, atol=1e-12,
+        )
+        np.testing.assert_array_equal(
+            pipeline.predict(fit.X_holdout), reference.predict(fit.X_holdout)
+        )
+
+    def test_predictor_trains_in_chunks_and_cleans_store(self):
+        """chunk_size liga o treino em blocos; o artefato recarrega e o memmap temporario some."""
+        paths = Paths(self.csv, self.tmpdir / "knn_model.pkl")
+        predictor = HepatitisPredictor(paths, n_neighbors=3, chunk_size=4)
+        result = predictor.train(test_size=0.3)
+        self.assertEqual(result["train_rows"] + result["holdout_rows"], 12)
+        self.assertEqual(sorted(p.name for p in self.tmpdir.iterdir()), ["HepatitisCdata.csv", "knn_model.pkl"])
+
+        payload = {"Age": 50, "Sex": "f", "ALB": 28, "ALT": 70}
+        reloaded = HepatitisPredictor(paths, n_neighbors=3, mmap_mode="r")
+        self.assertEqual(reloaded.predict(payload), predictor.predict(payload))
+
+
+    def test_streaming_train_includes_appended_samples(self):
+        """Treino em blocos tambem le o CSV de casos acrescentados, depois do dataset."""
+        paths = Paths(self.csv, self.tmpdir / "knn_model.pkl")
+        pd.DataFrame({
+            "Category": ["Live", "Die", "Live"], "Age": [30, 66, 41], "Sex": ["f", "m", "m"],
+            "ALB": [33, 24, 35], "ALT": [50, 85, 56],
+        }).to_csv(paths.samples_csv, index=False)
+
+        predictor = HepatitisPredictor(paths, n_neighbors=3, chunk_size=4)
+        result = predictor.train(test_size=0.3)
+        self.assertEqual(result["train_rows"] + result["holdout_rows"], 15)
+        self.assertEqual(predictor.pipeline.named_steps["model"].n_samples_fit_, result["train_rows"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from model.model_api import create_app
+from model.prediction_service import HepatitisPredictor, Paths, PredictionRepository
+from model.tracing import Tracer, get_tracing_options_from_env
+from tests.test_prediction_service import make_dataset
+
+
+def read_lines(stream: io.StringIO):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_tracer_never_starts_a_trace(self):
+        """Desligado, begin nao cria rastro e nada e escrito."""
+        stream = io.StringIO()
+        tracer = Tracer(enabled=False, stream=stream)
+        with tracer.trace() as trace:
+            self.assertIsNone(trace)
+            self.assertIsNone(tracer.current())
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_sampling_rate_zero_skips_all(self):
+        """Com taxa 0 nenhuma requisicao e amostrada."""
+        tracer = Tracer(enabled=True, sample_rate=0.0, stream=io.StringIO())
+        self.assertTrue(all(tracer.begin() is None for _ in range(50)))
+
+    def test_events_are_json_lines_with_trace_id(self):
+        """Eventos saem como JSON valido, com o id do rastro e NaN como null."""
+        stream = io.StringIO()
+        tracer = Tracer(enabled=True, stream=stream)
+        with tracer.trace("abc123") as trace:
+            trace.event("step", value=float("nan"), items=[1, 2])
+        self.assertIsNone(tracer.current())
+        (record,) = read_lines(stream)
+        self.assertEqual(record["trace_id"], "abc123")
+        self.assertEqual(record["event"], "step")
+        self.assertIsNone(record["value"])
+        self.assertEqual(record["items"], [1, 2])
+
+    def test_invalid_sample_rate(self):
+        with self.assertRaises(ValueError):
+            Tracer(enabled=True, sample_rate=1.5)
+
+    def test_trace_file_is_opened_once_per_process(self):
+        """Varios preditores com TRACE_FILE compartilham o mesmo arquivo aberto."""
+        tmpdir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        with mock.patch.dict(os.environ, {"TRACE": "1", "TRACE_FILE": str(tmpdir / "trace.jsonl")}):
+            first, second = get_tracing_options_from_env(), get_tracing_options_from_env()
+        self.addCleanup(first["stream"].close)
+        self.assertIs(first["stream"], second["stream"])
+        Tracer(**first).emit({"event": "a"})
+        Tracer(**second).emit({"event": "b"})
+        lines = (tmpdir / "trace.jsonl").read_text().splitlines()
+        self.assertEqual([json.loads(line)["event"] for line in lines], ["a", "b"])
+
+
+class TestPredictorTracing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = Path(tempfile.mkdtemp())
+        cls.paths = Paths(data_csv=make_dataset(cls.tmpdir), model_pkl=cls.tmpdir / "knn_model.pkl")
+        HepatitisPredictor(cls.paths, random_state=0, n_neighbors=3).train(test_size=0.3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_predict_emits_events_only_inside_trace(self):
+        """Predicao fora de um rastro nao escreve; dentro, emite normalizacao e resultado."""
+        stream = io.StringIO()
+        tracer = Tracer(enabled=True, stream=stream)
+        predictor = HepatitisPredictor(self.paths, n_neighbors=3, tracer=tracer)
+        payload = {"Age": 40, "Sex": "m", "ALB": 30}
+
+        predictor.predict(payload)
+        self.assertEqual(stream.getvalue(), "")
+
+        with tracer.trace("t1"):
+            result = predictor.predict(payload)
+        events = read_lines(stream)
+        self.assertEqual([e["event"] for e in events], ["predict.normalized", "predict.result"])
+        self.assertTrue(all(e["trace_id"] == "t1" for e in events))
+        self.assertIsNone(events[0]["row"]["ALP"])
+        self.assertEqual(events[1]["result"], result)
+
+    def test_debug_arguments_are_not_formatted_when_disabled(self):
+        """Sem DEBUG=1 o logging nao e chamado (nada e formatado)."""
+        predictor = HepatitisPredictor(self.paths, n_neighbors=3)
+        with mock.patch("model.prediction_service.logging.info") as info:
+            predictor.predict({"Age": 40, "ALB": 30})
+        info.assert_not_called()
+
+    def test_api_propagates_trace_id_header(self):
+        """A API reaproveita X-Trace-Id e devolve o id na resposta."""
+        stream = io.StringIO()
+        predictor = HepatitisPredictor(
+            self.paths, n_neighbors=3, tracer=Tracer(enabled=True, stream=stream)
+        )
+        app = create_app(predictor=predictor, repo=PredictionRepository(None))
+        client = app.test_client()
+
+        response = client.post("/predict", json={"Age": 40, "ALB": 30}, headers={"X-Trace-Id": "req-42"})
+        self.assertEqual(response.headers["X-Trace-Id"], "req-42")
+        events = read_lines(stream)
+        self.assertEqual(events[-1]["event"], "http.request")
+        self.assertEqual(events[-1]["status"], 200)
+        self.assertTrue(all(e["trace_id"] == "req-42" for e in events))
+        self.assertIsNone(predictor.tracer.current())
+
+
+if __name__ == "__main__":
+    unittest.main()
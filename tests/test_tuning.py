@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.neighbors import KNeighborsClassifier
+
+from model.prediction_service import HepatitisPredictor, Paths
+from model.preprocess_cache import PreprocessCache
+from model.tuning import _score_fold, tune
+from tests.test_prediction_service import make_dataset
+
+SMALL_SPACE = {"n_neighbors": [1, 3], "weights": ["uniform", "distance"], "metric": ["euclidean", "manhattan"]}
+
+
+def make_frame(n_rows: int, seed: int = 0):
+    """Dados aleatorios com as colunas do dataset e tres classes."""
+    rng = np.random.default_rng(seed)
+    numeric = ["Age", "ALB", "ALP", "ALT", "AST", "BIL", "CHE", "CHOL", "CREA", "GGT", "PROT"]
+    X = pd.DataFrame(rng.normal(size=(n_rows, len(numeric))).round(1), columns=numeric)
+    X.loc[rng.random(n_rows) < 0.1, "ALB"] = np.nan
+    X.insert(1, "Sex", rng.choice(["m", "f"], size=n_rows).astype(object))
+    y = rng.integers(0, 3, size=n_rows)
+    return X, y
+
+
+class TestTuning(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.paths = Paths(data_csv=make_dataset(self.tmpdir), model_pkl=self.tmpdir / "knn_model.pkl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_shared_neighbor_search_matches_sklearn(self):
+        """Acuracia de cada combinacao igual a de um KNeighborsClassifier ajustado do zero."""
+        X, y = make_frame(300)
+        template = HepatitisPredictor(self.paths)._build_pipeline()
+        settings = [(k, w, m) for k in (1, 4, 9) for w in ("uniform", "distance") for m in ("euclidean", "manhattan")]
+        _, results = _score_fold(clone(template.steps[0][1]), X[:200], y[:200], X[200:], y[200:], 3, settings)
+
+        preprocess = clone(template.steps[0][1])
+        Xt_train, Xt_val = preprocess.fit_transform(X[:200]), preprocess.transform(X[200:])
+        for k, w, m in settings:
+            knn = KNeighborsClassifier(n_neighbors=k, weights=w, metric=m, algorithm="brute")
+            expected = knn.fit(Xt_train, y[:200]).score(Xt_val, y[200:])
+            self.assertAlmostEqual(results[(k, w, m)][0], expected, msg=(k, w, m))
+
+    def test_leaderboard_covers_space_sorted_by_accuracy(self):
+        """Ranking com uma linha por configuracao, tempo por configuracao e melhor primeiro."""
+        X, y = make_frame(120)
+        template = HepatitisPredictor(self.paths)._build_pipeline()
+        report = tune(template, X, y, search_space={**SMALL_SPACE, "imputer_strategy": ["mean", "median"]}, cv=3, n_jobs=1)
+
+        board = report["leaderboard"]
+        self.assertEqual(len(board), 16)
+        accuracies = [row["mean_accuracy"] for row in board]
+        self.assertEqual(accuracies, sorted(accuracies, reverse=True))
+        self.assertEqual([row["rank"] for row in board], list(range(1, 17)))
+        self.assertTrue(all(row["seconds"] > 0 for row in board))
+        self.assertEqual(report["best_params"], board[0]["params"])
+
+    def test_parallel_search_matches_sequential(self):
+        """O pool de processos produz o mesmo ranking que a execucao sequencial."""
+        X, y = make_frame(120)
+        template = HepatitisPredictor(self.paths)._build_pipeline()
+        sequential = tune(template, X, y, search_space=SMALL_SPACE, cv=3, n_jobs=1)
+        parallel = tune(template, X, y, search_space=SMALL_SPACE, cv=3, n_jobs=2)
+        strip = lambda report: [(r["params"], r["mean_accuracy"]) for r in report["leaderboard"]]  # noqa: E731
+        self.assertEqual(strip(parallel), strip(sequential))
+
+    def test_cached_folds_skip_preprocess_fit(self):
+        """Com cache, a segunda busca sobre os mesmos dados nao reajusta o pre-processamento."""
+        X, y = make_frame(120)
+        template = HepatitisPredictor(self.paths)._build_pipeline()
+        cache = PreprocessCache(self.tmpdir / "preprocess")
+        first = tune(template, X, y, search_space=SMALL_SPACE, cv=3, n_jobs=1, cache=cache, cache_key="data")
+        original = ColumnTransformer.fit_transform
+        with mock.patch.object(ColumnTransformer, "fit_transform", autospec=True, side_effect=original) as fit:
+            second = tune(template, X, y, search_space=SMALL_SPACE, cv=3, n_jobs=1, cache=cache, cache_key="data")
+        self.assertEqual(fit.call_count, 0)
+        self.assertEqual(second["best_params"], first["best_params"])
+
+    def test_rejects_unknown_param_and_large_k(self):
+        """Parametros fora do espaco ou k maior que o fold geram ValueError."""
+        X, y = make_frame(30)
+        template = HepatitisPredictor(self.paths)._build_pipeline()
+        with self.assertRaises(ValueError):
+            tune(template, X, y, search_space={"leaf_size": [10]}, cv=3, n_jobs=1)
+        with self.assertRaises(ValueError):
+            tune(template, X, y, search_space={"n_neighbors": [50]}, cv=3, n_jobs=1)
+
+    def test_train_with_tune_persists_winner(self):
+        """train(tune=True) salva a configuracao vencedora junto do modelo."""
+        predictor = HepatitisPredictor(self.paths, random_state=0)
+        result = predictor.train(tune=True, search_space=SMALL_SPACE, cv=2, n_jobs=1)
+
+        self.assertIn("tuning_seconds", result)
+        self.assertEqual(len(result["leaderboard"]), 16)
+        best = result["best_params"]
+        model = predictor.pipeline.steps[-1][1]
+        self.assertEqual((model.n_neighbors, model.weights, model.metric), (best["n_neighbors"], best["weights"], best["metric"]))
+
+        reloaded = HepatitisPredictor(self.paths)
+        reloaded.predict({"Age": 45, "Sex": "m", "ALB": 31})
+        for name, value in best.items():
+            self.assertEqual(getattr(reloaded, name), value)
+
+    def test_tune_rejected_with_chunked_training(self):
+        """Busca de hiperparametros nao combina com treino em blocos."""
+        predictor = HepatitisPredictor(self.paths, chunk_size=4)
+        with self.assertRaises(ValueError):
+            predictor.train(tune=True)
+
+
+if __name__ == "__main__":
+    unittest.main()